@@ -14,13 +14,14 @@ import sys
 sys.path.append(str(Path(__file__).parent / "src"))
 
 from config import PAGE_CONFIG, MESSAGES, UPLOAD_DIR
-from src.data_loader import DataLoader, load_sample_data, check_default_base_exists, load_default_base_if_exists
-from src.calculations import LacunaCalculator
+from src.data_loader import DataLoader, load_sample_data, check_default_base_exists
+from src.calculations import KPI_OUTPUTS, LacunaCalculator
 from src.visualizations import PulsoVisualizations
 from src.utils import (
     setup_logging, ensure_directories, initialize_session_state,
-    SessionManager, show_data_info, clear_cache
+    SessionManager, show_data_info, clear_cache, show_default_base_loading
 )
+from src.background_loader import get_background_loader
 
 # Configuração da página
 st.set_page_config(**PAGE_CONFIG)
@@ -30,16 +31,15 @@ setup_logging()
 ensure_directories()
 initialize_session_state()
 
-# Carregamento automático da base padrão se não houver dados carregados
+# Inicialização do processo: a carga da base padrão começa com o carregador
+# compartilhado, independentemente da sessão já ter dados
+get_background_loader()
+
+# Carregamento automático da base padrão em segundo plano (compartilhado entre as
+# sessões); a página é renderizada sem esperar e os indicadores aparecem quando
+# os dados estiverem prontos
 if not SessionManager.is_data_loaded() and check_default_base_exists():
-    with st.spinner("🔄 Carregando base padrão..."):
-        default_data = load_default_base_if_exists()
-        if default_data:
-            loader = DataLoader()
-            # Usar os metadados criados na função load_default_base
-            SessionManager.save_data(default_data, loader.metadata)
-            st.success("✅ Base padrão carregada automaticamente!")
-            st.rerun()
+    SessionManager.attach_default_base()
 
 # Sidebar
 st.sidebar.title("🎯 Dashboard Pulso")
@@ -71,12 +71,20 @@ with col1:
         help="Selecione o arquivo Excel com os dados do Pulso"
     )
 
+    # Atualização incremental: mantém o histórico e substitui apenas os dias alterados
+    incremental_update = False
+    if SessionManager.is_data_loaded():
+        incremental_update = st.checkbox(
+            "Atualização incremental",
+            help="Mantém os dias já carregados e substitui/adiciona apenas os dias novos ou alterados do arquivo"
+        )
+
 with col2:
     if check_default_base_exists() and st.button("🔄 Recarregar Base Padrão", help="Recarregar a base padrão"):
         with st.spinner("Recarregando base padrão..."):
-            default_data = load_default_base_if_exists()
+            loader = DataLoader()
+            default_data = loader.load_default_base()
             if default_data:
-                loader = DataLoader()
                 SessionManager.save_data(default_data, loader.metadata)
                 st.success("✅ Base padrão recarregada!")
                 st.rerun()
@@ -85,11 +93,20 @@ with col2:
 if uploaded_file is not None:
     loader = DataLoader()
     
-    # Verificar se é um arquivo novo
-    current_file = SessionManager.get_metadata().get("file_name")
-    if current_file != uploaded_file.name:
+    # Verificar se é um conteúdo novo (pelo hash do conteúdo, não pelo nome do arquivo)
+    upload_hash = SessionManager.upload_content_hash(uploaded_file)
+    if upload_hash not in SessionManager.get_metadata().get("file_hashes", []):
         with st.spinner("🔄 Processando arquivo..."):
-            data = loader.load_excel_data(uploaded_file)
+            if incremental_update:
+                data = loader.load_excel_incremental(
+                    uploaded_file, SessionManager.get_data(), SessionManager.get_metadata(), file_hash=upload_hash
+                )
+            elif SessionManager.attach_dataset(loader.dataset_key_from_hash(upload_hash)):
+                # Mesmo conteúdo já publicado por outra sessão: nada a processar
+                st.success(MESSAGES["upload_success"])
+                st.rerun()
+            else:
+                data = loader.load_excel_data(uploaded_file, file_hash=upload_hash)
             
             if data:
                 # Salvar na sessão
@@ -113,10 +130,25 @@ if SessionManager.is_data_loaded():
         st.rerun()
     
     # Calcular métricas
-    calculator = LacunaCalculator(data)
-    metrics = calculator.calculate_all_metrics()
+    calculator = LacunaCalculator(
+        data, dataset_key=SessionManager.get_dataset_key(),
+        weekly_medians=SessionManager.get_metadata().get("weekly_medians")
+    )
+    metrics = calculator.metrics()
+    
+    # Uso do cache de métricas compartilhado (para dimensionar CACHE_CONFIG)
+    cache_stats = LacunaCalculator.cache_stats()
+    st.sidebar.caption(
+        f"🧮 Cache de métricas: {cache_stats['hits']} acertos, {cache_stats['misses']} falhas "
+        f"({cache_stats['entries']}/{cache_stats['max_entries']} entradas)"
+    )
     
-    if metrics and "error" not in metrics:
+    # Entradas exibidas na página: calculadas antes da verificação de erro
+    metrics_error = metrics.check(
+        KPI_OUTPUTS + ["percentual_captura", "top_oportunidades", "analise_clusters", "analise_gr"]
+    )
+    
+    if metrics and metrics_error is None:
         # Criar visualizações
         viz = PulsoVisualizations()
         
@@ -209,10 +241,13 @@ if SessionManager.is_data_loaded():
     
     else:
         st.error("❌ Erro no processamento dos dados")
-        if "error" in metrics:
-            st.error(f"Detalhes: {metrics['error']}")
+        if metrics_error:
+            st.error(f"Detalhes: {metrics_error}")
 
 else:
+    if show_default_base_loading():
+        st.stop()
+    
     # Página inicial - sem dados
     st.info(MESSAGES["no_data"])
     
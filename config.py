@@ -31,6 +31,7 @@ PAGE_CONFIG = {
 EXCEL_CONFIG = {
     "file_types": ["xlsx", "xls"],
     "max_file_size": 50,  # MB
+    "max_file_size_streaming": 200,  # MB (leitor em streaming)
     "required_sheets": [
         "pulso_consulta_diaria",
         "pulso_consulta_diaria_cluster_a"
@@ -50,6 +51,185 @@ REQUIRED_COLUMNS = {
     ]
 }
 
+# Registro de schema: colunas que cada página usa em cada aba e seus tipos.
+# Tipos: "category" (texto de baixa cardinalidade), "string", "int32",
+# "float32", "float64" e "datetime".
+SHEET_SCHEMAS = {
+    "pulso_consulta_diaria": {
+        "dtypes": {
+            "NomeLoja": "category",
+            "codigo_franquia": "int32",
+            "NumeroGR": "category",
+            "grupo_comparavel": "category",
+            "ds_hub": "category",
+            "divisao": "category",
+            "datavenda": "datetime",
+            "mes": "int32",
+            "semana": "category",
+            "receita_liquida": "float32",
+            "receita_liquida_um_aa_com": "float32",
+            "qtd_cupom": "int32",
+            "qtd_cupom_um_aa_com": "int32",
+            "qtd_item": "int32",
+            "Qtd_item_um_aa_com": "int32",
+            "Mediana_Semana_RL": "float32",
+            "Mediana_Semana_cupom": "float32",
+            "Mediana_semana_bm": "float32",
+            "Mediana_semana_pm": "float32",
+            "Mediana_semana_prod": "float32",
+            "LacunaRL": "float32",
+            "LacunaCupom": "float32",
+            "LacunaBM": "float32",
+            "LacunaPM": "float32",
+            "LacunaProd": "float32",
+            "TTLacuna": "float32"
+        },
+        "pages": {
+            "base": REQUIRED_COLUMNS["pulso_consulta_diaria"] + [
+                "grupo_comparavel", "ds_hub", "divisao", "semana", "mes",
+                "Mediana_semana_bm", "Mediana_semana_pm", "Mediana_semana_prod",
+                "LacunaRL", "LacunaCupom", "LacunaBM", "LacunaPM", "LacunaProd", "TTLacuna"
+            ],
+            "home": ["NomeLoja", "NumeroGR", "datavenda", "receita_liquida", "qtd_cupom", "qtd_item"],
+            "analise_lacunas": [],
+            "visao_loja": ["NomeLoja", "datavenda", "receita_liquida", "qtd_cupom", "qtd_item"],
+            "clusters": [
+                "NomeLoja", "codigo_franquia", "grupo_comparavel", "datavenda", "semana",
+                "receita_liquida", "receita_liquida_um_aa_com", "qtd_cupom", "qtd_cupom_um_aa_com",
+                "qtd_item", "Qtd_item_um_aa_com"
+            ],
+            "exportar": ["NomeLoja", "codigo_franquia", "NumeroGR", "datavenda"],
+            # Cálculo nativo das Lacunas (NativeLacunaEngine)
+            "lacunas_nativas": [
+                "NomeLoja", "grupo_comparavel", "datavenda", "semana",
+                "receita_liquida", "receita_liquida_um_aa_com", "qtd_cupom", "qtd_cupom_um_aa_com",
+                "qtd_item", "Qtd_item_um_aa_com", "Mediana_Semana_RL", "Mediana_Semana_cupom",
+                "Mediana_semana_bm", "Mediana_semana_pm", "Mediana_semana_prod"
+            ]
+        }
+    },
+    "pulso_consulta_diaria_cluster_a": {
+        "dtypes": {
+            "NomeLoja": "category",
+            "codigo_franquia": "int32",
+            "NumeroGR": "category",
+            "grupo_comparavel": "category",
+            "ds_hub": "category",
+            "divisao": "category",
+            "datavenda": "datetime",
+            "mes": "int32",
+            "semana": "category",
+            "LacunaRL": "float32",
+            "LacunaCupom": "float32",
+            "LacunaBM": "float32",
+            "LacunaPM": "float32",
+            "LacunaProd": "float32",
+            "TTLacuna": "float32"
+        },
+        "pages": {
+            "base": REQUIRED_COLUMNS["pulso_consulta_diaria_cluster_a"] + [
+                "codigo_franquia", "NumeroGR", "ds_hub", "divisao", "datavenda", "semana", "mes", "TTLacuna"
+            ],
+            "home": ["NomeLoja", "grupo_comparavel", "NumeroGR", "LacunaRL", "LacunaCupom", "LacunaBM", "LacunaPM", "LacunaProd"],
+            "analise_lacunas": ["NomeLoja", "grupo_comparavel", "LacunaRL", "LacunaCupom", "LacunaBM", "LacunaPM", "LacunaProd"],
+            "visao_loja": ["NomeLoja", "grupo_comparavel", "LacunaRL", "LacunaCupom", "LacunaBM", "LacunaPM", "LacunaProd"],
+            "clusters": [],
+            "exportar": ["NomeLoja", "grupo_comparavel", "LacunaRL"]
+        }
+    }
+}
+
+# Carregamento: "load_mode" = "projected" lê apenas as colunas do SHEET_SCHEMAS,
+# "full" lê todas as colunas (diagnósticos como debug_lacuna_cupom.py)
+LOADER_CONFIG = {
+    "load_mode": "projected",
+    # Leitor das abas: "streaming" (openpyxl linha a linha, buffers por coluna)
+    # ou "pandas" (pd.read_excel, materializa todas as células da aba)
+    "reader": "streaming",
+    # Leitura paralela: cada aba (e cada arquivo) em um processo do pool
+    "parallel": False,
+    "max_workers": None,  # None = número de CPUs
+    # Intervalo (s) entre verificações da base padrão carregada em segundo plano
+    "background_poll_interval": 1.0,
+    # Nova tentativa após falha da carga em segundo plano: espera (s) dobrada a
+    # cada falha consecutiva, limitada a background_retry_max_backoff
+    "background_retry_backoff": 5.0,
+    "background_retry_max_backoff": 300.0
+}
+
+# Ingestão tipada: erro absoluto máximo aceito ao converter float64 -> float32
+# (acima disso a coluna permanece em float64)
+DTYPE_CONFIG = {
+    "float32_max_abs_error": 0.01
+}
+
+# Conferência das Lacunas nativas com a planilha. Pela fórmula da Lacuna
+# (Documentação de Fórmulas), Lacuna = atual - (1 + mediana) * ano anterior;
+# como os volumes das duas fontes são os mesmos, o erro dividido pelo valor do
+# ano anterior é a diferença entre as medianas de crescimento usadas. A
+# tolerância é, portanto, expressa em pontos de crescimento: relative_tolerance
+# = 0.01 aceita até 1 p.p. de diferença (a unidade da Variacao_YoY_%). Cada
+# Lacuna, em cada origem de medianas, é aprovada quando a maioria das lojas
+# comparadas (min_within_tolerance %) fica dentro da tolerância.
+NATIVE_LACUNA_CONFIG = {
+    "relative_tolerance": 0.01,
+    "min_within_tolerance": 50.0
+}
+
+# Cubo de agregados da aba cluster: dimensões, medidas e combinações de
+# dimensões materializadas após a carga (as demais derivam da mais próxima)
+CUBE_CONFIG = {
+    "dimensions": ["NumeroGR", "divisao", "ds_hub", "grupo_comparavel", "semana", "mes"],
+    "measures": ["LacunaRL", "LacunaCupom", "LacunaBM", "LacunaPM", "LacunaProd", "NomeLoja"],
+    "materialized": [
+        ["NumeroGR", "divisao", "grupo_comparavel", "semana"],
+        ["grupo_comparavel", "semana"],
+        ["NumeroGR", "divisao"],
+        ["grupo_comparavel"],
+        ["NumeroGR"],
+        ["divisao"],
+        ["semana"],
+        ["mes"]
+    ]
+}
+
+# Clustering de lojas: semente dos modelos e quantidade de resultados
+# ajustados mantidos em memória (compartilhados entre sessões)
+CLUSTERING_CONFIG = {
+    "random_state": 42,
+    "max_entries": 32,
+    # Seleção automática de k: candidatos, sementes por k e amostra da silhueta
+    "k_range": (2, 8),
+    "seeds": 3,
+    "silhouette_sample": 2000,
+    # Candidatos avaliados em um ProcessPoolExecutor a partir deste número de linhas
+    # (abaixo disso o custo de iniciar os processos supera o dos ajustes)
+    "parallel_min_rows": 5000,
+    "max_workers": None,  # None = número de CPUs
+    # Mini-Batch K-Means em streaming: blocos de linhas dimensionados pelo
+    # orçamento de memória (conjunto de trabalho normalizado, não a matriz de
+    # features), passos de até batch_size linhas (ao menos min_batches_per_epoch
+    # por época) e épocas até o deslocamento máximo dos centróides (escala
+    # normalizada) ficar abaixo de tol
+    "minibatch": {
+        "memory_budget_mb": 64,
+        "batch_size": 4096,
+        "min_batches_per_epoch": 10,
+        "max_epochs": 20,
+        "tol": 1e-3,
+        "selection_sample": 20000
+    },
+    # Modelos persistidos (atribuição sem reajuste): diretório e limites de drift.
+    # Refit recomendado quando a distância média ao centróide cresce além de
+    # distance_ratio vezes a do ajuste ou a média de alguma feature normalizada
+    # se desloca mais que mean_shift desvios
+    "models_dir": PROCESSED_DIR / "cluster_models",
+    "drift": {
+        "distance_ratio": 1.25,
+        "mean_shift": 0.5
+    }
+}
+
 # Mapeamento de cores para visualizações
 COLOR_PALETTE = {
     "primary": "#1f77b4",
@@ -65,7 +245,12 @@ COLOR_PALETTE = {
 # Configurações de cache
 CACHE_CONFIG = {
     "ttl": 3600,  # 1 hora
-    "max_entries": 10
+    "max_entries": 10,
+    # Resultados memoizados do LacunaCalculator (LRU compartilhado entre sessões)
+    "metrics_max_entries": 256,
+    # Rankings top-k por máscara de filtro (LRU próprio: combinações de filtros
+    # não despejam os índices estruturais do get_index_cache)
+    "top_k_max_entries": 128
 }
 
 # Mensagens padrão
@@ -10,8 +10,8 @@ sys.path.append(str(Path(__file__).parent / "src"))
 
 from src.data_loader import DataLoader
 
-# Carregar dados
-loader = DataLoader()
+# Carregar dados (modo completo: todas as colunas, para diagnóstico)
+loader = DataLoader(load_mode="full")
 base_path = Path(__file__).parent / "Base" / "Pulso _ Acompanhamento Gerencial .xlsx"
 
 if base_path.exists():
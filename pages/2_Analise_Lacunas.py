@@ -10,9 +10,10 @@ import sys
 # Adicionar src ao path
 sys.path.append(str(Path(__file__).parent.parent / "src"))
 
-from src.calculations import LacunaCalculator
+from src.calculations import KPI_OUTPUTS, LacunaCalculator
 from src.visualizations import PulsoVisualizations, format_number
-from src.utils import SessionManager, filter_dataframe
+from src.indexes import get_filter_index
+from src.utils import SessionManager, show_default_base_loading
 
 # Configuração da página
 st.set_page_config(
@@ -25,7 +26,10 @@ st.title("🎯 Análise de Lacunas")
 st.markdown("### Decomposição detalhada das oportunidades comerciais")
 
 # Verificar se há dados
-if not SessionManager.is_data_loaded():
+if not SessionManager.is_data_loaded() and not SessionManager.attach_default_base():
+    if show_default_base_loading():
+        st.stop()
+    
     st.warning("⚠️ Nenhum dado carregado. Volte à página inicial para fazer upload do arquivo.")
     if st.button("🏠 Ir para Home"):
         st.switch_page("app.py")
@@ -33,10 +37,14 @@ if not SessionManager.is_data_loaded():
 
 # Carregar dados
 data = SessionManager.get_data()
-calculator = LacunaCalculator(data)
-metrics = calculator.calculate_all_metrics()
+calculator = LacunaCalculator(
+    data, dataset_key=SessionManager.get_dataset_key(),
+    weekly_medians=SessionManager.get_metadata().get("weekly_medians")
+)
+metrics = calculator.metrics()
 
-if not metrics or "error" in metrics:
+# Métricas sob demanda: a verificação calcula só os KPIs (uma execução do motor)
+if not metrics or metrics.check(KPI_OUTPUTS):
     st.error("❌ Erro no processamento dos dados")
     st.stop()
 
@@ -48,6 +56,7 @@ df_cluster = data.get("pulso_consulta_diaria_cluster_a", pd.DataFrame())
 
 # Inicializar df_filtrado
 df_filtrado = pd.DataFrame()
+filtro = None
 cluster_selecionado = "Todos"
 
 if not df_cluster.empty:
@@ -64,16 +73,21 @@ if not df_cluster.empty:
         ["Todas as Lacunas", "Apenas Oportunidades (Negativas)", "Apenas Destaques (Positivas)"]
     )
     
-    # Aplicar filtros
-    df_filtrado = df_cluster.copy()
+    # Aplicar filtros pelo índice de bitmaps da aba cluster (construído uma vez por dataset)
+    filter_index = get_filter_index(df_cluster)
+    selecao = filter_index.all()
     
     if cluster_selecionado != "Todos":
-        df_filtrado = df_filtrado[df_filtrado["grupo_comparavel"] == cluster_selecionado]
+        selecao &= filter_index.equals("grupo_comparavel", cluster_selecionado)
     
     if tipo_lacuna == "Apenas Oportunidades (Negativas)":
-        df_filtrado = df_filtrado[df_filtrado["LacunaRL"] < 0]
+        selecao &= filter_index.sign("LacunaRL", "negative")
     elif tipo_lacuna == "Apenas Destaques (Positivas)":
-        df_filtrado = df_filtrado[df_filtrado["LacunaRL"] > 0]
+        selecao &= filter_index.sign("LacunaRL", "positive")
+    
+    # Máscara reaproveitada nos rankings; apenas as linhas selecionadas são copiadas
+    filtro = filter_index.mask(selecao)
+    df_filtrado = df_cluster.iloc[filter_index.positions(selecao)]
 else:
     st.warning("⚠️ Dados de cluster não encontrados no arquivo Excel.")
 
@@ -106,7 +120,7 @@ if not df_filtrado.empty:
         )
     
     with col4:
-        oportunidades = len(df_filtrado[df_filtrado["LacunaRL"] < 0])
+        oportunidades = filter_index.count(selecao & filter_index.sign("LacunaRL", "negative"))
         st.metric(
             "🎯 Oportunidades",
             f"{oportunidades:,}"
@@ -158,12 +172,16 @@ with tab1:
         
         with col1:
             st.write("**🔻 Maiores Lacunas (Oportunidades)**")
-            top_lacunas = df_filtrado.nsmallest(10, "LacunaRL")[["NomeLoja", "grupo_comparavel", "LacunaRL"]]
+            top_lacunas = calculator.get_top_k(
+                "LacunaRL", 10, mask=filtro, columns=["NomeLoja", "grupo_comparavel", "LacunaRL"]
+            )
             st.dataframe(top_lacunas, use_container_width=True, hide_index=True)
         
         with col2:
             st.write("**🔺 Melhores Performances**")
-            top_performers = df_filtrado.nlargest(10, "LacunaRL")[["NomeLoja", "grupo_comparavel", "LacunaRL"]]
+            top_performers = calculator.get_top_k(
+                "LacunaRL", 10, mask=filtro, largest=True, columns=["NomeLoja", "grupo_comparavel", "LacunaRL"]
+            )
             st.dataframe(top_performers, use_container_width=True, hide_index=True)
 
 with tab2:
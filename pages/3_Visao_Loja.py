@@ -12,7 +12,7 @@ sys.path.append(str(Path(__file__).parent.parent / "src"))
 
 from src.calculations import LacunaCalculator
 from src.visualizations import PulsoVisualizations, format_number
-from src.utils import SessionManager
+from src.utils import SessionManager, show_default_base_loading
 
 # Configuração da página
 st.set_page_config(
@@ -25,7 +25,10 @@ st.title("🏪 Visão por Loja")
 st.markdown("### Análise detalhada de performance individual")
 
 # Verificar se há dados
-if not SessionManager.is_data_loaded():
+if not SessionManager.is_data_loaded() and not SessionManager.attach_default_base():
+    if show_default_base_loading():
+        st.stop()
+    
     st.warning("⚠️ Nenhum dado carregado. Volte à página inicial para fazer upload do arquivo.")
     if st.button("🏠 Ir para Home"):
         st.switch_page("app.py")
@@ -33,7 +36,10 @@ if not SessionManager.is_data_loaded():
 
 # Carregar dados
 data = SessionManager.get_data()
-calculator = LacunaCalculator(data)
+calculator = LacunaCalculator(
+    data, dataset_key=SessionManager.get_dataset_key(),
+    weekly_medians=SessionManager.get_metadata().get("weekly_medians")
+)
 viz = PulsoVisualizations()  # Inicializar viz aqui
 df_cluster = data.get("pulso_consulta_diaria_cluster_a", pd.DataFrame())
 
@@ -45,7 +51,7 @@ if df_cluster.empty:
 st.sidebar.header("🔍 Seleção de Loja")
 
 # Lista de lojas
-lojas_disponiveis = sorted(df_cluster["NomeLoja"].unique().tolist())
+lojas_disponiveis = calculator.store_index().store_names()
 loja_selecionada = st.sidebar.selectbox(
     "Selecione uma loja:",
     lojas_disponiveis,
@@ -204,7 +210,6 @@ with col2:
         
         # Gráfico radar (se dados suficientes)
         try:
-            # Criar dados fictícios para o radar baseados nos dados reais
             radar_data = {
                 "LacunaRL": lacuna_rl,
                 "LacunaCupom": lacuna_cupom,
@@ -213,12 +218,10 @@ with col2:
                 "LacunaProd": lacuna_prod
             }
             
+            # Medianas do cluster para cada Lacuna (estatísticas por loja)
             radar_cluster = {
-                "cluster_median_lacunarl": cluster_median,
-                "cluster_median_lacunacupom": 0,  # Placeholder
-                "cluster_median_lacunabm": 0,     # Placeholder
-                "cluster_median_lacunapm": 0,     # Placeholder
-                "cluster_median_lacunaprod": 0    # Placeholder
+                f"cluster_median_{metric.lower()}": cluster_comp.get(f"cluster_median_{metric.lower()}", 0)
+                for metric in radar_data
             }
             
             fig_radar = viz.create_loja_radar_chart(radar_data, radar_cluster)
@@ -230,65 +233,64 @@ with col2:
 # Análise do cluster
 st.subheader("👥 Análise do Cluster")
 
-cluster_lojas = df_cluster[df_cluster["grupo_comparavel"] == cluster].copy()
+# Estatísticas por loja, calculadas de uma vez para todas as lojas
+peer_stats = calculator.calculate_peer_statistics()
 
-if not cluster_lojas.empty:
+if loja_selecionada in peer_stats.index:
+    loja_stats = peer_stats.loc[loja_selecionada]
+    
     # Estatísticas do cluster
     col1, col2, col3 = st.columns(3)
     
     with col1:
         st.metric(
             "🏪 Lojas no Cluster",
-            f"{len(cluster_lojas):,}"
+            f"{int(loja_stats['cluster_size']):,}"
         )
     
     with col2:
-        cluster_mean = cluster_lojas["LacunaRL"].mean()
         st.metric(
             "📊 Lacuna Média",
-            format_number(cluster_mean, "currency")
+            format_number(loja_stats["cluster_mean_lacunarl"], "currency")
         )
     
     with col3:
-        cluster_std = cluster_lojas["LacunaRL"].std()
         st.metric(
             "📈 Desvio Padrão",
-            format_number(cluster_std, "currency")
+            format_number(loja_stats["cluster_std_lacunarl"], "currency")
         )
     
     # Ranking no cluster
     st.write("**🏆 Ranking no Cluster:**")
     
-    cluster_ranking = cluster_lojas.sort_values("LacunaRL", ascending=False).reset_index(drop=True)
-    cluster_ranking["Posição"] = range(1, len(cluster_ranking) + 1)
+    cluster_ranking = (
+        peer_stats[peer_stats["grupo_comparavel"] == loja_stats["grupo_comparavel"]]
+        .sort_values("posicao_cluster")
+        .reset_index()
+    )
+    cluster_ranking["LacunaRL"] = df_cluster["LacunaRL"].iloc[
+        [calculator.store_index().cluster_position(nome) for nome in cluster_ranking["NomeLoja"]]
+    ].to_numpy()
+    cluster_ranking = cluster_ranking.rename(columns={"posicao_cluster": "Posição"})
     
-    # Destacar a loja selecionada
-    loja_position = cluster_ranking[cluster_ranking["NomeLoja"] == loja_selecionada].index
+    # Mostrar contexto (3 acima e 3 abaixo da loja selecionada)
+    loja_idx = int(cluster_ranking.index[cluster_ranking["NomeLoja"] == loja_selecionada][0])
+    start_idx = max(0, loja_idx - 3)
+    end_idx = min(len(cluster_ranking), loja_idx + 4)
     
-    if not loja_position.empty:
-        loja_idx = loja_position[0]
-        
-        # Mostrar contexto (3 acima e 3 abaixo)
-        start_idx = max(0, loja_idx - 3)
-        end_idx = min(len(cluster_ranking), loja_idx + 4)
-        
-        ranking_context = cluster_ranking.iloc[start_idx:end_idx]
-        
-        # Criar um DataFrame estilizado
-        def highlight_selected(row):
-            return ['background-color: #ffffcc' if row.name == loja_idx else '' for _ in row]
-        
-        st.dataframe(
-            ranking_context[["Posição", "NomeLoja", "LacunaRL"]],
-            use_container_width=True,
-            hide_index=True
-        )
-        
-        posicao_atual = loja_idx + 1
-        total_lojas = len(cluster_ranking)
-        percentil = (total_lojas - posicao_atual) / total_lojas * 100
-        
-        st.info(f"📍 **{loja_selecionada}** está na posição **{posicao_atual}** de **{total_lojas}** lojas (percentil {percentil:.1f})")
+    ranking_context = cluster_ranking.iloc[start_idx:end_idx]
+    
+    st.dataframe(
+        ranking_context[["Posição", "NomeLoja", "LacunaRL"]],
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    posicao_atual = int(loja_stats["posicao_cluster"])
+    total_lojas = int(loja_stats["cluster_size"])
+    percentil = loja_stats["percentil_cluster"]
+    
+    st.info(f"📍 **{loja_selecionada}** está na posição **{posicao_atual}** de **{total_lojas}** lojas (percentil {percentil:.1f})")
 
 # Dados históricos (se disponível)
 if "daily_data" in loja_details and loja_details["daily_data"]:
@@ -1,9 +1,6 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -16,8 +13,10 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 try:
     from src.data_loader import DataLoader
     from src.calculations import LacunaCalculator
+    from src.clustering import ClusterModel, get_clustering_store
+    from src.features import DEFAULT_CLUSTER_FEATURES, STORE_FEATURES, get_store_features
     from src.visualizations import PulsoVisualizations
-    from src.utils import SessionManager, format_currency, format_percentage
+    from src.utils import SessionManager, format_currency, format_percentage, show_default_base_loading
     import config
     APP_CONFIG = config
 except ImportError as e:
@@ -30,79 +29,28 @@ st.set_page_config(
     layout="wide"
 )
 
-def perform_clustering(df, n_clusters=None, features=None):
+def perform_clustering(df, n_clusters=None, features=None, algorithm="kmeans", progress=None):
     """
     Realiza análise de clustering nas lojas
+    
+    Resultados já ajustados para os mesmos dados, features, k e algoritmo
+    são reaproveitados do store compartilhado entre sessões.
     """
     if features is None:
-        features = ['RL', 'BM', 'PM', 'Cupom', 'Prod']
-    
-    # Preparar dados para clustering
-    cluster_data = df[features].copy()
-    cluster_data = cluster_data.fillna(cluster_data.mean())
-    
-    # Normalizar dados
-    scaler = StandardScaler()
-    scaled_data = scaler.fit_transform(cluster_data)
-    
-    # Determinar número ideal de clusters se não especificado
-    if n_clusters is None:
-        n_clusters = determine_optimal_clusters(scaled_data)
-    
-    # Aplicar K-Means
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-    clusters = kmeans.fit_predict(scaled_data)
+        features = DEFAULT_CLUSTER_FEATURES
     
-    # Adicionar clusters ao dataframe
-    df_clustered = df.copy()
-    df_clustered['Cluster'] = clusters
-    df_clustered['Cluster_Label'] = [f'Cluster {i+1}' for i in clusters]
-    
-    # Calcular centróides
-    centroids = pd.DataFrame(
-        scaler.inverse_transform(kmeans.cluster_centers_),
-        columns=features
-    )
-    centroids['Cluster'] = range(n_clusters)
-    centroids['Cluster_Label'] = [f'Cluster {i+1}' for i in range(n_clusters)]
-    
-    return df_clustered, centroids, features, scaler
+    return get_clustering_store().get_or_fit(df, features, n_clusters, algorithm, progress)
 
-def determine_optimal_clusters(data, max_clusters=8):
+def create_cluster_visualization(result):
     """
-    Determina o número ideal de clusters usando método do cotovelo
+    Cria visualizações de clustering a partir de um resultado já ajustado
     """
-    inertias = []
-    K_range = range(2, min(max_clusters + 1, len(data)))
-    
-    for k in K_range:
-        kmeans = KMeans(n_clusters=k, random_state=42)
-        kmeans.fit(data)
-        inertias.append(kmeans.inertia_)
-      # Método do cotovelo simplificado
-    if len(inertias) >= 3:
-        # Calcular diferenças de segunda ordem
-        diffs = np.diff(inertias)
-        second_diffs = np.diff(diffs)
-        
-        # Encontrar o ponto de maior curvatura
-        if len(second_diffs) > 0:
-            optimal_k = int(np.argmax(second_diffs)) + 3  # +3 porque começamos do 2 e perdemos 2 índices
-        else:
-            optimal_k = 3
-    else:
-        optimal_k = 3
+    df_clustered = result.frame
+    centroids = result.centroids
+    features = result.features
     
-    return int(min(optimal_k, max_clusters))
-
-def create_cluster_visualization(df_clustered, centroids, features):
-    """
-    Cria visualizações de clustering
-    """
-    # 1. Scatter plot 2D (PCA)
-    pca = PCA(n_components=2)
-    scaled_data = StandardScaler().fit_transform(df_clustered[features].fillna(df_clustered[features].mean()))
-    pca_data = pca.fit_transform(scaled_data)
+    # 1. Scatter plot 2D (PCA calculado no ajuste)
+    pca_data = result.projection
     
     fig_pca = px.scatter(
         x=pca_data[:, 0], 
@@ -110,8 +58,8 @@ def create_cluster_visualization(df_clustered, centroids, features):
         color=df_clustered['Cluster_Label'],
         hover_data={'Loja': df_clustered['Loja']},
         title="Distribuição dos Clusters (PCA 2D)",
-        labels={'x': f'PC1 ({pca.explained_variance_ratio_[0]:.1%} da variância)',
-                'y': f'PC2 ({pca.explained_variance_ratio_[1]:.1%} da variância)'}
+        labels={'x': f'PC1 ({result.explained_variance[0]:.1%} da variância)',
+                'y': f'PC2 ({result.explained_variance[1]:.1%} da variância)'}
     )
     fig_pca.update_layout(height=500)
     
@@ -196,23 +144,52 @@ def main():
     st.markdown("Análise de agrupamento de lojas com características similares")
     
     # Verificar se há dados carregados
-    if 'data' not in st.session_state or st.session_state.data is None:
+    if not SessionManager.is_data_loaded() and not SessionManager.attach_default_base():
+        if show_default_base_loading():
+            return
+        
         st.warning("⚠️ Nenhum dado carregado. Por favor, carregue os dados na página inicial.")
         if st.button("🏠 Voltar para página inicial"):
             st.switch_page("app.py")
         return
     
-    df = st.session_state.data.copy()
+    data = SessionManager.get_data()
+    df_diaria = data.get("pulso_consulta_diaria", pd.DataFrame())
     
     # Sidebar com controles
     st.sidebar.header("Configurações do Clustering")
     
+    # Janela de datas das features
+    start, end = None, None
+    if "datavenda" in df_diaria.columns and df_diaria["datavenda"].notna().any():
+        first_day = df_diaria["datavenda"].min().date()
+        last_day = df_diaria["datavenda"].max().date()
+        period = st.sidebar.date_input(
+            "Período:",
+            value=(first_day, last_day),
+            min_value=first_day,
+            max_value=last_day
+        )
+        if isinstance(period, (list, tuple)) and len(period) == 2:
+            start, end = period
+    
+    # Unidade de análise: lojas ou lojas-semana
+    level_options = {"Lojas": "loja", "Lojas-semana": "loja_semana"}
+    level = level_options[st.sidebar.selectbox("Unidade de análise:", list(level_options))]
+    
+    # Features por unidade da aba diária (calculadas uma vez por dataset, período e unidade)
+    try:
+        df = get_store_features(data, SessionManager.get_dataset_key(), start, end, level)
+    except ValueError as e:
+        st.error(f"Não foi possível calcular as métricas por loja: {str(e)}")
+        return
+    
     # Seleção de features
-    available_features = ['RL', 'BM', 'PM', 'Cupom', 'Prod']
+    available_features = STORE_FEATURES
     selected_features = st.sidebar.multiselect(
         "Selecione as métricas para clustering:",
         available_features,
-        default=available_features
+        default=DEFAULT_CLUSTER_FEATURES
     )
     
     if len(selected_features) < 2:
@@ -227,35 +204,114 @@ def main():
     else:
         n_clusters = None
     
+    # Algoritmo: K-Means completo ou Mini-Batch em streaming (muitas linhas)
+    algorithm_options = {"K-Means": "kmeans", "Mini-Batch K-Means (streaming)": "minibatch"}
+    algorithm = algorithm_options[st.sidebar.selectbox("Algoritmo:", list(algorithm_options))]
+    
+    # Modelo de referência salvo para estas features e unidade (atribuição sem reajuste)
+    saved_model = ClusterModel.load(selected_features, level)
+    
     # Botão para executar clustering
     if st.sidebar.button("🔄 Executar Análise de Clusters", type="primary"):
         with st.spinner("Executando análise de clustering..."):
             try:
-                # Realizar clustering
-                df_clustered, centroids, features_used, scaler = perform_clustering(
-                    df, n_clusters, selected_features
+                # Progresso da convergência (apenas no modo streaming)
+                progress_bar = st.progress(0.0) if algorithm == "minibatch" else None
+                
+                def report_progress(fraction, message):
+                    if progress_bar is not None:
+                        progress_bar.progress(min(fraction, 1.0), text=message)
+                
+                # Realizar clustering (ou reaproveitar o resultado já ajustado)
+                _, fitted = perform_clustering(
+                    df, n_clusters, selected_features, algorithm, report_progress
                 )
                 
-                # Salvar resultados na sessão
-                st.session_state.df_clustered = df_clustered
-                st.session_state.centroids = centroids
-                st.session_state.features_used = features_used
+                # Rótulos pareados aos do modelo salvo, para não embaralhar os clusters
+                model = ClusterModel.from_result(
+                    fitted, level, previous=saved_model, dataset_key=SessionManager.get_dataset_key()
+                )
+                result = model.assign(df, fitted)
                 
-                st.success(f"✅ Clustering executado com sucesso! {len(centroids)} clusters identificados.")
+                # Salvar referência ao resultado na sessão
+                st.session_state.clustering_result = result
+                st.session_state.cluster_model = model
+                
+                st.success(f"✅ Clustering executado com sucesso! {result.n_clusters} clusters identificados.")
                 
             except Exception as e:
                 st.error(f"Erro ao executar clustering: {str(e)}")
                 return
     
+    if saved_model is not None:
+        st.sidebar.caption(
+            f"💾 Modelo salvo em {saved_model.fitted_at} ({len(saved_model.label_ids)} clusters)"
+        )
+        if st.sidebar.button("⚡ Atribuir com modelo salvo"):
+            try:
+                st.session_state.clustering_result = saved_model.assign(df)
+                st.session_state.cluster_model = saved_model
+            except ValueError as e:
+                st.error(f"Erro ao atribuir clusters: {str(e)}")
+                return
+    
+    model = st.session_state.get("cluster_model")
+    unsaved = model is not None and (saved_model is None or model.to_dict() != saved_model.to_dict())
+    if unsaved and model.compatible(selected_features, level):
+        if st.sidebar.button("💾 Salvar como modelo de referência"):
+            if model.save():
+                st.sidebar.success("Modelo salvo: próximas cargas podem ser atribuídas sem reajuste.")
+            else:
+                st.sidebar.error("Não foi possível salvar o modelo.")
+    
     # Verificar se há resultados de clustering
-    if 'df_clustered' not in st.session_state:
+    if 'clustering_result' not in st.session_state:
         st.info("👆 Configure os parâmetros na barra lateral e execute a análise de clusters.")
         return
     
-    df_clustered = st.session_state.df_clustered
-    centroids = st.session_state.centroids
-    features_used = st.session_state.features_used
-    
+    # Re-renderizações apenas leem o resultado ajustado (nada é reajustado)
+    result = st.session_state.clustering_result
+    df_clustered = result.frame
+    centroids = result.centroids
+    features_used = result.features
+
+    # Scores da seleção automática do número de clusters
+    if result.selection is not None:
+        with st.expander(f"🔎 Seleção do número de clusters (k = {result.n_clusters})"):
+            st.caption("Cada k é ajustado com várias sementes; vale a de menor inércia e o k escolhido é o de maior silhueta.")
+            st.dataframe(
+                result.selection.rename(columns={
+                    "k": "k", "semente": "Semente", "inercia": "Inércia", "silhueta": "Silhueta",
+                    "calinski_harabasz": "Calinski-Harabasz", "tempo_ajuste": "Tempo (s)",
+                    "melhor_semente": "Melhor semente", "escolhido": "Escolhido"
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+
+    # Drift em relação ao modelo de referência (atribuição sem reajuste)
+    if not result.from_fit:
+        drift = result.drift
+        drift_col1, drift_col2 = st.columns(2)
+        drift_col1.metric("Distância média / ajuste", f"{drift['razao_distancia']:.2f}x")
+        drift_col2.metric(f"Deslocamento ({drift.get('feature_deslocada', '-')})", f"{drift['deslocamento_medio']:.2f} σ")
+        if drift["refit_recomendado"]:
+            st.warning("⚠️ Os dados se afastaram do modelo salvo: recomenda-se executar um novo clustering.")
+        else:
+            st.info("Clusters atribuídos pelo modelo salvo, sem reajuste; o drift está dentro dos limites.")
+    
+    # Convergência do ajuste em streaming
+    if result.history:
+        status = "convergiu" if result.converged else "atingiu o limite de épocas"
+        with st.expander(f"📉 Convergência do Mini-Batch K-Means ({status} em {len(result.history)} épocas)"):
+            st.dataframe(
+                pd.DataFrame(result.history).rename(columns={
+                    "epoca": "Época", "deslocamento": "Deslocamento máx. dos centróides"
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+
     # Layout principal
     col1, col2 = st.columns([2, 1])
     
@@ -266,7 +322,7 @@ def main():
         tab1, tab2, tab3 = st.tabs(["🎯 Distribuição 2D", "📡 Perfil dos Clusters", "📈 Distribuições"])
         
         with tab1:
-            fig_pca, fig_radar, fig_box = create_cluster_visualization(df_clustered, centroids, features_used)
+            fig_pca, fig_radar, fig_box = create_cluster_visualization(result)
             st.plotly_chart(fig_pca, use_container_width=True)
         
         with tab2:
@@ -313,8 +369,12 @@ def main():
     display_data = display_df[display_columns].copy()
     
     for col in features_used:
-        if col in ['RL', 'BM', 'PM']:
+        if col in ['RL', 'RL_Medio', 'BM', 'PM']:
             display_data[col] = display_data[col].apply(lambda x: format_currency(x) if pd.notna(x) else '-')
+        elif col.endswith('_YoY') or col == 'RL_Volatilidade':
+            display_data[col] = display_data[col].apply(lambda x: format_percentage(x, 1) if pd.notna(x) else '-')
+        elif col == 'Prod':
+            display_data[col] = display_data[col].apply(lambda x: f"{x:,.2f}" if pd.notna(x) else '-')
         else:
             display_data[col] = display_data[col].apply(lambda x: f"{x:,.0f}" if pd.notna(x) else '-')
     
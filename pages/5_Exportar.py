@@ -9,7 +9,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 try:
-    from src.utils import format_currency, format_percentage
+    from src.utils import SessionManager, format_currency, format_percentage, show_default_base_loading
     import config
     APP_CONFIG = config
 except ImportError as e:
@@ -27,13 +27,16 @@ def main():
     st.markdown("Visualize os dados carregados e use a função de impressão do navegador para exportar como PDF")
     
     # Verificar se há dados carregados
-    if 'data' not in st.session_state or st.session_state.data is None:
+    if not SessionManager.is_data_loaded() and not SessionManager.attach_default_base():
+        if show_default_base_loading():
+            return
+        
         st.warning("⚠️ Nenhum dado carregado. Por favor, carregue os dados na página inicial.")
         if st.button("🏠 Voltar para página inicial"):
             st.switch_page("app.py")
         return
     
-    df = st.session_state.data
+    df = SessionManager.get_data()
     
     # Obter dados de outras análises se disponíveis
     gaps_df = st.session_state.get('gaps_data', None)
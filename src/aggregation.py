@@ -0,0 +1,199 @@
+"""
+Motor de agregação em passagem única para as métricas do Projeto Pulso
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Especificação das métricas da página inicial. Todas as saídas são calculadas
+# juntas sobre os mesmos arrays NumPy (extraídos uma única vez por coluna)
+METRICS_SPEC = {
+    # Somas totais: {métrica: coluna}
+    "totals": {
+        "lacuna_total_rl": "LacunaRL",
+        "lacuna_total_cupom": "LacunaCupom",
+        "lacuna_total_bm": "LacunaBM"
+    },
+    # Contagens por sinal: {métrica: (coluna, sinal)}
+    "counts": {
+        "lojas_com_lacuna": ("LacunaRL", "negative"),
+        "lojas_acima_meta": ("LacunaRL", "positive")
+    },
+    # Rankings: linhas com o sinal pedido, ordenadas pela magnitude da coluna
+    "top": {
+        "top_oportunidades": {
+            "column": "LacunaRL",
+            "sign": "negative",
+            "n": 10,
+            "abs_column": "LacunaRL_Abs",
+            "columns": ["Rank", "NomeLoja", "grupo_comparavel", "LacunaRL", "LacunaRL_Abs", "LacunaCupom", "LacunaBM"]
+        },
+        "top_destaques": {
+            "column": "LacunaRL",
+            "sign": "positive",
+            "n": 10,
+            "columns": ["Rank", "NomeLoja", "grupo_comparavel", "LacunaRL", "LacunaCupom", "LacunaBM"]
+        }
+    },
+    # Agregações por grupo, calculadas pelo cubo (LacunaCube.group_frame);
+    # colunas nomeadas "<agg>_<coluna>" salvo renomeação
+    "groups": {
+        "analise_clusters": {
+            "by": "grupo_comparavel",
+            "aggregations": {
+                "LacunaRL": ["sum", "mean", "count", "std"],
+                "LacunaCupom": ["sum", "mean"],
+                "LacunaBM": ["sum", "mean"],
+                "LacunaPM": ["sum", "mean"],
+                "LacunaProd": ["sum", "mean"],
+                "NomeLoja": ["count"]
+            },
+            "rename": {
+                "count_NomeLoja": "Qtd_Lojas",
+                "sum_LacunaRL": "LacunaRL_Total",
+                "mean_LacunaRL": "LacunaRL_Media",
+                "std_LacunaRL": "LacunaRL_Desvio"
+            },
+            # Potencial = total negativo invertido (0 para clusters sem lacuna)
+            "potential": ("LacunaRL_Total", "LacunaRL_Potencial")
+        },
+        "analise_gr": {
+            "by": "NumeroGR",
+            "aggregations": {
+                "LacunaRL": ["sum", "mean", "count"],
+                "LacunaCupom": ["sum", "mean"],
+                "LacunaBM": ["sum", "mean"],
+                "NomeLoja": ["count"]
+            },
+            "rename": {
+                "count_NomeLoja": "Qtd_Lojas",
+                "sum_LacunaRL": "LacunaRL_Total",
+                "mean_LacunaRL": "LacunaRL_Media"
+            }
+        }
+    }
+}
+
+
+def top_k_positions(values: np.ndarray, k: int, mask: Optional[np.ndarray] = None,
+                    largest: bool = False) -> np.ndarray:
+    """
+    Posições das k linhas de menor (ou maior) valor, já ordenadas
+    
+    Usa np.argpartition sobre os candidatos, então apenas os k escolhidos são
+    ordenados. Valores nulos nunca entram no ranking e empates são desfeitos
+    pela posição original, como no nsmallest/nlargest do pandas.
+    
+    Args:
+        values: Coluna numérica como array float64
+        k: Quantidade de posições a retornar
+        mask: Máscara booleana das linhas elegíveis (None considera todas)
+        largest: Ranking decrescente (maiores valores primeiro)
+        
+    Returns:
+        np.ndarray: Posições das linhas no array original, em ordem de ranking
+    """
+    eligible = ~np.isnan(values)
+    if mask is not None:
+        eligible &= mask
+    candidates = np.flatnonzero(eligible)
+
+    # Ordenação crescente da chave: menor (ou maior) valor primeiro
+    keys = values[candidates]
+    if largest:
+        keys = -keys
+
+    k = min(max(k, 0), len(candidates))
+    if 0 < k < len(candidates):
+        # Tudo abaixo do k-ésimo valor entra; empates no limite seguem a posição original
+        kth = keys[np.argpartition(keys, k - 1)[k - 1]]
+        below = np.flatnonzero(keys < kth)
+        at_kth = np.flatnonzero(keys == kth)[:k - len(below)]
+        chosen = np.concatenate([below, at_kth])
+    else:
+        chosen = np.arange(k)
+
+    # Ordenação dos escolhidos, com desempate pela posição original
+    order = chosen[np.lexsort((candidates[chosen], keys[chosen]))]
+    return candidates[order]
+
+
+class AggregationEngine:
+    """Executa totais, contagens e rankings do METRICS_SPEC sobre arrays NumPy de um DataFrame"""
+
+    def __init__(self, df: pd.DataFrame, spec: Dict = METRICS_SPEC):
+        self.df = df
+        self.spec = spec
+        self._values: Dict[str, np.ndarray] = {}
+        self._signs: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def values(self, column: str) -> np.ndarray:
+        """Coluna numérica como float64 (acumulação em precisão dupla)"""
+        if column not in self._values:
+            self._values[column] = self.df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        return self._values[column]
+
+    def sign_mask(self, column: str, sign: str) -> np.ndarray:
+        """Máscara das linhas com valor negativo ou positivo (NaN fica fora)"""
+        key = (column, sign)
+        if key not in self._signs:
+            values = self.values(column)
+            self._signs[key] = values < 0 if sign == "negative" else values > 0
+        return self._signs[key]
+
+    def run(self, outputs: Optional[Iterable[str]] = None,
+            top_n: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Calcula as saídas da especificação em uma única execução
+
+        Args:
+            outputs: Nomes das saídas desejadas (None calcula todas)
+            top_n: Tamanho dos rankings (None usa o valor da especificação)
+
+        Returns:
+            Dict[str, Any]: Métricas no formato de LacunaCalculator.calculate_all_metrics
+        """
+        wanted = set(outputs) if outputs is not None else None
+        selected = lambda name: wanted is None or name in wanted
+        results: Dict[str, Any] = {}
+
+        for name, column in self.spec.get("totals", {}).items():
+            if selected(name):
+                results[name] = float(np.nansum(self.values(column)))
+
+        if selected("total_lojas"):
+            results["total_lojas"] = len(self.df)
+
+        for name, (column, sign) in self.spec.get("counts", {}).items():
+            if selected(name):
+                results[name] = int(np.count_nonzero(self.sign_mask(column, sign)))
+
+        for name, top_spec in self.spec.get("top", {}).items():
+            if selected(name):
+                results[name] = self._top(top_spec, top_n if top_n is not None else top_spec["n"])
+
+        return results
+
+    def _top(self, top_spec: Dict, n: int) -> pd.DataFrame:
+        """Ranking das n linhas de maior magnitude com o sinal pedido"""
+        column = top_spec["column"]
+        sign = top_spec["sign"]
+
+        # Mais negativo (ou mais positivo) primeiro
+        positions = top_k_positions(
+            self.values(column), n,
+            mask=self.sign_mask(column, sign),
+            largest=sign == "positive"
+        )
+        top = self.df.iloc[positions].copy()
+
+        if "abs_column" in top_spec:
+            top[top_spec["abs_column"]] = top[column].abs()
+        top["Rank"] = range(1, len(top) + 1)
+
+        return top[top_spec["columns"]]
@@ -0,0 +1,174 @@
+"""
+Carregamento da base padrão em segundo plano, compartilhado entre as sessões
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Tuple
+import logging
+
+import streamlit as st
+
+from config import BASE_EXCEL_PATH, LOADER_CONFIG
+from .data_loader import DataLoader
+from .dataset_registry import DatasetRegistry, get_dataset_registry
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundBaseLoader:
+    """
+    Carrega a base padrão em uma thread e publica o resultado no registro de datasets
+
+    A carga começa na criação do carregador (inicialização do processo). Após
+    uma falha, uma nova tentativa é agendada com espera exponencial
+    (LOADER_CONFIG["background_retry_backoff"]), sem depender de o arquivo
+    base mudar em disco.
+    """
+
+    # Referência fixa (sem ttl) mantida pelo próprio carregador no registro;
+    # sai apenas quando uma nova carga publica outra versão da base
+    HOLDER = "background-loader"
+
+    def __init__(self, registry: DatasetRegistry):
+        self.registry = registry
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pulso-base")
+        # Reentrante: o callback de conclusão roda na própria thread de start() se a carga já terminou
+        self._lock = threading.RLock()
+        self._future: Optional[Future] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._key: Optional[str] = None
+        self._failures = 0
+        self._retry_at: Optional[float] = None
+        self._retry_timer: Optional[threading.Timer] = None
+
+    def _file_signature(self) -> Tuple[int, int]:
+        stat = BASE_EXCEL_PATH.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def start(self, force: bool = False) -> Future:
+        """
+        Inicia a carga da base padrão ou reaproveita a carga em andamento/concluída
+
+        Uma nova carga só é disparada na primeira chamada, quando o arquivo base
+        muda em disco, quando a espera após uma falha terminou ou com force=True.
+
+        Args:
+            force: Recarregar mesmo que já exista uma carga para o arquivo atual
+
+        Returns:
+            Future: Carga compartilhada (resultado: chave do dataset no registro)
+        """
+        with self._lock:
+            signature = self._file_signature()
+            retry_due = self._retry_at is not None and time.monotonic() >= self._retry_at
+            if self._future is None or force or retry_due or signature != self._signature:
+                self._signature = signature
+                self._retry_at = None
+                self._future = self._executor.submit(self._load)
+                self._future.add_done_callback(self._on_done)
+                logger.info(f"Carga da base padrão iniciada em segundo plano: {BASE_EXCEL_PATH}")
+            return self._future
+
+    def _on_done(self, future: Future) -> None:
+        """Zera as falhas após sucesso ou agenda a próxima tentativa com espera exponencial"""
+        with self._lock:
+            if future is not self._future:
+                return
+
+            if future.exception() is None:
+                self._failures = 0
+                return
+
+            self._failures += 1
+            delay = min(
+                LOADER_CONFIG["background_retry_backoff"] * 2 ** (self._failures - 1),
+                LOADER_CONFIG["background_retry_max_backoff"]
+            )
+            self._retry_at = time.monotonic() + delay
+            self._retry_timer = threading.Timer(delay, self._retry)
+            self._retry_timer.daemon = True
+            self._retry_timer.start()
+            logger.warning(
+                f"Falha na carga da base padrão ({self._failures}ª consecutiva): {future.exception()}; "
+                f"nova tentativa em {delay:.0f}s"
+            )
+
+    def _retry(self) -> None:
+        """Nova tentativa agendada após uma falha (ignorada se outra carga já começou)"""
+        if self._retry_at is None or not BASE_EXCEL_PATH.exists():
+            return
+        try:
+            self.start()
+        except Exception as e:
+            logger.error(f"Erro ao reiniciar a carga da base padrão: {str(e)}")
+
+    def _load(self) -> str:
+        loader = DataLoader()
+
+        # Base já publicada (p.ex. por um recarregamento manual)
+        key = loader.dataset_key_for(BASE_EXCEL_PATH)
+        if self.registry.acquire(key, self.HOLDER, pinned=True):
+            return self._publish(key)
+
+        data = loader.load_default_base()
+        if not data:
+            raise ValueError("Não foi possível carregar a base padrão")
+
+        key = loader.metadata["dataset_key"]
+        self.registry.register(key, data, loader.metadata, holder=self.HOLDER, pinned=True)
+        logger.info(f"Base padrão publicada pelo carregamento em segundo plano: {key}")
+        return self._publish(key)
+
+    def _publish(self, key: str) -> str:
+        """Passa a referência fixa para a nova versão da base, liberando a anterior"""
+        previous, self._key = self._key, key
+        if previous is not None and previous != key:
+            self.registry.release(previous, self.HOLDER)
+        return key
+
+    def is_loading(self) -> bool:
+        """Indica se há uma carga em andamento"""
+        future = self._future
+        return future is not None and not future.done()
+
+    def dataset_key(self) -> Optional[str]:
+        """
+        Chave do dataset publicado pela última carga
+
+        Returns:
+            Optional[str]: Chave no registro ou None se a carga não terminou/falhou
+        """
+        future = self._future
+        if future is None or not future.done() or future.exception() is not None:
+            return None
+        return future.result()
+
+    def retry_in(self) -> Optional[float]:
+        """
+        Tempo até a próxima tentativa após uma falha
+
+        Returns:
+            Optional[float]: Segundos restantes ou None se não há tentativa agendada
+        """
+        retry_at = self._retry_at
+        if retry_at is None:
+            return None
+        return max(retry_at - time.monotonic(), 0.0)
+
+    def error(self) -> Optional[str]:
+        """Mensagem de erro da última carga (None se não houve erro)"""
+        future = self._future
+        if future is None or not future.done() or future.exception() is None:
+            return None
+        return str(future.exception())
+
+
+@st.cache_resource
+def get_background_loader() -> BackgroundBaseLoader:
+    """Carregador único do processo, compartilhado por todas as sessões (já iniciado)"""
+    loader = BackgroundBaseLoader(get_dataset_registry())
+    if BASE_EXCEL_PATH.exists():
+        loader.start()
+    return loader
@@ -0,0 +1,302 @@
+"""
+Módulo de cache para dados já processados do Projeto Pulso
+"""
+
+import hashlib
+import json
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import logging
+
+import pandas as pd
+import streamlit as st
+
+from config import PROCESSED_DIR, CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Tamanho dos blocos lidos ao calcular o hash de um arquivo
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def compute_content_hash(source) -> str:
+    """
+    Calcula o hash BLAKE2 do conteúdo de um workbook
+
+    Args:
+        source: Path local ou arquivo enviado via streamlit file_uploader
+
+    Returns:
+        str: Hash hexadecimal do conteúdo
+    """
+    hasher = hashlib.blake2b(digest_size=20)
+
+    if isinstance(source, Path):
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    if hasattr(source, "getbuffer"):
+        buffer = source.getbuffer()
+        for start in range(0, len(buffer), HASH_CHUNK_SIZE):
+            hasher.update(buffer[start:start + HASH_CHUNK_SIZE])
+        return hasher.hexdigest()
+
+    # Arquivo genérico: ler e voltar o cursor para o início
+    position = source.tell()
+    for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+        hasher.update(chunk)
+    source.seek(position)
+    return hasher.hexdigest()
+
+
+class WorkbookCache:
+    """Cache colunar (Parquet) dos DataFrames pré-processados, endereçado pelo hash do workbook"""
+
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, cache_dir: Optional[Path] = None,
+                 ttl: int = CACHE_CONFIG["ttl"],
+                 max_entries: int = CACHE_CONFIG["max_entries"]):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else PROCESSED_DIR / "cache"
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def _read_manifest(self, entry_dir: Path) -> Optional[Dict]:
+        try:
+            with open(entry_dir / self.MANIFEST_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, entry_dir: Path, manifest: Dict) -> None:
+        with open(entry_dir / self.MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+    def _is_expired(self, manifest: Dict) -> bool:
+        return time.time() - manifest.get("created", 0) > self.ttl
+
+    def get(self, key: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Recupera os DataFrames de um workbook já processado
+
+        Args:
+            key: Hash do conteúdo do workbook
+
+        Returns:
+            Optional[Dict[str, pd.DataFrame]]: Dados em cache ou None se ausente/expirado
+        """
+        entry_dir = self._entry_dir(key)
+        manifest = self._read_manifest(entry_dir)
+        if manifest is None:
+            return None
+
+        if self._is_expired(manifest):
+            logger.info(f"Entrada de cache expirada: {key}")
+            self._remove_entry(entry_dir)
+            return None
+
+        try:
+            data = {
+                sheet_name: pd.read_parquet(entry_dir / file_name)
+                for sheet_name, file_name in manifest["sheets"].items()
+            }
+        except Exception as e:
+            logger.warning(f"Erro ao ler cache {key}: {str(e)}")
+            self._remove_entry(entry_dir)
+            return None
+
+        manifest["last_access"] = time.time()
+        try:
+            self._write_manifest(entry_dir, manifest)
+        except OSError:
+            pass
+
+        logger.info(f"Workbook servido do cache: {key}")
+        return data
+
+    def get_info(self, key: str) -> Dict:
+        """
+        Retorna as informações adicionais gravadas junto de uma entrada
+
+        Args:
+            key: Hash do conteúdo do workbook
+
+        Returns:
+            Dict: Informações da entrada (vazio se ausente)
+        """
+        manifest = self._read_manifest(self._entry_dir(key))
+        if manifest is None:
+            return {}
+        return manifest.get("info", {})
+
+    def put(self, key: str, data: Dict[str, pd.DataFrame], info: Optional[Dict] = None) -> bool:
+        """
+        Armazena os DataFrames processados de um workbook
+
+        Args:
+            key: Hash do conteúdo do workbook
+            data: Dicionário com DataFrames já pré-processados
+            info: Informações adicionais serializáveis em JSON (opcional)
+
+        Returns:
+            bool: True se a entrada foi gravada
+        """
+        entry_dir = self._entry_dir(key)
+        tmp_dir = self.cache_dir / f".tmp-{key}-{uuid.uuid4().hex}"
+
+        try:
+            tmp_dir.mkdir(parents=True, exist_ok=True)
+
+            sheets = {}
+            for i, (sheet_name, df) in enumerate(data.items()):
+                file_name = f"sheet_{i}.parquet"
+                df.to_parquet(tmp_dir / file_name, index=False)
+                sheets[sheet_name] = file_name
+
+            now = time.time()
+            self._write_manifest(tmp_dir, {
+                "created": now, "last_access": now, "sheets": sheets, "info": info or {}
+            })
+
+            if entry_dir.exists():
+                self._remove_entry(entry_dir)
+            tmp_dir.rename(entry_dir)
+
+        except Exception as e:
+            logger.warning(f"Não foi possível gravar cache {key}: {str(e)}")
+            self._remove_entry(tmp_dir)
+            return False
+
+        logger.info(f"Workbook gravado no cache: {key}")
+        self.evict()
+        return True
+
+    def _remove_entry(self, entry_dir: Path) -> None:
+        shutil.rmtree(entry_dir, ignore_errors=True)
+
+    def _list_entries(self) -> List[Path]:
+        if not self.cache_dir.exists():
+            return []
+        return [p for p in self.cache_dir.iterdir() if p.is_dir() and not p.name.startswith(".")]
+
+    def evict(self) -> int:
+        """
+        Remove entradas expiradas (ttl) e as menos acessadas além de max_entries
+
+        Returns:
+            int: Quantidade de entradas removidas
+        """
+        removed = 0
+        alive = []
+
+        for entry_dir in self._list_entries():
+            manifest = self._read_manifest(entry_dir)
+            if manifest is None or self._is_expired(manifest):
+                self._remove_entry(entry_dir)
+                removed += 1
+            else:
+                alive.append((manifest.get("last_access", 0), entry_dir))
+
+        if len(alive) > self.max_entries:
+            alive.sort(key=lambda item: item[0])
+            for _, entry_dir in alive[:len(alive) - self.max_entries]:
+                self._remove_entry(entry_dir)
+                removed += 1
+
+        if removed:
+            logger.info(f"Cache: {removed} entrada(s) removida(s)")
+        return removed
+
+    def clear(self) -> None:
+        """Remove todas as entradas do cache"""
+        for entry_dir in self._list_entries():
+            self._remove_entry(entry_dir)
+
+
+class MemoCache:
+    """Cache LRU em memória com TTL e contadores de acertos/falhas"""
+
+    def __init__(self, ttl: int = CACHE_CONFIG["ttl"],
+                 max_entries: int = CACHE_CONFIG["metrics_max_entries"]):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Busca um resultado memoizado
+
+        Args:
+            key: Chave do resultado
+
+        Returns:
+            Tuple[bool, Any]: (encontrado, valor)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Armazena um resultado, descartando os menos usados além de max_entries
+
+        Args:
+            key: Chave do resultado
+            value: Valor a memoizar
+        """
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna os contadores do cache
+
+        Returns:
+            Dict[str, Any]: Acertos, falhas, taxa de acerto e ocupação
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries
+            }
+
+    def clear(self) -> None:
+        """Remove todos os resultados e zera os contadores"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+@st.cache_resource
+def get_metrics_cache() -> MemoCache:
+    """Cache de métricas único do processo, compartilhado por todas as sessões"""
+    return MemoCache()
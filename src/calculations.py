@@ -4,66 +4,517 @@ Módulo para cálculos de lacunas e métricas do Projeto Pulso
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional, Any
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Optional, Any
+import functools
 import logging
 
+from config import NATIVE_LACUNA_CONFIG
+from .aggregation import METRICS_SPEC, AggregationEngine
+from .cache import get_metrics_cache
+from .cube import LacunaCube, get_lacuna_cube
+from .dataset_registry import freeze_frame
+from .indexes import StoreIndex, get_store_index, get_top_k
+from .medians import NATIVE_LACUNAS, NATIVE_VOLUMES, WeeklyMedianEngine, metric_ratio
+
 logger = logging.getLogger(__name__)
 
+# Lacunas comparadas com o grupo comparável nas estatísticas por loja
+PEER_METRICS = ["LacunaRL", "LacunaCupom", "LacunaBM", "LacunaPM", "LacunaProd"]
+
+# Atributos da loja copiados para o resultado (primeira linha da loja na janela)
+NATIVE_STORE_COLUMNS = ["codigo_franquia", "NumeroGR", "grupo_comparavel", "ds_hub", "divisao"]
+
+# KPIs escalares do METRICS_SPEC (calculados juntos em uma execução do motor)
+KPI_OUTPUTS = list(METRICS_SPEC["totals"]) + ["total_lojas"] + list(METRICS_SPEC["counts"])
+
+
+def _share(value: Any) -> Any:
+    """Versão somente leitura de um resultado guardado no cache de métricas"""
+    if isinstance(value, pd.DataFrame):
+        return freeze_frame(value)
+    if isinstance(value, dict):
+        return {key: _share(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_share(item) for item in value)
+    return value
+
+
+def _view(value: Any) -> Any:
+    """Cópia rasa de um resultado compartilhado: contêineres próprios, dados somente leitura"""
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    if isinstance(value, dict):
+        return {key: _view(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_view(item) for item in value]
+    return value
+
+
+def memoized(method):
+    """
+    Memoiza um método do LacunaCalculator no cache de métricas compartilhado
+    
+    A chave combina a chave do dataset (hash do conteúdo), o método e os
+    argumentos. Calculadoras sem dataset_key (p.ex. dados de exemplo) e
+    resultados com erro não são memoizados. O resultado é guardado somente
+    leitura (DataFrames congelados) e cada chamada recebe cópias rasas dos
+    contêineres: atribuir colunas ou chaves não afeta outras sessões, e
+    alterar valores in-place gera ValueError (use .copy() antes).
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.dataset_key is None:
+            return method(self, *args, **kwargs)
+        
+        key = (self.dataset_key, method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        
+        cache = get_metrics_cache()
+        found, value = cache.get(key)
+        if not found:
+            value = method(self, *args, **kwargs)
+            if isinstance(value, dict) and "error" in value:
+                return value
+            value = _share(value)
+            cache.put(key, value)
+        
+        return _view(value)
+    
+    return wrapper
+
+
+class NativeLacunaEngine:
+    """Calcula as Lacunas por loja diretamente da aba diária (sem a aba cluster)"""
+    
+    MEDIAN_SOURCES = ("sheet", "computed")
+    
+    def __init__(self, df_diaria: pd.DataFrame, median_table: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            df_diaria: Aba diária
+            median_table: Tabela de WeeklyMedianEngine usada no modo "computed" e para
+                medianas ausentes (None calcula sobre as linhas da janela)
+        """
+        self.df_diaria = df_diaria
+        self.median_table = median_table
+    
+    def missing_columns(self, medians: str = "sheet") -> List[str]:
+        """
+        Colunas da aba diária necessárias ao cálculo que não estão nos dados
+        
+        Args:
+            medians: Origem das medianas ("sheet" aceita medianas ausentes, que são calculadas)
+            
+        Returns:
+            List[str]: Colunas ausentes
+        """
+        required = ["NomeLoja", "datavenda", "semana"]
+        required += [col for pair in NATIVE_VOLUMES.values() for col in pair]
+        if medians == "computed" or any(spec["median"] not in self.df_diaria.columns for spec in NATIVE_LACUNAS.values()):
+            required.append("grupo_comparavel")
+        return [col for col in required if col not in self.df_diaria.columns]
+    
+    def _window_positions(self, start, end) -> np.ndarray:
+        """Posições das linhas com datavenda dentro da janela (limites inclusivos)"""
+        dates = self.df_diaria["datavenda"]
+        mask = dates.notna().to_numpy()
+        if start is not None:
+            mask &= (dates >= pd.Timestamp(start).normalize()).to_numpy()
+        if end is not None:
+            mask &= (dates < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_numpy()
+        return np.flatnonzero(mask)
+    
+    def compute(self, start=None, end=None, medians: str = "sheet") -> pd.DataFrame:
+        """
+        Calcula as cinco Lacunas por loja em uma janela de datas
+        
+        Os volumes são somados por (loja, semana). Cada semana usa a sua mediana
+        do grupo comparável; Lacunas aditivas (RL, Cupom) somam as semanas e as
+        de razão (BM, PM, Prod) comparam a razão da janela com a média das razões
+        esperadas ponderada pelo denominador atual.
+        
+        Args:
+            start: Primeiro dia da janela (None = início dos dados)
+            end: Último dia da janela (None = fim dos dados)
+            medians: "sheet" usa as colunas Mediana_Semana_* (calculando as ausentes),
+                "computed" calcula a mediana do crescimento no grupo comparável e semana
+            
+        Returns:
+            pd.DataFrame: Uma linha por loja com as colunas da aba cluster
+        """
+        if medians not in self.MEDIAN_SOURCES:
+            raise ValueError(f"Origem de medianas inválida: {medians}. Use: {', '.join(self.MEDIAN_SOURCES)}")
+        
+        missing = self.missing_columns(medians)
+        if missing:
+            raise ValueError(f"Colunas ausentes na aba diária: {', '.join(missing)}")
+        
+        df = self.df_diaria
+        positions = self._window_positions(start, end)
+        
+        # Códigos de loja, semana e par (loja, semana) das linhas da janela
+        store_codes, stores = pd.factorize(df["NomeLoja"].iloc[positions], sort=True)
+        week_codes, weeks = pd.factorize(df["semana"].iloc[positions], sort=True)
+        valid = (store_codes >= 0) & (week_codes >= 0)
+        positions, store_codes, week_codes = positions[valid], store_codes[valid], week_codes[valid]
+        
+        pair_codes, pair_keys = pd.factorize(store_codes * max(len(weeks), 1) + week_codes)
+        n_pairs = len(pair_keys)
+        n_stores = len(stores)
+        pair_store = pair_keys // max(len(weeks), 1)
+        _, first_rows = np.unique(pair_codes, return_index=True)
+        
+        def pair_sum(column: str) -> np.ndarray:
+            values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)[positions]
+            return np.bincount(pair_codes, weights=values, minlength=n_pairs)
+        
+        current = {name: pair_sum(atual) for name, (atual, _) in NATIVE_VOLUMES.items()}
+        previous = {name: pair_sum(anterior) for name, (_, anterior) in NATIVE_VOLUMES.items()}
+        
+        # Medianas calculadas na própria janela (modo "computed" ou colunas ausentes)
+        median_table = None
+        if medians == "computed" or any(spec["median"] not in df.columns for spec in NATIVE_LACUNAS.values()):
+            median_table = self.median_table
+            if median_table is None or median_table.empty:
+                median_table = WeeklyMedianEngine().compute(df.iloc[positions])
+        pair_rows = positions[first_rows]
+        
+        result = {"NomeLoja": stores.astype(str)}
+        store_first_rows = positions[np.unique(store_codes, return_index=True)[1]]
+        for column in NATIVE_STORE_COLUMNS:
+            if column in df.columns:
+                result[column] = df[column].iloc[store_first_rows].to_numpy()
+        
+        for lacuna, spec in NATIVE_LACUNAS.items():
+            actual = metric_ratio(current, spec)
+            baseline = metric_ratio(previous, spec)
+            median = self._pair_medians(spec, pair_rows, median_table, medians)
+            expected = (1 + median) * baseline
+            
+            if spec["denominator"] is None:
+                result[lacuna] = np.bincount(pair_store, weights=actual - expected, minlength=n_stores)
+            else:
+                weights = current[spec["denominator"]]
+                numerator = np.bincount(pair_store, weights=current[spec["numerator"]], minlength=n_stores)
+                denominator = np.bincount(pair_store, weights=weights, minlength=n_stores)
+                expected_total = np.bincount(pair_store, weights=np.where(weights != 0, expected * weights, 0), minlength=n_stores)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    result[lacuna] = np.where(
+                        denominator != 0, (numerator - expected_total) / denominator, np.nan
+                    )
+        
+        result["TTLacuna"] = result["LacunaRL"]
+        
+        logger.info(f"Lacunas nativas calculadas: {n_stores} lojas, {len(weeks)} semanas, {len(positions)} linhas")
+        return pd.DataFrame(result)
+    
+    def _pair_medians(self, spec: Dict, pair_rows: np.ndarray, median_table: Optional[pd.DataFrame],
+                      medians: str) -> np.ndarray:
+        """Mediana de crescimento de cada par (loja, semana), a partir da primeira linha do par"""
+        df = self.df_diaria
+        if medians == "sheet" and spec["median"] in df.columns:
+            return df[spec["median"]].to_numpy(dtype=np.float64, na_value=np.nan)[pair_rows]
+        
+        return WeeklyMedianEngine.lookup(
+            median_table,
+            df["grupo_comparavel"].iloc[pair_rows].astype(str),
+            df["semana"].iloc[pair_rows].astype(str),
+            spec["median"]
+        )
+    
+    def cross_check(self, native: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+        """
+        Compara as Lacunas calculadas com as colunas Lacuna* da aba diária
+        
+        A referência é agregada por loja na mesma janela: soma para RL e Cupom,
+        média dos dias para BM, PM e Prod. As fontes diferem por definição: a
+        planilha zera a Lacuna dos dias sem base comparável (algum volume da
+        métrica zerado, atual ou do ano anterior) e usa, por linha, uma mediana
+        que não está na aba (a mediana implícita varia dentro do grupo e
+        semana). Lojas com dias sem base ficam fora da comparação; as demais
+        passam quando o erro fica dentro de relative_tolerance do valor da
+        métrica no ano anterior (NATIVE_LACUNA_CONFIG). Lacunas zeradas em
+        toda a janela da planilha não têm referência (comparavel=False).
+        
+        Args:
+            native: Resultado de compute() para a mesma janela
+            start: Primeiro dia da janela
+            end: Último dia da janela
+            
+        Returns:
+            pd.DataFrame: Uma linha por Lacuna com lojas comparadas e sem base, erros,
+                percentual dentro da tolerância, concordância de sinal e aprovação
+        """
+        df = self.df_diaria
+        positions = self._window_positions(start, end)
+        window = df.iloc[positions]
+        tolerance = NATIVE_LACUNA_CONFIG["relative_tolerance"]
+        rows = []
+        
+        for lacuna, spec in NATIVE_LACUNAS.items():
+            if lacuna not in window.columns or lacuna not in native.columns:
+                continue
+            
+            volumes = [spec["numerator"]] + ([spec["denominator"]] if spec["denominator"] else [])
+            frame = pd.DataFrame({
+                "NomeLoja": window["NomeLoja"].astype(str).to_numpy(),
+                "referencia": window[lacuna].to_numpy(dtype=np.float64, na_value=np.nan),
+                "sem_base": np.zeros(len(window), dtype=bool),
+                **{name: window[NATIVE_VOLUMES[name][1]].to_numpy(dtype=np.float64, na_value=np.nan) for name in volumes}
+            })
+            for name in volumes:
+                for column in NATIVE_VOLUMES[name]:
+                    frame["sem_base"] |= np.nan_to_num(window[column].to_numpy(dtype=np.float64, na_value=np.nan)) == 0
+            
+            grouped = frame.groupby("NomeLoja", sort=True)
+            how = "sum" if spec["denominator"] is None else "mean"
+            reference = grouped["referencia"].agg(how)
+            no_base = grouped["sem_base"].any()
+            previous = metric_ratio({name: grouped[name].sum().to_numpy() for name in volumes}, spec)
+            baseline = pd.Series(np.abs(previous), index=reference.index)
+            computed = native.set_index(native["NomeLoja"].astype(str))[lacuna].reindex(reference.index)
+            
+            both = reference.notna() & computed.notna() & ~no_base
+            errors = (computed[both] - reference[both]).abs()
+            has_reference = bool(reference[both].ne(0).any())
+            # Correlação indefinida quando um dos lados é constante (p.ex. Lacuna zerada na planilha)
+            comparable = both.sum() > 1 and computed[both].nunique() > 1 and reference[both].nunique() > 1
+            within = float((errors <= tolerance * baseline[both]).mean() * 100) if both.any() else np.nan
+            
+            rows.append({
+                "Lacuna": lacuna,
+                "lojas": int(both.sum()),
+                "lojas_sem_base": int(no_base.sum()),
+                "erro_medio_abs": float(errors.mean()) if both.any() else np.nan,
+                "erro_max_abs": float(errors.max()) if both.any() else np.nan,
+                "correlacao": float(computed[both].corr(reference[both])) if comparable else np.nan,
+                "concordancia_sinal": float((np.sign(computed[both]) == np.sign(reference[both])).mean() * 100) if both.any() else np.nan,
+                "dentro_tolerancia": within,
+                "comparavel": has_reference,
+                "aprovada": has_reference and within >= NATIVE_LACUNA_CONFIG["min_within_tolerance"]
+            })
+        
+        return pd.DataFrame(rows)
+
+
+class LazyMetrics(Mapping):
+    """
+    Métricas do dashboard calculadas sob demanda
+    
+    Mantém a interface de dicionário de calculate_all_metrics, mas cada
+    entrada só é calculada no primeiro acesso (KPIs escalares juntos, em uma
+    execução do motor) e depois guardada no próprio objeto. Consultar chaves
+    com "in" não dispara cálculos: para saber se houve erro use check() com
+    as entradas que serão exibidas, ou a propriedade error (calcula todas).
+    """
+    
+    def __init__(self, calculator: "LacunaCalculator"):
+        """
+        Args:
+            calculator: Calculadora que fornece as entradas (métodos memoizados)
+        """
+        self._values: Dict[str, Any] = {}
+        self._error: Optional[str] = None
+        self._sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._entries: Dict[str, str] = {}
+        
+        if calculator.df_cluster.empty:
+            return
+        
+        self._add_source("kpis", KPI_OUTPUTS, calculator.calculate_kpis)
+        
+        top = METRICS_SPEC["top"]
+        self._add_source("top_oportunidades", ["top_oportunidades"], lambda: {
+            "top_oportunidades": calculator.get_top_opportunities(top["top_oportunidades"]["n"])
+        })
+        self._add_source("top_destaques", ["top_destaques"], lambda: {
+            "top_destaques": calculator.get_top_performers(top["top_destaques"]["n"])
+        })
+        self._add_source("analise_clusters", ["analise_clusters"], lambda: {
+            "analise_clusters": calculator.analyze_by_cluster()
+        })
+        
+        # Análise por GR
+        if "NumeroGR" in calculator.df_diaria.columns:
+            self._add_source("analise_gr", ["analise_gr"], lambda: {
+                "analise_gr": calculator.analyze_by_gr()
+            })
+        
+        # Percentual de captura (assumindo meta de 40%)
+        self._add_source("percentual_captura", ["percentual_captura"], lambda: {
+            "percentual_captura": 40.0  # Placeholder - seria calculado baseado em metas
+        })
+    
+    def _add_source(self, source: str, entries: List[str], loader: Callable[[], Dict[str, Any]]):
+        """Registra um cálculo que preenche as entradas informadas"""
+        self._sources[source] = loader
+        for entry in entries:
+            self._entries[entry] = source
+    
+    def _load(self, source: str):
+        """Executa um cálculo e guarda as entradas produzidas (ou o erro)"""
+        try:
+            values = self._sources.pop(source)()
+        except Exception as e:
+            logger.error(f"Erro no cálculo de métricas ({source}): {str(e)}")
+            self._error = str(e)
+            return
+        
+        if "error" in values:
+            self._error = values.pop("error")
+        self._values.update(values)
+    
+    def __getitem__(self, key: str) -> Any:
+        if key == "error" and self._error is not None:
+            return self._error
+        if key not in self._values and self._entries.get(key) in self._sources:
+            self._load(self._entries[key])
+        if key not in self._values:
+            raise KeyError(key)
+        return self._values[key]
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries or (key == "error" and self._error is not None)
+    
+    def __iter__(self) -> Iterator[str]:
+        yield from self._entries
+        if self._error is not None:
+            yield "error"
+    
+    def __len__(self) -> int:
+        return len(self._entries) + (self._error is not None)
+    
+    def computed(self) -> List[str]:
+        """Entradas já calculadas"""
+        return list(self._values)
+    
+    def check(self, keys: Optional[Iterable[str]] = None) -> Optional[str]:
+        """
+        Calcula as entradas informadas e retorna o erro dos cálculos executados
+        
+        Args:
+            keys: Entradas a calcular (None = todas as pendentes)
+            
+        Returns:
+            Optional[str]: Mensagem de erro ou None
+        """
+        for key in (list(self._entries) if keys is None else keys):
+            source = self._entries.get(key)
+            if key not in self._values and source in self._sources:
+                self._load(source)
+        return self._error
+    
+    @property
+    def error(self) -> Optional[str]:
+        """Erro após calcular todas as entradas pendentes (None se tudo foi calculado)"""
+        return self.check()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Calcula todas as entradas pendentes
+        
+        Returns:
+            Dict: Métricas calculadas (com "error" se algum cálculo falhou)
+        """
+        metrics = {}
+        for key in list(self._entries):
+            try:
+                metrics[key] = self[key]
+            except KeyError:
+                pass
+        if self._error is not None:
+            metrics["error"] = self._error
+        return metrics
+
 
 class LacunaCalculator:
     """Classe para cálculos de lacunas e métricas derivadas"""
     
-    def __init__(self, data: Dict[str, pd.DataFrame]):
+    def __init__(self, data: Dict[str, pd.DataFrame], dataset_key: Optional[str] = None,
+                 weekly_medians: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            data: Dicionário com DataFrames
+            dataset_key: Chave do dataset (habilita a memoização compartilhada)
+            weekly_medians: Tabela de medianas semanais do DataLoader (metadata["weekly_medians"])
+        """
         self.data = data
+        self.dataset_key = dataset_key
+        self.weekly_medians = weekly_medians
         self.df_diaria = data.get("pulso_consulta_diaria", pd.DataFrame())
         self.df_cluster = data.get("pulso_consulta_diaria_cluster_a", pd.DataFrame())
+        self._aggregation_engine: Optional[AggregationEngine] = None
+        self._store_index: Optional[StoreIndex] = None
+        self._cube: Optional[LacunaCube] = None
+    
+    def _engine(self) -> AggregationEngine:
+        """Motor de agregação sobre a aba cluster (arrays extraídos uma única vez)"""
+        if self._aggregation_engine is None:
+            self._aggregation_engine = AggregationEngine(self.df_cluster)
+        return self._aggregation_engine
+    
+    def store_index(self) -> StoreIndex:
+        """Índice de lojas do dataset (construído uma vez e compartilhado por dataset_key)"""
+        if self._store_index is None:
+            self._store_index = get_store_index(self.data, self.dataset_key)
+        return self._store_index
+    
+    def cube(self) -> LacunaCube:
+        """Cubo de agregados da aba cluster (construído uma vez e compartilhado por dataset_key)"""
+        if self._cube is None:
+            self._cube = get_lacuna_cube(self.data, self.dataset_key)
+        return self._cube
+    
+    def metrics(self) -> LazyMetrics:
+        """
+        Métricas principais do dashboard, calculadas sob demanda
+        
+        Cada entrada é calculada no primeiro acesso; páginas que usam só os
+        KPIs não pagam pelos rankings nem pelas análises por cluster/GR.
+        
+        Returns:
+            LazyMetrics: Métricas com interface de dicionário
+        """
+        return LazyMetrics(self)
     
+    @memoized
     def calculate_all_metrics(self) -> Dict[str, Any]:
         """
         Calcula todas as métricas principais do dashboard
         
+        Equivale a metrics() com todas as entradas calculadas.
+        
         Returns:
             Dict: Métricas calculadas
         """
-        metrics = {}
+        metrics = self.metrics().to_dict()
+        if metrics and "error" not in metrics:
+            logger.info("Métricas calculadas com sucesso")
+        return metrics
+    
+    @memoized
+    def calculate_kpis(self) -> Dict[str, Any]:
+        """
+        Calcula os KPIs escalares (totais e contagens) em uma execução do METRICS_SPEC
         
+        Returns:
+            Dict: KPIs calculados
+        """
         if self.df_cluster.empty:
-            return metrics
+            return {}
         
         try:
-            # KPIs principais
-            metrics["lacuna_total_rl"] = self.df_cluster["LacunaRL"].sum()
-            metrics["lacuna_total_cupom"] = self.df_cluster["LacunaCupom"].sum()
-            metrics["lacuna_total_bm"] = self.df_cluster["LacunaBM"].sum()
-            
-            # Percentual de captura (assumindo meta de 40%)
-            total_lacuna_negativa = self.df_cluster[self.df_cluster["LacunaRL"] < 0]["LacunaRL"].sum()
-            metrics["percentual_captura"] = 40.0  # Placeholder - seria calculado baseado em metas
-            
-            # Contadores
-            metrics["total_lojas"] = len(self.df_cluster)
-            metrics["lojas_com_lacuna"] = len(self.df_cluster[self.df_cluster["LacunaRL"] < 0])
-            metrics["lojas_acima_meta"] = len(self.df_cluster[self.df_cluster["LacunaRL"] > 0])
-            
-            # Top oportunidades
-            metrics["top_oportunidades"] = self.get_top_opportunities(10)
-            metrics["top_destaques"] = self.get_top_performers(10)
-            
-            # Análise por cluster
-            metrics["analise_clusters"] = self.analyze_by_cluster()
-            
-            # Análise por GR
-            if "NumeroGR" in self.df_diaria.columns:
-                metrics["analise_gr"] = self.analyze_by_gr()
-            
-            logger.info("Métricas calculadas com sucesso")
+            return self._engine().run(KPI_OUTPUTS)
             
         except Exception as e:
-            logger.error(f"Erro no cálculo de métricas: {str(e)}")
-            metrics["error"] = str(e)
-        
-        return metrics
+            logger.error(f"Erro no cálculo dos KPIs: {str(e)}")
+            return {"error": str(e)}
     
+    @memoized
     def get_top_opportunities(self, n: int = 10) -> pd.DataFrame:
         """
         Retorna as maiores oportunidades (lacunas negativas)
@@ -77,18 +528,9 @@ class LacunaCalculator:
         if self.df_cluster.empty:
             return pd.DataFrame()
         
-        # Filtrar apenas lacunas negativas (oportunidades)
-        opportunities = self.df_cluster[self.df_cluster["LacunaRL"] < 0].copy()
-        
-        # Ordenar por maior lacuna (menor valor, pois são negativos)
-        opportunities = opportunities.sort_values("LacunaRL").head(n)
-        
-        # Adicionar colunas calculadas
-        opportunities["LacunaRL_Abs"] = abs(opportunities["LacunaRL"])
-        opportunities["Rank"] = range(1, len(opportunities) + 1)
-        
-        return opportunities[["Rank", "NomeLoja", "grupo_comparavel", "LacunaRL", "LacunaRL_Abs", "LacunaCupom", "LacunaBM"]]
+        return self._engine().run(["top_oportunidades"], top_n=n)["top_oportunidades"]
     
+    @memoized
     def get_top_performers(self, n: int = 10) -> pd.DataFrame:
         """
         Retorna os melhores performers (lacunas positivas)
@@ -102,17 +544,37 @@ class LacunaCalculator:
         if self.df_cluster.empty:
             return pd.DataFrame()
         
-        # Filtrar apenas lacunas positivas (destaques)
-        performers = self.df_cluster[self.df_cluster["LacunaRL"] > 0].copy()
+        return self._engine().run(["top_destaques"], top_n=n)["top_destaques"]
+    
+    def get_top_k(self, column: str = "LacunaRL", n: int = 10, mask: Optional[np.ndarray] = None,
+                  largest: bool = False, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Ranking top-n de uma Lacuna da aba cluster sob uma máscara de filtro
         
-        # Ordenar por maior lacuna positiva
-        performers = performers.sort_values("LacunaRL", ascending=False).head(n)
+        Apenas as n linhas escolhidas são copiadas; o ranking fica em cache
+        por dataset, coluna e máscara.
         
-        # Adicionar colunas calculadas
-        performers["Rank"] = range(1, len(performers) + 1)
+        Args:
+            column: Coluna a ranquear
+            n: Número de registros a retornar
+            mask: Máscara booleana sobre a aba cluster (None considera todas as lojas)
+            largest: Maiores valores primeiro (False: maiores lacunas negativas primeiro)
+            columns: Colunas a retornar (None retorna todas)
+            
+        Returns:
+            pd.DataFrame: Linhas ranqueadas (equivalente a nsmallest/nlargest)
+        """
+        if self.df_cluster.empty:
+            return pd.DataFrame()
         
-        return performers[["Rank", "NomeLoja", "grupo_comparavel", "LacunaRL", "LacunaCupom", "LacunaBM"]]
+        positions = get_top_k(
+            self.data, "pulso_consulta_diaria_cluster_a", column, n,
+            mask=mask, largest=largest, dataset_key=self.dataset_key
+        )
+        top = self.df_cluster.iloc[positions]
+        return top[columns] if columns is not None else top
     
+    @memoized
     def analyze_by_cluster(self) -> pd.DataFrame:
         """
         Análise agregada por cluster
@@ -124,37 +586,13 @@ class LacunaCalculator:
             return pd.DataFrame()
         
         try:
-            cluster_analysis = self.df_cluster.groupby("grupo_comparavel").agg({
-                "LacunaRL": ["sum", "mean", "count", "std"],
-                "LacunaCupom": ["sum", "mean"],
-                "LacunaBM": ["sum", "mean"],
-                "LacunaPM": ["sum", "mean"],
-                "LacunaProd": ["sum", "mean"],
-                "NomeLoja": "count"
-            }).round(2)
-            
-            # Flatten column names
-            cluster_analysis.columns = [f"{col[1]}_{col[0]}" if col[1] != "" else col[0] for col in cluster_analysis.columns]
-            
-            # Renomear colunas
-            cluster_analysis = cluster_analysis.rename(columns={
-                "count_NomeLoja": "Qtd_Lojas",
-                "sum_LacunaRL": "LacunaRL_Total",
-                "mean_LacunaRL": "LacunaRL_Media",
-                "std_LacunaRL": "LacunaRL_Desvio"
-            })
-              # Calcular métricas adicionais
-            cluster_analysis["LacunaRL_Potencial"] = cluster_analysis["LacunaRL_Total"] * -1  # Inverter negativos
-            cluster_analysis["LacunaRL_Potencial"] = cluster_analysis["LacunaRL_Potencial"].where(
-                cluster_analysis["LacunaRL_Potencial"] > 0, 0
-            )
-            
-            return cluster_analysis.reset_index()
+            return self.cube().group_frame(METRICS_SPEC["groups"]["analise_clusters"])
             
         except Exception as e:
             logger.error(f"Erro na análise por cluster: {str(e)}")
             return pd.DataFrame()
     
+    @memoized
     def analyze_by_gr(self) -> pd.DataFrame:
         """
         Análise agregada por Gerência Regional (GR)
@@ -166,35 +604,36 @@ class LacunaCalculator:
             return pd.DataFrame()
         
         try:
-            # Verificar se NumeroGR existe no df_cluster
-            if "NumeroGR" not in self.df_cluster.columns:
-                logger.warning("Coluna NumeroGR não encontrada nos dados")
-                return pd.DataFrame()
-            
-            # Usar NumeroGR diretamente do df_cluster
-            gr_analysis = self.df_cluster.groupby("NumeroGR").agg({
-                "LacunaRL": ["sum", "mean", "count"],
-                "LacunaCupom": ["sum", "mean"],
-                "LacunaBM": ["sum", "mean"],
-                "NomeLoja": "count"
-            }).round(2)
-            
-            # Flatten column names
-            gr_analysis.columns = [f"{col[1]}_{col[0]}" if col[1] != "" else col[0] for col in gr_analysis.columns]
-            
-            # Renomear colunas
-            gr_analysis = gr_analysis.rename(columns={
-                "count_NomeLoja": "Qtd_Lojas",
-                "sum_LacunaRL": "LacunaRL_Total",
-                "mean_LacunaRL": "LacunaRL_Media"
-            })
-            
-            return gr_analysis.reset_index()
+            return self.cube().group_frame(METRICS_SPEC["groups"]["analise_gr"])
             
         except Exception as e:
             logger.error(f"Erro na análise por GR: {str(e)}")
             return pd.DataFrame()
     
+    def aggregate_lacunas(self, by: Optional[List[str]] = None,
+                          filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """
+        Rollup, drilldown ou KPI filtrado das Lacunas respondido pelo cubo
+        
+        Args:
+            by: Dimensões do resultado (NumeroGR, divisao, ds_hub, grupo_comparavel,
+                semana, mes); None ou vazio = total geral
+            filters: {dimensão: valor ou lista de valores}
+            
+        Returns:
+            pd.DataFrame: Soma, contagem, média e desvio padrão de cada Lacuna
+        """
+        if self.df_cluster.empty:
+            return pd.DataFrame()
+        
+        try:
+            return self.cube().aggregate(by or [], filters)
+            
+        except Exception as e:
+            logger.error(f"Erro na agregação pelo cubo: {str(e)}")
+            return pd.DataFrame()
+    
+    @memoized
     def calculate_waterfall_data(self, loja_nome: Optional[str] = None) -> Dict:
         """
         Calcula dados para gráfico waterfall de decomposição de lacunas
@@ -210,16 +649,17 @@ class LacunaCalculator:
         
         try:
             if loja_nome:
-                # Análise de loja específica
-                loja_data = self.df_cluster[self.df_cluster["NomeLoja"] == loja_nome]
-                if loja_data.empty:
+                # Análise de loja específica (linha localizada pelo índice de lojas)
+                position = self.store_index().cluster_position(loja_nome)
+                if position is None:
                     return {}
                 
-                lacuna_rl = loja_data["LacunaRL"].iloc[0]
-                lacuna_cupom = loja_data["LacunaCupom"].iloc[0]
-                lacuna_bm = loja_data["LacunaBM"].iloc[0]
-                lacuna_pm = loja_data["LacunaPM"].iloc[0]
-                lacuna_prod = loja_data["LacunaProd"].iloc[0]
+                loja_data = self.df_cluster.iloc[position]
+                lacuna_rl = loja_data["LacunaRL"]
+                lacuna_cupom = loja_data["LacunaCupom"]
+                lacuna_bm = loja_data["LacunaBM"]
+                lacuna_pm = loja_data["LacunaPM"]
+                lacuna_prod = loja_data["LacunaProd"]
                 
             else:
                 # Análise total
@@ -243,6 +683,7 @@ class LacunaCalculator:
             logger.error(f"Erro no cálculo do waterfall: {str(e)}")
             return {}
     
+    @memoized
     def get_loja_details(self, loja_nome: str) -> Dict:
         """
         Retorna detalhes completos de uma loja específica
@@ -256,31 +697,29 @@ class LacunaCalculator:
         details = {}
         
         try:
+            index = self.store_index()
+            
             # Dados da aba cluster
-            if not self.df_cluster.empty:
-                loja_cluster = self.df_cluster[self.df_cluster["NomeLoja"] == loja_nome]
-                if not loja_cluster.empty:
-                    details["cluster_data"] = loja_cluster.iloc[0].to_dict()
-            
-            # Dados da aba diária
-            if not self.df_diaria.empty:
-                loja_diaria = self.df_diaria[self.df_diaria["NomeLoja"] == loja_nome]
-                if not loja_diaria.empty:
-                    details["daily_data"] = loja_diaria.to_dict('records')
-            
-            # Calcular métricas derivadas
+            position = index.cluster_position(loja_nome)
+            if position is not None:
+                details["cluster_data"] = self.df_cluster.iloc[position].to_dict()
+            
+            # Dados da aba diária (faixa contígua da aba ordenada por loja)
+            loja_diaria = index.daily_rows(loja_nome)
+            if not loja_diaria.empty:
+                details["daily_data"] = loja_diaria.to_dict('records')
+            
+            # Comparativo com cluster (linha da tabela de estatísticas por loja)
             if "cluster_data" in details:
-                cluster_info = details["cluster_data"]
-                grupo = cluster_info.get("grupo_comparavel", "")
-                
-                # Comparativo com cluster
-                cluster_peers = self.df_cluster[self.df_cluster["grupo_comparavel"] == grupo]
-                if not cluster_peers.empty:
+                peer_stats = self.calculate_peer_statistics()
+                if loja_nome in peer_stats.index:
+                    peer_row = peer_stats.loc[loja_nome]
                     details["cluster_comparison"] = {
-                        "cluster_size": len(cluster_peers),
-                        "cluster_median_rl": cluster_peers["LacunaRL"].median(),
-                        "cluster_mean_rl": cluster_peers["LacunaRL"].mean(),
-                        "rank_in_cluster": (cluster_peers["LacunaRL"] < cluster_info["LacunaRL"]).sum() + 1
+                        "cluster_size": int(peer_row["cluster_size"]),
+                        "cluster_median_rl": peer_row["cluster_median_lacunarl"],
+                        "cluster_mean_rl": peer_row["cluster_mean_lacunarl"],
+                        "rank_in_cluster": int(peer_row["rank_in_cluster"]),
+                        **peer_row.drop(["grupo_comparavel", "cluster_size", "rank_in_cluster"]).to_dict()
                     }
             
         except Exception as e:
@@ -289,6 +728,61 @@ class LacunaCalculator:
         
         return details
     
+    @memoized
+    def calculate_peer_statistics(self) -> pd.DataFrame:
+        """
+        Estatísticas de todas as lojas frente ao seu grupo comparável
+        
+        Em uma passagem agrupada por grupo_comparavel calcula, para cada Lacuna,
+        mediana/média/desvio do grupo (colunas cluster_<estatística>_<lacuna>),
+        a posição da loja (rank_in_cluster: 1 = menor LacunaRL; posicao_cluster:
+        1 = maior LacunaRL) e o percentil no cluster. Cada loja é representada
+        pela sua primeira linha na aba cluster, como em get_loja_details.
+        
+        Returns:
+            pd.DataFrame: Uma linha por loja, indexada por NomeLoja
+        """
+        if self.df_cluster.empty or "grupo_comparavel" not in self.df_cluster.columns:
+            return pd.DataFrame()
+        
+        try:
+            metrics = [metric for metric in PEER_METRICS if metric in self.df_cluster.columns]
+            frame = self.df_cluster[["NomeLoja", "grupo_comparavel"] + metrics].astype(
+                {metric: np.float64 for metric in metrics}
+            )
+            grouped = frame.groupby("grupo_comparavel", observed=True, dropna=False)
+            
+            stats = {
+                "NomeLoja": frame["NomeLoja"].astype(str),
+                "grupo_comparavel": frame["grupo_comparavel"].astype(str),
+                "cluster_size": grouped["NomeLoja"].transform("size")
+            }
+            for metric in metrics:
+                suffix = metric.lower()
+                stats[f"cluster_median_{suffix}"] = grouped[metric].transform("median")
+                stats[f"cluster_mean_{suffix}"] = grouped[metric].transform("mean")
+                stats[f"cluster_std_{suffix}"] = grouped[metric].transform("std")
+            
+            stats["rank_in_cluster"] = grouped["LacunaRL"].rank(method="min", na_option="bottom").astype(np.int64)
+            stats["posicao_cluster"] = grouped["LacunaRL"].rank(
+                method="first", ascending=False, na_option="bottom"
+            ).astype(np.int64)
+            
+            table = pd.DataFrame(stats)
+            table["percentil_cluster"] = (
+                (table["cluster_size"] - table["posicao_cluster"]) / table["cluster_size"] * 100
+            )
+            
+            # Linha de referência (primeira) de cada loja
+            index = self.store_index()
+            positions = [index.cluster_position(name) for name in index.store_names()]
+            return table.iloc[positions].set_index("NomeLoja")
+            
+        except Exception as e:
+            logger.error(f"Erro no cálculo das estatísticas por loja: {str(e)}")
+            return pd.DataFrame()
+    
+    @memoized
     def calculate_trends(self) -> Dict:
         """
         Calcula tendências temporais quando há dados de datavenda
@@ -322,3 +816,114 @@ class LacunaCalculator:
             trends["error"] = str(e)
         
         return trends
+    
+    @memoized
+    def calculate_native_lacunas(self, start=None, end=None, medians: str = "sheet") -> pd.DataFrame:
+        """
+        Lacunas por loja calculadas diretamente da aba diária
+        
+        Args:
+            start: Primeiro dia da janela (None = início dos dados)
+            end: Último dia da janela (None = fim dos dados)
+            medians: "sheet" (colunas Mediana_Semana_*) ou "computed" (mediana do grupo na semana)
+            
+        Returns:
+            pd.DataFrame: Uma linha por loja, no formato da aba cluster
+        """
+        if self.df_diaria.empty:
+            return pd.DataFrame()
+        
+        try:
+            median_table = self.calculate_weekly_medians(start, end) if medians == "computed" else None
+            return NativeLacunaEngine(self.df_diaria, median_table).compute(start, end, medians)
+            
+        except Exception as e:
+            logger.error(f"Erro no cálculo nativo de lacunas: {str(e)}")
+            return pd.DataFrame()
+    
+    @memoized
+    def calculate_weekly_medians(self, start=None, end=None,
+                                 groups: Optional[Tuple[Tuple[str, str], ...]] = None) -> pd.DataFrame:
+        """
+        Medianas semanais por (grupo_comparavel, semana)
+        
+        Sem janela nem reagrupamento devolve a tabela mantida pelo DataLoader
+        (atualizada por células nas cargas incrementais); nos demais casos
+        calcula a tabela da janela.
+        
+        Args:
+            start: Primeiro dia da janela (None = início dos dados)
+            end: Último dia da janela (None = fim dos dados)
+            groups: Pares (NomeLoja, grupo) que substituem o grupo comparável da aba
+            
+        Returns:
+            pd.DataFrame: Uma linha por célula com as colunas Mediana_Semana_* e a quantidade de lojas
+        """
+        if start is None and end is None and groups is None and self.weekly_medians is not None \
+                and not self.weekly_medians.empty:
+            return self.weekly_medians
+        
+        if self.df_diaria.empty:
+            return pd.DataFrame()
+        
+        try:
+            return WeeklyMedianEngine(dict(groups) if groups else None).compute(self.df_diaria, start, end)
+            
+        except Exception as e:
+            logger.error(f"Erro no cálculo das medianas semanais: {str(e)}")
+            return pd.DataFrame()
+    
+    @memoized
+    def cross_check_native_lacunas(self, start=None, end=None, medians: Optional[str] = None) -> pd.DataFrame:
+        """
+        Confere as Lacunas nativas contra os valores da planilha
+        
+        O resultado é reportado por Lacuna e por origem de medianas, sem um
+        veredito único: cada linha traz a sua situação ("aprovada",
+        "reprovada" ou "sem referência" quando a planilha zera a Lacuna).
+        
+        Args:
+            start: Primeiro dia da janela
+            end: Último dia da janela
+            medians: Origem das medianas a conferir (None confere todas)
+            
+        Returns:
+            pd.DataFrame: Uma linha por (medianas, Lacuna) com erros, tolerância e
+                concordância de sinal (ver NativeLacunaEngine.cross_check)
+        """
+        sources = NativeLacunaEngine.MEDIAN_SOURCES if medians is None else (medians,)
+        checks = []
+        
+        for source in sources:
+            native = self.calculate_native_lacunas(start, end, source)
+            if native.empty:
+                continue
+            
+            check = NativeLacunaEngine(self.df_diaria).cross_check(native, start, end)
+            check.insert(0, "medianas", source)
+            check["situacao"] = np.where(
+                ~check["comparavel"], "sem referência", np.where(check["aprovada"], "aprovada", "reprovada")
+            )
+            checks.append(check)
+        
+        if not checks:
+            return pd.DataFrame()
+        
+        result = pd.concat(checks, ignore_index=True)
+        for _, row in result.iterrows():
+            logger.info(
+                f"Conferência {row['Lacuna']} (medianas {row['medianas']}): {row['lojas']} lojas "
+                f"({row['lojas_sem_base']} sem base), erro médio {row['erro_medio_abs']:.2f}, "
+                f"{row['dentro_tolerancia']:.1f}% dentro da tolerância, {row['situacao']}"
+            )
+        return result
+    
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        """
+        Contadores do cache de métricas compartilhado
+        
+        Returns:
+            Dict[str, Any]: Acertos, falhas, taxa de acerto e ocupação
+        """
+        return get_metrics_cache().stats()
@@ -0,0 +1,728 @@
+"""
+Clustering de lojas do Projeto Pulso com resultados reutilizáveis
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+
+import streamlit as st
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import PCA, IncrementalPCA
+from sklearn.metrics import calinski_harabasz_score, silhouette_score
+from sklearn.preprocessing import StandardScaler
+from scipy.optimize import linear_sum_assignment
+from threadpoolctl import threadpool_limits
+
+from config import CLUSTERING_CONFIG
+from .cache import MemoCache
+from .dataset_registry import is_frozen_frame
+from .features import feature_matrix
+
+logger = logging.getLogger(__name__)
+
+# Algoritmos disponíveis: {nome: construtor do modelo a partir de k e da semente}
+ALGORITHMS = {
+    "kmeans": lambda k, seed: KMeans(n_clusters=k, random_state=seed),
+    "minibatch": lambda k, seed: MiniBatchKMeans(
+        n_clusters=k, random_state=seed, batch_size=CLUSTERING_CONFIG["minibatch"]["batch_size"]
+    )
+}
+
+# Algoritmos ajustados em streaming (partial_fit sobre blocos de linhas)
+STREAMING_ALGORITHMS = {"minibatch"}
+
+# Callback de progresso: (fração concluída, mensagem)
+ProgressCallback = Callable[[float, str], None]
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """
+    Hash do conteúdo de um DataFrame (valores e índice)
+
+    Args:
+        df: DataFrame a identificar
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    hasher = hashlib.blake2b(hashes.tobytes(), digest_size=16)
+    hasher.update("|".join(map(str, df.columns)).encode())
+    return hasher.hexdigest()
+
+
+def _score_candidate(data: np.ndarray, k: int, seed: int, sample_size: int) -> Dict:
+    """
+    Ajusta um K-Means (uma inicialização) e calcula os scores do candidato
+
+    Executada nos processos do pool de seleção; limita o BLAS/OpenMP a uma
+    thread para não competir com os demais processos.
+
+    Args:
+        data: Features já normalizadas
+        k: Número de clusters
+        seed: Semente da inicialização
+        sample_size: Máximo de linhas usadas na silhueta
+
+    Returns:
+        Dict: k, semente, inércia, silhueta, Calinski-Harabasz e tempo de ajuste
+    """
+    start = time.perf_counter()
+    with threadpool_limits(limits=1):
+        model = KMeans(n_clusters=k, random_state=seed, n_init=1)
+        labels = model.fit_predict(data)
+
+        if len(np.unique(labels)) > 1:
+            silhouette = silhouette_score(
+                data, labels,
+                sample_size=sample_size if len(data) > sample_size else None,
+                random_state=seed
+            )
+            calinski = calinski_harabasz_score(data, labels)
+        else:
+            silhouette = calinski = np.nan
+
+    return {
+        "k": k,
+        "semente": seed,
+        "inercia": float(model.inertia_),
+        "silhueta": float(silhouette),
+        "calinski_harabasz": float(calinski),
+        "tempo_ajuste": time.perf_counter() - start
+    }
+
+
+def select_n_clusters(data: np.ndarray, k_values: Optional[Sequence[int]] = None,
+                      seeds: Optional[Sequence[int]] = None,
+                      max_workers: Optional[int] = None) -> Tuple[int, int, pd.DataFrame]:
+    """
+    Escolhe o número de clusters avaliando cada k com várias sementes
+
+    Cada par (k, semente) é um ajuste independente; a partir de
+    CLUSTERING_CONFIG["parallel_min_rows"] linhas os pares são avaliados em
+    um ProcessPoolExecutor. Para cada k vale a semente de menor inércia; o k
+    escolhido é o de maior silhueta (desempate por Calinski-Harabasz).
+
+    Args:
+        data: Features já normalizadas
+        k_values: Candidatos (padrão: CLUSTERING_CONFIG["k_range"])
+        seeds: Sementes por k (padrão: CLUSTERING_CONFIG["seeds"] a partir de random_state)
+        max_workers: Processos do pool (padrão: CLUSTERING_CONFIG ou número de CPUs)
+
+    Returns:
+        Tuple[int, int, pd.DataFrame]: k escolhido, semente do melhor ajuste e
+        tabela com os scores de todos os candidatos
+    """
+    if k_values is None:
+        low, high = CLUSTERING_CONFIG["k_range"]
+        k_values = range(low, high + 1)
+    if seeds is None:
+        base = CLUSTERING_CONFIG["random_state"]
+        seeds = range(base, base + CLUSTERING_CONFIG["seeds"])
+
+    # k precisa ser menor que o número de linhas para a silhueta ser definida
+    k_values = [int(k) for k in k_values if 2 <= k < len(data)]
+    if not k_values:
+        raise ValueError(f"Lojas insuficientes para clustering: {len(data)}")
+
+    data = np.ascontiguousarray(data)
+    sample_size = CLUSTERING_CONFIG["silhouette_sample"]
+    tasks = [(k, int(seed)) for k in k_values for seed in seeds]
+    max_workers = min(len(tasks), max_workers or CLUSTERING_CONFIG["max_workers"] or os.cpu_count() or 1)
+
+    start = time.perf_counter()
+    if max_workers > 1 and len(data) >= CLUSTERING_CONFIG["parallel_min_rows"]:
+        # spawn evita o fork de um processo com threads (servidor Streamlit)
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(_score_candidate, data, k, seed, sample_size) for k, seed in tasks]
+            scores = [future.result() for future in futures]
+    else:
+        max_workers = 1
+        scores = [_score_candidate(data, k, seed, sample_size) for k, seed in tasks]
+
+    table = pd.DataFrame(scores)
+
+    # Melhor ajuste de cada k (menor inércia) e, entre eles, o de maior silhueta
+    best = table.loc[table.groupby("k")["inercia"].idxmin()]
+    table["melhor_semente"] = table.index.isin(best.index)
+    chosen = best.sort_values(["silhueta", "calinski_harabasz"], ascending=False, na_position="last").index[0]
+    table["escolhido"] = table.index == chosen
+
+    n_clusters = int(table.at[chosen, "k"])
+    seed = int(table.at[chosen, "semente"])
+    logger.info(
+        f"Seleção de k: {len(tasks)} ajustes em {time.perf_counter() - start:.2f}s "
+        f"({max_workers} processos), k={n_clusters} (semente {seed})"
+    )
+    return n_clusters, seed, table
+
+
+def streaming_chunk_rows(n_features: int, n_clusters: int) -> int:
+    """
+    Linhas por bloco do modo streaming dentro do orçamento de memória
+
+    Cada linha do bloco ocupa a cópia float32 das features, a versão
+    normalizada e as distâncias aos k centróides (float64). O orçamento
+    limita só esse conjunto de trabalho: a matriz de features de entrada
+    (float32, uma linha por unidade) já está agregada e fica inteira.
+
+    Args:
+        n_features: Quantidade de features
+        n_clusters: Maior k que será ajustado
+
+    Returns:
+        int: Linhas por bloco (pelo menos um batch)
+    """
+    config = CLUSTERING_CONFIG["minibatch"]
+    bytes_per_row = 4 * n_features * 3 + 8 * n_clusters + 16
+    budget = int(config["memory_budget_mb"] * 1024 * 1024)
+    return max(config["batch_size"], budget // bytes_per_row)
+
+
+class ClusteringResult:
+    """
+    Resultado de um clustering, ajustado uma única vez
+
+    Guarda o scaler e o modelo ajustados, os rótulos, os centróides (na
+    escala original), a projeção PCA 2-D usada nas visualizações, a tabela de
+    seleção de k (k automático) e o histórico de convergência (streaming). Os
+    arrays são somente leitura, pois o mesmo resultado é servido a todas as
+    sessões.
+    """
+
+    def __init__(self, df: pd.DataFrame, features: List[str], n_clusters: Optional[int] = None,
+                 algorithm: str = "kmeans", progress: Optional[ProgressCallback] = None):
+        """
+        Args:
+            df: Uma linha por loja (ou loja-semana), com a coluna Loja e as features (ver src.features)
+            features: Colunas usadas no clustering
+            n_clusters: Número de clusters (None determina automaticamente)
+            algorithm: Chave de ALGORITHMS
+            progress: Callback de progresso do ajuste em streaming (opcional)
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Algoritmo de clustering desconhecido: {algorithm}")
+
+        self.features = list(features)
+        self.algorithm = algorithm
+
+        # Preparar dados para clustering: matriz float32 contígua (nulos pela média da coluna)
+        cluster_data = feature_matrix(df, self.features)
+        seed = CLUSTERING_CONFIG["random_state"]
+        self.selection: Optional[pd.DataFrame] = None
+        self.history: List[Dict] = []
+        self.converged: Optional[bool] = None
+
+        if algorithm in STREAMING_ALGORITHMS:
+            self._fit_streaming(cluster_data, n_clusters, seed, progress)
+        else:
+            self._fit_batch(cluster_data, n_clusters, seed)
+
+        # Adicionar clusters ao dataframe (features compartilhadas já são somente leitura)
+        self.frame = df.copy(deep=not is_frozen_frame(df))
+        self.frame["Cluster"] = self.labels
+        self.frame["Cluster_Label"] = [f"Cluster {i+1}" for i in self.labels]
+
+        # Calcular centróides
+        self.centroids = pd.DataFrame(
+            self.scaler.inverse_transform(self.model.cluster_centers_),
+            columns=self.features
+        )
+        self.centroids["Cluster"] = range(self.n_clusters)
+        self.centroids["Cluster_Label"] = [f"Cluster {i+1}" for i in range(self.n_clusters)]
+
+        self.explained_variance = self.pca.explained_variance_ratio_
+
+        for array in (self.labels, self.projection, self.explained_variance):
+            array.flags.writeable = False
+
+        logger.info(
+            f"Clustering ajustado: {len(df)} linhas, {self.n_clusters} clusters, "
+            f"features {', '.join(self.features)} ({algorithm})"
+        )
+
+    def _fit_batch(self, cluster_data: np.ndarray, n_clusters: Optional[int], seed: int):
+        """Ajuste com todas as linhas em memória (K-Means completo)"""
+        missing = np.isnan(cluster_data)
+        counts = (~missing).sum(axis=0)
+        means = np.where(counts > 0, np.nansum(cluster_data, axis=0) / np.maximum(counts, 1), 0)
+        self.fill_values = means.astype(np.float32)
+        cluster_data = np.where(missing, self.fill_values, cluster_data)
+
+        # Normalizar dados
+        self.scaler = StandardScaler()
+        scaled_data = self.scaler.fit_transform(cluster_data)
+
+        # Determinar número ideal de clusters se não especificado
+        if n_clusters is None:
+            n_clusters, seed, self.selection = select_n_clusters(scaled_data)
+        self.n_clusters = int(n_clusters)
+
+        self.model = ALGORITHMS[self.algorithm](self.n_clusters, seed)
+        self.labels = self.model.fit_predict(scaled_data)
+
+        # Projeção 2-D das lojas sobre os mesmos dados normalizados
+        self.pca = PCA(n_components=2)
+        self.projection = self.pca.fit_transform(scaled_data)
+
+    def _fit_streaming(self, cluster_data: np.ndarray, n_clusters: Optional[int], seed: int,
+                       progress: Optional[ProgressCallback]):
+        """
+        Ajuste em blocos de linhas dentro do orçamento de memória (Mini-Batch K-Means)
+
+        Médias, scaler, modelo e PCA são ajustados com partial_fit bloco a
+        bloco; só um bloco normalizado existe em memória por vez (a matriz
+        de features, uma linha por loja ou loja-semana, fica inteira). Os
+        centróides partem de um K-Means sobre a amostra da seleção de k e as
+        épocas percorrem os blocos em ordem embaralhada, em pelo menos
+        min_batches_per_epoch passos, até os centróides pararem de se mover
+        (tol) ou atingir max_epochs.
+        """
+        config = CLUSTERING_CONFIG["minibatch"]
+        n_rows, n_features = cluster_data.shape
+        max_k = n_clusters if n_clusters is not None else CLUSTERING_CONFIG["k_range"][1]
+        chunk_rows = streaming_chunk_rows(n_features, max_k)
+        n_chunks = max(1, -(-n_rows // chunk_rows))
+        report = progress or (lambda fraction, message: None)
+
+        # Blocos do treino em ordem embaralhada; rótulos e projeção seguem a ordem original
+        order = np.random.default_rng(seed).permutation(n_rows)
+        train_chunks = np.array_split(order, n_chunks)
+        output_chunks = np.array_split(np.arange(n_rows), n_chunks)
+
+        sums = np.zeros(n_features)
+        counts = np.zeros(n_features)
+        for chunk in output_chunks:
+            block = cluster_data[chunk]
+            sums += np.nansum(block, axis=0)
+            counts += (~np.isnan(block)).sum(axis=0)
+        means = np.where(counts > 0, sums / np.maximum(counts, 1), 0).astype(np.float32)
+        self.fill_values = means
+
+        def block(chunk: np.ndarray) -> np.ndarray:
+            values = cluster_data[chunk]
+            return np.where(np.isnan(values), means, values)
+
+        self.scaler = StandardScaler()
+        for chunk in output_chunks:
+            self.scaler.partial_fit(block(chunk))
+
+        # k automático: seleção sobre uma amostra das linhas
+        sample = self.scaler.transform(block(np.sort(order[:config["selection_sample"]])))
+        if n_clusters is None:
+            n_clusters, seed, self.selection = select_n_clusters(sample)
+        self.n_clusters = int(n_clusters)
+
+        # Centróides iniciais: K-Means na amostra (a base inteira quando cabe nela)
+        initial = KMeans(n_clusters=self.n_clusters, random_state=seed, n_init=1).fit(sample)
+        del sample
+
+        # Poucas linhas: passos menores para que cada época tenha vários partial_fit
+        batch_size = min(
+            config["batch_size"],
+            max(self.n_clusters, -(-n_rows // config["min_batches_per_epoch"]))
+        )
+        self.model = MiniBatchKMeans(
+            n_clusters=self.n_clusters, random_state=seed, batch_size=batch_size,
+            init=initial.cluster_centers_, n_init=1
+        )
+        previous = None
+        for epoch in range(1, config["max_epochs"] + 1):
+            for chunk in train_chunks:
+                scaled = self.scaler.transform(block(chunk))
+                for start in range(0, len(scaled), batch_size):
+                    self.model.partial_fit(scaled[start:start + batch_size])
+
+            centers = self.model.cluster_centers_.copy()
+            shift = float(np.abs(centers - previous).max()) if previous is not None else np.inf
+            previous = centers
+            self.history.append({"epoca": epoch, "deslocamento": shift})
+            report(epoch / config["max_epochs"], f"Época {epoch}: deslocamento dos centróides {shift:.4f}")
+            if shift < config["tol"]:
+                break
+
+        self.converged = bool(self.history) and self.history[-1]["deslocamento"] < config["tol"]
+        report(1.0, f"{'Convergiu' if self.converged else 'Parou'} após {len(self.history)} épocas")
+
+        # Rótulos e projeção 2-D, bloco a bloco
+        self.pca = IncrementalPCA(n_components=2)
+        labels = []
+        for chunk in output_chunks:
+            scaled = self.scaler.transform(block(chunk))
+            labels.append(self.model.predict(scaled))
+            self.pca.partial_fit(scaled)
+        self.labels = np.concatenate(labels)
+        self.projection = np.concatenate([
+            self.pca.transform(self.scaler.transform(block(chunk))) for chunk in output_chunks
+        ])
+
+        logger.info(
+            f"Mini-Batch K-Means: {n_rows} linhas em {n_chunks} blocos de até {chunk_rows}, "
+            f"passos de {batch_size} linhas, {len(self.history)} épocas (convergiu: {self.converged})"
+        )
+
+
+class ClusteringStore:
+    """Resultados de clustering por (hash dos dados, features, k, algoritmo), compartilhados entre sessões"""
+
+    def __init__(self, max_entries: int = CLUSTERING_CONFIG["max_entries"]):
+        self._cache = MemoCache(max_entries=max_entries)
+
+    @staticmethod
+    def key(df: pd.DataFrame, features: Sequence[str], n_clusters: Optional[int],
+            algorithm: str) -> Tuple:
+        """Chave de um resultado; o hash cobre apenas as chaves da unidade e as features usadas"""
+        columns = [col for col in ["Loja", "semana"] if col in df.columns] + list(features)
+        return ("clustering", frame_digest(df[columns]), tuple(features),
+                n_clusters if n_clusters is not None else "auto", algorithm)
+
+    def get(self, key: Tuple) -> Optional[ClusteringResult]:
+        """Resultado já ajustado para uma chave (None se ausente)"""
+        found, result = self._cache.get(key)
+        return result if found else None
+
+    def get_or_fit(self, df: pd.DataFrame, features: Sequence[str], n_clusters: Optional[int] = None,
+                   algorithm: str = "kmeans",
+                   progress: Optional[ProgressCallback] = None) -> Tuple[Tuple, ClusteringResult]:
+        """
+        Retorna o resultado guardado ou ajusta um novo
+
+        Args:
+            df: Uma linha por loja, com a coluna Loja e as features
+            features: Colunas usadas no clustering
+            n_clusters: Número de clusters (None determina automaticamente)
+            algorithm: Chave de ALGORITHMS
+            progress: Callback de progresso, chamado apenas se houver ajuste
+
+        Returns:
+            Tuple[Tuple, ClusteringResult]: Chave e resultado
+        """
+        key = self.key(df, features, n_clusters, algorithm)
+        result = self.get(key)
+        if result is None:
+            result = ClusteringResult(df, list(features), n_clusters, algorithm, progress)
+            self._cache.put(key, result)
+        return key, result
+
+    def stats(self) -> Dict:
+        """Contadores do cache de resultados"""
+        return self._cache.stats()
+
+    def clear(self) -> None:
+        """Remove todos os resultados"""
+        self._cache.clear()
+
+
+def squared_distances(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """
+    Distâncias euclidianas ao quadrado de cada ponto a cada centróide
+
+    Uma única operação matricial: |x|² - 2·x·c + |c|².
+
+    Args:
+        points: Matriz (n x features)
+        centers: Matriz (k x features)
+
+    Returns:
+        np.ndarray: Matriz (n x k) em float64
+    """
+    points = np.asarray(points, dtype=np.float64)
+    centers = np.asarray(centers, dtype=np.float64)
+    distances = (
+        np.einsum("ij,ij->i", points, points)[:, None]
+        - 2.0 * points @ centers.T
+        + np.einsum("ij,ij->i", centers, centers)[None, :]
+    )
+    return np.maximum(distances, 0.0)
+
+
+class ClusterAssignment:
+    """
+    Lojas (ou lojas-semana) atribuídas a um ClusterModel, sem reajuste
+
+    Expõe os mesmos atributos de leitura de ClusteringResult usados pela
+    página de clusters (frame, centroids, features, projection, ...), além
+    das distâncias e do diagnóstico de drift.
+    """
+
+    def __init__(self, model: "ClusterModel", df: pd.DataFrame,
+                 fitted: Optional[ClusteringResult] = None):
+        """
+        Args:
+            model: Modelo persistido
+            df: Uma linha por unidade, com as features do modelo
+            fitted: Ajuste que originou o modelo (repassa seleção de k e convergência)
+        """
+        self.model = model
+        self.from_fit = fitted is not None
+        self.features = list(model.features)
+        self.algorithm = model.algorithm
+        self.n_clusters = len(model.label_ids)
+        self.selection: Optional[pd.DataFrame] = fitted.selection if fitted is not None else None
+        self.history: List[Dict] = fitted.history if fitted is not None else []
+        self.converged: Optional[bool] = fitted.converged if fitted is not None else None
+
+        scaled = model.transform(df)
+        distances = squared_distances(scaled, model.centers)
+        nearest = distances.argmin(axis=1)
+        self.distances = np.sqrt(distances[np.arange(len(scaled)), nearest])
+        self.labels = model.label_ids[nearest]
+
+        self.frame = df.copy()
+        self.frame["Cluster"] = self.labels
+        self.frame["Cluster_Label"] = [f"Cluster {i+1}" for i in self.labels]
+        self.frame["Distancia_Centroide"] = self.distances
+
+        self.centroids = model.centroid_frame()
+        self.projection = (scaled - model.pca_mean) @ model.pca_components.T
+        self.explained_variance = model.explained_variance
+        self.drift = model.drift(scaled, distances[np.arange(len(scaled)), nearest])
+
+        for array in (self.labels, self.distances, self.projection):
+            array.flags.writeable = False
+
+
+class ClusterModel:
+    """
+    Modelo de clusters persistido: scaler, centróides e rótulos estáveis
+
+    Guarda apenas parâmetros (médias de preenchimento, média e escala do
+    scaler, centróides normalizados, base da PCA 2-D e o id estável de cada
+    centróide), o suficiente para atribuir novas lojas ao centróide mais
+    próximo sem reajustar. Ao salvar um novo ajuste, os centróides são
+    pareados aos do modelo anterior (algoritmo húngaro) e herdam seus ids,
+    mantendo os rótulos entre cargas semanais.
+    """
+
+    VERSION = 1
+
+    def __init__(self, features: List[str], level: str, algorithm: str, fill_values: np.ndarray,
+                 mean: np.ndarray, scale: np.ndarray, centers: np.ndarray, label_ids: np.ndarray,
+                 pca_mean: np.ndarray, pca_components: np.ndarray, explained_variance: np.ndarray,
+                 reference_distance: float, fitted_at: Optional[str] = None,
+                 dataset_key: Optional[str] = None):
+        self.features = list(features)
+        self.level = level
+        self.algorithm = algorithm
+        self.fill_values = np.asarray(fill_values, dtype=np.float32)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.centers = np.asarray(centers, dtype=np.float64)
+        self.label_ids = np.asarray(label_ids, dtype=np.int64)
+        self.pca_mean = np.asarray(pca_mean, dtype=np.float64)
+        self.pca_components = np.asarray(pca_components, dtype=np.float64)
+        self.explained_variance = np.asarray(explained_variance, dtype=np.float64)
+        self.reference_distance = float(reference_distance)
+        self.fitted_at = fitted_at or datetime.now().isoformat(timespec="seconds")
+        self.dataset_key = dataset_key
+
+    @classmethod
+    def from_result(cls, result: ClusteringResult, level: str = "loja",
+                    previous: Optional["ClusterModel"] = None,
+                    dataset_key: Optional[str] = None) -> "ClusterModel":
+        """
+        Cria o modelo de um ajuste, herdando os rótulos do modelo anterior
+
+        Args:
+            result: Clustering ajustado
+            level: Unidade de análise das features (ver src.features)
+            previous: Modelo anterior com as mesmas features e unidade (opcional)
+            dataset_key: Chave do dataset do ajuste (informativa)
+
+        Returns:
+            ClusterModel: Modelo pronto para atribuir e salvar
+        """
+        n_clusters = len(result.model.cluster_centers_)
+        model = cls(
+            features=result.features, level=level, algorithm=result.algorithm,
+            fill_values=result.fill_values,
+            mean=result.scaler.mean_, scale=result.scaler.scale_,
+            centers=result.model.cluster_centers_, label_ids=np.arange(n_clusters),
+            pca_mean=result.pca.mean_, pca_components=result.pca.components_,
+            explained_variance=result.explained_variance,
+            reference_distance=0.0, dataset_key=dataset_key
+        )
+
+        if previous is not None and previous.compatible(model.features, level):
+            model.label_ids = model._match_labels(previous)
+
+        # Distância de referência do drift: média da distância² ao centróide no próprio ajuste
+        scaled = model.transform(result.frame)
+        distances = squared_distances(scaled, model.centers)
+        model.reference_distance = float(distances[np.arange(len(scaled)), result.labels].mean())
+        return model
+
+    def _match_labels(self, previous: "ClusterModel") -> np.ndarray:
+        """
+        Ids estáveis por pareamento de custo mínimo com os centróides anteriores
+
+        Os centróides anteriores voltam à escala original e são normalizados
+        com o scaler novo; centróides novos sem par recebem ids inéditos.
+        """
+        previous_centers = previous.centers * previous.scale + previous.mean
+        previous_centers = (previous_centers - self.mean) / self.scale
+        rows, cols = linear_sum_assignment(squared_distances(self.centers, previous_centers))
+
+        label_ids = np.full(len(self.centers), -1, dtype=np.int64)
+        label_ids[rows] = previous.label_ids[cols]
+        next_id = int(previous.label_ids.max()) + 1 if len(previous.label_ids) else 0
+        for position in np.flatnonzero(label_ids < 0):
+            label_ids[position] = next_id
+            next_id += 1
+        return label_ids
+
+    def compatible(self, features: Sequence[str], level: str) -> bool:
+        """Mesmas features (na mesma ordem) e mesma unidade de análise"""
+        return list(features) == self.features and level == self.level
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray:
+        """Features de um DataFrame preenchidas e normalizadas com os parâmetros do ajuste"""
+        values = feature_matrix(df, self.features)
+        values = np.where(np.isnan(values), self.fill_values, values)
+        return (values - self.mean) / self.scale
+
+    def assign(self, df: pd.DataFrame, fitted: Optional[ClusteringResult] = None) -> ClusterAssignment:
+        """
+        Atribui cada linha ao centróide mais próximo (sem reajuste)
+
+        Args:
+            df: Uma linha por unidade, com as features do modelo
+            fitted: Ajuste que originou o modelo, quando df são os dados do próprio ajuste
+
+        Returns:
+            ClusterAssignment: Rótulos estáveis, distâncias e drift
+        """
+        missing = [col for col in self.features if col not in df.columns]
+        if missing:
+            raise ValueError(f"Features ausentes: {', '.join(missing)}")
+        return ClusterAssignment(self, df, fitted)
+
+    def drift(self, scaled: np.ndarray, nearest_distances: np.ndarray) -> Dict[str, Any]:
+        """
+        Mede o quanto os dados novos se afastaram do ajuste
+
+        Args:
+            scaled: Features normalizadas com os parâmetros do modelo
+            nearest_distances: Distância² de cada linha ao centróide atribuído
+
+        Returns:
+            Dict: razao_distancia (distância² média / referência), deslocamento_medio
+            (maior |média| de feature normalizada; 0 no ajuste) e refit_recomendado
+        """
+        limits = CLUSTERING_CONFIG["drift"]
+        if len(scaled) == 0:
+            return {"razao_distancia": np.nan, "deslocamento_medio": np.nan, "refit_recomendado": False}
+
+        ratio = float(nearest_distances.mean() / self.reference_distance) if self.reference_distance > 0 else np.nan
+        shifts = np.abs(scaled.mean(axis=0))
+        shift = float(shifts.max())
+        return {
+            "razao_distancia": ratio,
+            "deslocamento_medio": shift,
+            "feature_deslocada": self.features[int(shifts.argmax())],
+            "refit_recomendado": bool(
+                (not np.isnan(ratio) and ratio > limits["distance_ratio"]) or shift > limits["mean_shift"]
+            )
+        }
+
+    def centroid_frame(self) -> pd.DataFrame:
+        """Centróides na escala original, com os ids estáveis"""
+        centroids = pd.DataFrame(self.centers * self.scale + self.mean, columns=self.features)
+        centroids["Cluster"] = self.label_ids
+        centroids["Cluster_Label"] = [f"Cluster {i+1}" for i in self.label_ids]
+        return centroids.sort_values("Cluster", ignore_index=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Parâmetros serializáveis em JSON"""
+        return {
+            "version": self.VERSION,
+            "features": self.features,
+            "level": self.level,
+            "algorithm": self.algorithm,
+            "fill_values": self.fill_values.tolist(),
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "centers": self.centers.tolist(),
+            "label_ids": self.label_ids.tolist(),
+            "pca_mean": self.pca_mean.tolist(),
+            "pca_components": self.pca_components.tolist(),
+            "explained_variance": self.explained_variance.tolist(),
+            "reference_distance": self.reference_distance,
+            "fitted_at": self.fitted_at,
+            "dataset_key": self.dataset_key
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "ClusterModel":
+        """Reconstrói um modelo gravado com to_dict"""
+        payload = dict(payload)
+        if payload.pop("version", None) != cls.VERSION:
+            raise ValueError("Versão de modelo de clusters incompatível")
+        return cls(**payload)
+
+    @staticmethod
+    def path(features: Sequence[str], level: str, models_dir: Optional[Path] = None) -> Path:
+        """Arquivo do modelo de um conjunto de features e unidade"""
+        models_dir = Path(models_dir) if models_dir is not None else CLUSTERING_CONFIG["models_dir"]
+        return models_dir / f"{level}__{'-'.join(features)}.json"
+
+    def save(self, models_dir: Optional[Path] = None) -> bool:
+        """
+        Grava o modelo (substitui o anterior das mesmas features e unidade)
+
+        Args:
+            models_dir: Diretório dos modelos (padrão: CLUSTERING_CONFIG["models_dir"])
+
+        Returns:
+            bool: True se o modelo foi gravado
+        """
+        path = self.path(self.features, self.level, models_dir)
+        tmp_path = path.with_name(f".tmp-{uuid.uuid4().hex}.json")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f)
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o modelo de clusters {path.name}: {str(e)}")
+            tmp_path.unlink(missing_ok=True)
+            return False
+
+        logger.info(f"Modelo de clusters gravado: {path.name} ({len(self.label_ids)} clusters)")
+        return True
+
+    @classmethod
+    def load(cls, features: Sequence[str], level: str,
+             models_dir: Optional[Path] = None) -> Optional["ClusterModel"]:
+        """
+        Carrega o modelo gravado para um conjunto de features e unidade
+
+        Returns:
+            Optional[ClusterModel]: Modelo ou None se ausente/inválido
+        """
+        path = cls.path(features, level, models_dir)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Modelo de clusters inválido {path.name}: {str(e)}")
+            return None
+
+
+@st.cache_resource
+def get_clustering_store() -> ClusteringStore:
+    """Store de resultados de clustering único do processo"""
+    return ClusteringStore()
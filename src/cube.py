@@ -0,0 +1,225 @@
+"""
+Cubo de agregados aditivos das Lacunas do Projeto Pulso
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+import logging
+
+from config import CUBE_CONFIG
+from .indexes import get_index_cache
+
+logger = logging.getLogger(__name__)
+
+
+class LacunaCube:
+    """
+    Agregados aditivos (soma, contagem, soma dos quadrados) por combinação de dimensões
+
+    O cuboide base agrupa as linhas pela combinação de todas as dimensões; os
+    demais são derivados somando células de um cuboide mais fino já
+    materializado, sem voltar às linhas. Médias e desvios são obtidos das
+    somas no momento da consulta.
+    """
+
+    def __init__(self, df: pd.DataFrame, dimensions: Optional[List[str]] = None,
+                 measures: Optional[List[str]] = None,
+                 materialized: Optional[List[List[str]]] = None):
+        """
+        Args:
+            df: Aba cluster (uma linha por loja-período)
+            dimensions: Dimensões do cubo (padrão: CUBE_CONFIG)
+            measures: Colunas medidas; texto tem apenas contagem (padrão: CUBE_CONFIG)
+            materialized: Combinações de dimensões pré-calculadas (padrão: CUBE_CONFIG)
+        """
+        dimensions = dimensions if dimensions is not None else CUBE_CONFIG["dimensions"]
+        measures = measures if measures is not None else CUBE_CONFIG["measures"]
+        materialized = materialized if materialized is not None else CUBE_CONFIG["materialized"]
+
+        self.dimensions = [dim for dim in dimensions if dim in df.columns]
+        self.measures = [col for col in measures if col in df.columns]
+        self.numeric = [col for col in self.measures if pd.api.types.is_numeric_dtype(df[col].dtype)]
+        self._cuboids: Dict[FrozenSet[str], pd.DataFrame] = {}
+
+        self._cuboids[frozenset(self.dimensions)] = self._base_cuboid(df)
+
+        # Do mais fino para o mais grosso: cada um deriva do menor superconjunto já materializado
+        for dims in sorted(materialized, key=len, reverse=True):
+            dims = [dim for dim in dims if dim in self.dimensions]
+            key = frozenset(dims)
+            if key not in self._cuboids:
+                self._cuboids[key] = self._rollup(self._closest(key), dims)
+
+        logger.info(
+            f"Cubo construído: {len(df)} linhas, {len(self._cuboids[frozenset(self.dimensions)])} células base, "
+            f"{len(self._cuboids)} cuboides"
+        )
+
+    def _base_cuboid(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Cuboide de todas as dimensões, calculado a partir das linhas"""
+        columns: Dict[str, Any] = {dim: df[dim] for dim in self.dimensions}
+        for col in self.measures:
+            valid = df[col].notna()
+            columns[f"count_{col}"] = valid.astype(np.int64)
+            if col in self.numeric:
+                values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                values = np.where(valid.to_numpy(), values, 0.0)
+                columns[f"sum_{col}"] = values
+                columns[f"sumsq_{col}"] = values * values
+
+        rows = pd.DataFrame(columns, index=df.index)
+        if not self.dimensions:
+            return rows.sum().to_frame().T
+        return rows.groupby(self.dimensions, observed=True, dropna=False, sort=True).sum().reset_index()
+
+    def _closest(self, dims: FrozenSet[str]) -> pd.DataFrame:
+        """Menor cuboide materializado que contém todas as dimensões pedidas"""
+        candidates = [cells for key, cells in self._cuboids.items() if dims <= key]
+        return min(candidates, key=len)
+
+    def _rollup(self, cells: pd.DataFrame, dims: List[str]) -> pd.DataFrame:
+        """Soma as células de um cuboide mais fino nas dimensões pedidas"""
+        aggregates = [col for col in cells.columns if col not in self.dimensions]
+        if not dims:
+            return cells[aggregates].sum().to_frame().T
+        return cells.groupby(dims, observed=True, dropna=False, sort=True)[aggregates].sum().reset_index()
+
+    def cuboid(self, by: Iterable[str], filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """
+        Células agregadas nas dimensões pedidas, com filtros sobre dimensões
+
+        Args:
+            by: Dimensões do resultado (vazio = total)
+            filters: {dimensão: valor ou lista de valores}
+
+        Returns:
+            pd.DataFrame: Dimensões e colunas count_/sum_/sumsq_ por medida
+        """
+        by = list(by)
+        filters = filters or {}
+        unknown = [dim for dim in by + list(filters) if dim not in self.dimensions]
+        if unknown:
+            raise KeyError(f"Dimensões fora do cubo: {', '.join(unknown)}")
+
+        cells = self._closest(frozenset(by) | frozenset(filters))
+        for dim, value in filters.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            cells = cells[cells[dim].isin(values)]
+
+        # Cuboide já na granularidade pedida: basta reordenar as colunas
+        if set(by) == set(cells.columns) & set(self.dimensions):
+            aggregates = [col for col in cells.columns if col not in self.dimensions]
+            return cells[by + aggregates].reset_index(drop=True)
+        return self._rollup(cells, by)
+
+    def aggregate(self, by: Iterable[str] = (), filters: Optional[Dict[str, Any]] = None,
+                  measures: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Soma, contagem, média e desvio padrão por combinação de dimensões
+
+        Args:
+            by: Dimensões do resultado (vazio = total geral)
+            filters: {dimensão: valor ou lista de valores}
+            measures: Medidas desejadas (None = todas)
+
+        Returns:
+            pd.DataFrame: Colunas "<agg>_<medida>" (sum, count, mean, std) por célula
+        """
+        by = list(by)
+        cells = self.cuboid(by, filters)
+        result: Dict[str, Any] = {dim: cells[dim] for dim in by}
+
+        for col in measures or self.measures:
+            stats = self.statistics(cells, col)
+            for agg, values in stats.items():
+                result[f"{agg}_{col}"] = values
+
+        return pd.DataFrame(result)
+
+    def statistics(self, cells: pd.DataFrame, column: str) -> Dict[str, np.ndarray]:
+        """
+        Estatísticas de uma medida a partir das somas das células
+
+        Args:
+            cells: Células de um cuboide (resultado de cuboid)
+            column: Medida
+
+        Returns:
+            Dict[str, np.ndarray]: count e, para medidas numéricas, sum, mean e std amostral
+        """
+        counts = cells[f"count_{column}"].to_numpy(dtype=np.int64)
+        stats: Dict[str, np.ndarray] = {"count": counts}
+        if column not in self.numeric:
+            return stats
+
+        sums = cells[f"sum_{column}"].to_numpy(dtype=np.float64)
+        squares = cells[f"sumsq_{column}"].to_numpy(dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / counts
+            variances = np.maximum(squares - sums * means, 0.0) / (counts - 1)
+            stds = np.where(counts > 1, np.sqrt(variances), np.nan)
+
+        stats.update({"sum": sums, "mean": means, "std": stds})
+        return stats
+
+    def group_frame(self, group_spec: Dict) -> pd.DataFrame:
+        """
+        Agregação por grupo conforme as entradas "groups" do METRICS_SPEC
+
+        Args:
+            group_spec: Especificação com "by", "aggregations", "rename" e "potential"
+
+        Returns:
+            pd.DataFrame: Uma linha por valor do grupo
+        """
+        by = group_spec["by"]
+        if by not in self.dimensions:
+            logger.warning(f"Coluna {by} não encontrada nos dados")
+            return pd.DataFrame()
+
+        cells = self.cuboid([by])
+        cells = cells[cells[by].notna()].reset_index(drop=True)
+        rename = group_spec.get("rename", {})
+
+        result = {by: cells[by]}
+        for column, aggregations in group_spec["aggregations"].items():
+            stats = self.statistics(cells, column)
+            for agg in aggregations:
+                name = f"{agg}_{column}"
+                values = stats[agg]
+                result[rename.get(name, name)] = values if agg == "count" else np.round(values, 2)
+
+        frame = pd.DataFrame(result)
+
+        if "potential" in group_spec:
+            source, target = group_spec["potential"]
+            potential = frame[source] * -1  # Inverter negativos
+            frame[target] = potential.where(potential > 0, 0)
+
+        return frame
+
+
+def get_lacuna_cube(data: Dict[str, pd.DataFrame], dataset_key: Optional[str] = None) -> LacunaCube:
+    """
+    Retorna o cubo da aba cluster de um dataset, construindo-o uma única vez
+
+    Args:
+        data: Dicionário com DataFrames
+        dataset_key: Chave do dataset (None constrói um cubo sem compartilhar)
+
+    Returns:
+        LacunaCube: Cubo de agregados
+    """
+    df_cluster = data.get("pulso_consulta_diaria_cluster_a", pd.DataFrame())
+
+    if dataset_key is None:
+        return LacunaCube(df_cluster)
+
+    cache = get_index_cache()
+    key = ("lacuna_cube", dataset_key)
+    found, cube = cache.get(key)
+    if not found:
+        cube = LacunaCube(df_cluster)
+        cache.put(key, cube)
+    return cube
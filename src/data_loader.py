@@ -2,74 +2,338 @@
 Módulo para carregamento e processamento de dados Excel
 """
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 from pathlib import Path
-import openpyxl
 from typing import Dict, List, Optional, Tuple
+import hashlib
+import io
+import json
 import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from config import REQUIRED_COLUMNS, EXCEL_CONFIG, MESSAGES, BASE_EXCEL_PATH
+from config import (
+    REQUIRED_COLUMNS, EXCEL_CONFIG, MESSAGES, BASE_EXCEL_PATH,
+    SHEET_SCHEMAS, LOADER_CONFIG, DTYPE_CONFIG
+)
+from .cache import WorkbookCache, compute_content_hash
+from .medians import WeeklyMedianEngine
+from .xlsx_stream import open_workbook, read_worksheet
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Versão do pré-processamento (tipos, normalizações, ingestão tipada): entra na
+# chave do cache colunar; incrementar ao mudar o formato dos dados processados
+PREPROCESS_VERSION = 2
+
+
+def _column_selector(columns: Optional[List[str]]):
+    """Seletor de colunas para pd.read_excel (None lê todas)"""
+    if columns is None:
+        return None
+    
+    wanted = set(columns)
+    return lambda col: str(col).strip() in wanted
+
+
+def _frame_to_arrow(df: pd.DataFrame) -> bytes:
+    """
+    Serializa um DataFrame em Arrow IPC (formato compacto entre processos)
+    
+    Colunas object com tipos mistos não têm tipo Arrow equivalente e são
+    convertidas para texto, preservando os nulos.
+    """
+    import pyarrow as pa
+    
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        for col in df.select_dtypes(include=['object']).columns:
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _frame_from_arrow(payload: bytes) -> pd.DataFrame:
+    """Reconstrói um DataFrame serializado em Arrow IPC"""
+    import pyarrow as pa
+    
+    return pa.ipc.open_stream(payload).read_all().to_pandas()
+
+
+def _read_sheet_streaming(workbook, sheet_name: str, columns: Optional[List[str]]) -> pd.DataFrame:
+    """Lê uma aba de um workbook read_only com os tipos declarados no SHEET_SCHEMAS"""
+    return read_worksheet(
+        workbook[sheet_name],
+        columns=columns,
+        dtypes=SHEET_SCHEMAS.get(sheet_name, {}).get("dtypes"),
+        header=1  # Skip description row
+    )
+
+
+def _parse_sheet_to_arrow(source, sheet_name: str, columns: Optional[List[str]],
+                          reader: str = "pandas") -> Tuple[bytes, float]:
+    """
+    Lê uma aba em um processo do pool e devolve o resultado em Arrow IPC
+    
+    Args:
+        source: Caminho do arquivo (str) ou conteúdo do workbook (bytes)
+        sheet_name: Nome da aba/sheet
+        columns: Colunas a ler (None lê todas)
+        reader: Leitor da aba ("streaming" ou "pandas")
+        
+    Returns:
+        Tuple[bytes, float]: (DataFrame em Arrow IPC, tempo de leitura em segundos)
+    """
+    start = time.perf_counter()
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    
+    if reader == "streaming":
+        workbook = open_workbook(source)
+        try:
+            df = _read_sheet_streaming(workbook, sheet_name, columns)
+        finally:
+            workbook.close()
+    else:
+        df = pd.read_excel(
+            source,
+            sheet_name=sheet_name,
+            header=1,  # Skip description row
+            usecols=_column_selector(columns),
+            engine='openpyxl'
+        )
+    return _frame_to_arrow(df), time.perf_counter() - start
+
 
 class DataLoader:
     """Classe para carregamento e validação de dados do Excel"""
     
-    def __init__(self):
+    LOAD_MODES = ("projected", "full")
+    READERS = ("streaming", "pandas")
+    
+    def __init__(self, use_cache: bool = True, load_mode: Optional[str] = None,
+                 parallel: Optional[bool] = None, reader: Optional[str] = None):
         self.data: Dict[str, pd.DataFrame] = {}
         self.metadata: Dict = {}
+        self.memory_usage: Dict[str, Dict[str, int]] = {}
+        self.day_fingerprints: Dict[str, Dict[str, str]] = {}
+        self.file_hashes: List[str] = []
+        self.median_engine = WeeklyMedianEngine()
+        self.weekly_medians = pd.DataFrame()
+        self.cache: Optional[WorkbookCache] = WorkbookCache() if use_cache else None
+        
+        self.load_mode = load_mode or LOADER_CONFIG["load_mode"]
+        if self.load_mode not in self.LOAD_MODES:
+            raise ValueError(f"Modo de carregamento inválido: {self.load_mode}. Use: {', '.join(self.LOAD_MODES)}")
+        
+        # Leitura paralela (uma aba/arquivo por processo) é opcional
+        self.parallel = LOADER_CONFIG["parallel"] if parallel is None else parallel
+        
+        self.reader = reader or LOADER_CONFIG["reader"]
+        if self.reader not in self.READERS:
+            raise ValueError(f"Leitor inválido: {self.reader}. Use: {', '.join(self.READERS)}")
     
-    def _validate_path_file(self, file_path: Path) -> Tuple[bool, str]:
+    def _projected_columns(self, sheet_name: str) -> Optional[List[str]]:
         """
-        Valida um arquivo Excel local usando Path
+        Lista as colunas declaradas no SHEET_SCHEMAS para uma aba
         
         Args:
-            file_path: Path para o arquivo Excel
+            sheet_name: Nome da aba/sheet
             
         Returns:
-            Tuple[bool, str]: (é_válido, mensagem)
+            Optional[List[str]]: Colunas a ler ou None para ler todas
         """
-        try:
-            # Verificar se arquivo existe
-            if not file_path.exists():
-                return False, f"Arquivo não encontrado: {file_path}"
-            
-            # Verificar tamanho
-            file_size_mb = file_path.stat().st_size / (1024 * 1024)
-            if file_size_mb > EXCEL_CONFIG["max_file_size"]:
-                return False, f"Arquivo muito grande. Máximo: {EXCEL_CONFIG['max_file_size']}MB"
+        if self.load_mode == "full" or sheet_name not in SHEET_SCHEMAS:
+            return None
+        
+        schema = SHEET_SCHEMAS[sheet_name]
+        needed = {col for page_cols in schema["pages"].values() for col in page_cols}
+        
+        # Ordem do registro de tipos, seguida de colunas sem tipo declarado
+        columns = [col for col in schema["dtypes"] if col in needed]
+        columns += sorted(needed - set(columns))
+        return columns
+    
+    def _usecols(self, sheet_name: str):
+        """Seletor de colunas para a leitura de uma aba (None lê todas)"""
+        return _column_selector(self._projected_columns(sheet_name))
+    
+    def _cache_key(self, content_hash: str) -> str:
+        """
+        Chave do cache colunar: conteúdo do workbook + modo de leitura
+        
+        A chave inclui uma impressão digital do pré-processamento
+        (PREPROCESS_VERSION e DTYPE_CONFIG) e, no modo projetado, do
+        SHEET_SCHEMAS, para que mudanças no código ou no schema invalidem as
+        entradas antigas.
+        """
+        settings = {"version": PREPROCESS_VERSION, "dtypes": DTYPE_CONFIG}
+        if self.load_mode != "full":
+            settings["schema"] = SHEET_SCHEMAS
+        
+        settings_json = json.dumps(settings, sort_keys=True)
+        digest = hashlib.blake2b(settings_json.encode("utf-8"), digest_size=6).hexdigest()
+        if self.load_mode == "full":
+            return f"{content_hash}-full-{digest}"
+        return f"{content_hash}-{digest}"
+    
+    def dataset_key_for(self, source) -> str:
+        """
+        Calcula a chave do dataset que seria gerado a partir de um arquivo
+        
+        Args:
+            source: Path local ou arquivo enviado via streamlit file_uploader
             
-            # Verificar extensão
-            file_extension = file_path.suffix.lower()
-            if file_extension not in [f".{ext}" for ext in EXCEL_CONFIG["file_types"]]:
-                return False, f"Tipo de arquivo inválido. Use: {', '.join(EXCEL_CONFIG['file_types'])}"
+        Returns:
+            str: Chave do dataset (hash do conteúdo + modo de leitura)
+        """
+        return self.dataset_key_from_hash(compute_content_hash(source))
+    
+    def dataset_key_from_hash(self, content_hash: str) -> str:
+        """
+        Chave do dataset correspondente a um hash de conteúdo já calculado
+        
+        Args:
+            content_hash: Hash BLAKE2 do conteúdo do workbook
             
-            # Verificar se é um arquivo Excel válido
-            try:
-                workbook = openpyxl.load_workbook(file_path, read_only=True)
-                sheet_names = workbook.sheetnames
-                workbook.close()
-            except Exception as e:
-                return False, f"Arquivo Excel corrompido: {str(e)}"
+        Returns:
+            str: Chave do dataset (hash do conteúdo + modo de leitura)
+        """
+        return self._cache_key(content_hash)
+    
+    def _load_from_cache(self, content_hash: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Busca no cache colunar os dados já processados de um workbook
+        
+        Args:
+            content_hash: Hash do conteúdo do workbook
             
-            # Verificar abas obrigatórias
-            missing_sheets = []
-            for required_sheet in EXCEL_CONFIG["required_sheets"]:
-                if required_sheet not in sheet_names:
-                    missing_sheets.append(required_sheet)
+        Returns:
+            Optional[Dict[str, pd.DataFrame]]: Dados em cache ou None
+        """
+        if self.cache is None:
+            return None
+        
+        key = self._cache_key(content_hash)
+        data = self.cache.get(key)
+        if data is not None:
+            info = self.cache.get_info(key)
+            self.memory_usage = info.get("memory_usage", {})
+            self.day_fingerprints = info.get("day_fingerprints", {})
+            self.weekly_medians = WeeklyMedianEngine.from_records(info.get("weekly_medians", []))
+            if self.weekly_medians.empty:
+                self._compute_weekly_medians(data)
+        return data
+    
+    def _save_to_cache(self, content_hash: str, data: Dict[str, pd.DataFrame]) -> None:
+        """Grava no cache colunar os dados processados de um workbook"""
+        if self.cache is not None:
+            self.cache.put(self._cache_key(content_hash), data, info={
+                "memory_usage": self.memory_usage,
+                "day_fingerprints": self.day_fingerprints,
+                "weekly_medians": WeeklyMedianEngine.to_records(self.weekly_medians) if not self.weekly_medians.empty else []
+            })
+    
+    def _check_file_properties(self, file) -> Tuple[bool, str]:
+        """
+        Verifica existência, tamanho e extensão do arquivo sem abri-lo
+        
+        Args:
+            file: Arquivo enviado via streamlit file_uploader ou Path object
             
-            if missing_sheets:
-                return False, f"Abas não encontradas: {', '.join(missing_sheets)}"
+        Returns:
+            Tuple[bool, str]: (é_válido, mensagem)
+        """
+        if isinstance(file, Path):
+            # Verificar se arquivo existe
+            if not file.exists():
+                return False, f"Arquivo não encontrado: {file}"
+            file_size = file.stat().st_size
+        else:
+            file_size = getattr(file, "size", 0)
+        
+        # Verificar tamanho (o leitor em streaming aceita arquivos maiores)
+        max_file_size = self._max_file_size()
+        if file_size > max_file_size * 1024 * 1024:
+            return False, f"Arquivo muito grande. Máximo: {max_file_size}MB"
+        
+        # Verificar extensão
+        file_name = file.name if hasattr(file, 'name') else str(file)
+        file_extension = Path(file_name).suffix.lower()
+        if file_extension not in [f".{ext}" for ext in EXCEL_CONFIG["file_types"]]:
+            return False, f"Tipo de arquivo inválido. Use: {', '.join(EXCEL_CONFIG['file_types'])}"
+        
+        return True, "Arquivo válido"
+    
+    def _max_file_size(self) -> int:
+        """Tamanho máximo de arquivo (MB) aceito pelo leitor configurado"""
+        if self.reader == "streaming":
+            return EXCEL_CONFIG["max_file_size_streaming"]
+        return EXCEL_CONFIG["max_file_size"]
+    
+    def _check_sheets(self, sheet_names: List[str]) -> Tuple[bool, str]:
+        """
+        Verifica se as abas obrigatórias estão presentes no workbook
+        
+        Args:
+            sheet_names: Abas existentes no workbook
             
-            return True, "Arquivo válido"
+        Returns:
+            Tuple[bool, str]: (é_válido, mensagem)
+        """
+        missing_sheets = [
+            required_sheet for required_sheet in EXCEL_CONFIG["required_sheets"]
+            if required_sheet not in sheet_names
+        ]
+        
+        if missing_sheets:
+            return False, f"Abas não encontradas: {', '.join(missing_sheets)}"
+        
+        return True, "Arquivo válido"
+    
+    def _open_workbook(self, file) -> pd.ExcelFile:
+        """
+        Abre o workbook uma única vez para listar e ler as abas
+        
+        Args:
+            file: Arquivo enviado via streamlit file_uploader ou Path object
             
+        Returns:
+            pd.ExcelFile: Handle do workbook aberto
+        """
+        if hasattr(file, "seek"):
+            file.seek(0)
+        
+        try:
+            return pd.ExcelFile(file, engine="openpyxl")
         except Exception as e:
-            logger.error(f"Erro na validação do arquivo: {str(e)}")
-            return False, f"Erro na validação: {str(e)}"
+            raise ValueError(f"Arquivo Excel corrompido: {str(e)}") from e
+    
+    def _validate_path_file(self, file_path: Path) -> Tuple[bool, str]:
+        """
+        Valida um arquivo Excel local usando Path
+        
+        Args:
+            file_path: Path para o arquivo Excel
+            
+        Returns:
+            Tuple[bool, str]: (é_válido, mensagem)
+        """
+        return self.validate_file(file_path)
     
     def validate_file(self, file) -> Tuple[bool, str]:
         """
@@ -82,94 +346,243 @@ class DataLoader:
             Tuple[bool, str]: (é_válido, mensagem)
         """
         try:
-            # Verificar se é um Path ou arquivo do Streamlit
-            if isinstance(file, Path):
-                return self._validate_path_file(file)
-            
-            # Validação para arquivo do Streamlit
-            if hasattr(file, 'size') and file.size > EXCEL_CONFIG["max_file_size"] * 1024 * 1024:
-                return False, f"Arquivo muito grande. Máximo: {EXCEL_CONFIG['max_file_size']}MB"
-            
-            # Verificar extensão
-            file_name = file.name if hasattr(file, 'name') else str(file)
-            file_extension = Path(file_name).suffix.lower()
-            if file_extension not in [f".{ext}" for ext in EXCEL_CONFIG["file_types"]]:
-                return False, f"Tipo de arquivo inválido. Use: {', '.join(EXCEL_CONFIG['file_types'])}"
+            is_valid, message = self._check_file_properties(file)
+            if not is_valid:
+                return is_valid, message
             
             # Verificar se é um arquivo Excel válido
             try:
-                workbook = openpyxl.load_workbook(file, read_only=True)
-                sheet_names = workbook.sheetnames
-                workbook.close()
-            except Exception as e:
-                return False, f"Arquivo Excel corrompido: {str(e)}"
+                with self._open_workbook(file) as excel_file:
+                    sheet_names = excel_file.sheet_names
+            except ValueError as e:
+                return False, str(e)
             
             # Verificar abas obrigatórias
-            missing_sheets = []
-            for required_sheet in EXCEL_CONFIG["required_sheets"]:
-                if required_sheet not in sheet_names:
-                    missing_sheets.append(required_sheet)
-            
-            if missing_sheets:
-                return False, f"Abas não encontradas: {', '.join(missing_sheets)}"
-            
-            return True, "Arquivo válido"
+            return self._check_sheets(sheet_names)
             
         except Exception as e:
             logger.error(f"Erro na validação do arquivo: {str(e)}")
             return False, f"Erro na validação: {str(e)}"
     
-    def load_excel_data(self, file) -> Dict[str, pd.DataFrame]:
+    def _read_workbook(self, file) -> Tuple[Dict[str, pd.DataFrame], Dict[str, float]]:
         """
-        Carrega dados das abas principais do Excel
+        Lê as abas obrigatórias em passagem única: o workbook é aberto uma vez,
+        as abas são verificadas e ambas são lidas do mesmo handle
         
         Args:
-            file: Arquivo Excel enviado
+            file: Arquivo enviado via streamlit file_uploader ou Path object
             
         Returns:
-            Dict[str, pd.DataFrame]: Dicionário com DataFrames das abas
+            Tuple[Dict[str, pd.DataFrame], Dict[str, float]]: (dados brutos, tempos por fase em segundos)
         """
-        try:
-            # Validar arquivo
-            is_valid, message = self.validate_file(file)
-            if not is_valid:
-                st.error(f"❌ {message}")
-                return {}
+        if self.parallel:
+            return self._read_workbooks_parallel([file])[0]
+        
+        if self.reader == "streaming":
+            return self._read_workbook_streaming(file)
+        
+        timings = {}
+        data = {}
+        
+        start = time.perf_counter()
+        with self._open_workbook(file) as excel_file:
+            timings["abertura"] = time.perf_counter() - start
             
-            # Carregar abas principais
-            data = {}
+            is_valid, message = self._check_sheets(excel_file.sheet_names)
+            if not is_valid:
+                raise ValueError(message)
             
-            with st.spinner("🔄 Carregando dados..."):
-                # Aba principal - dados diários
+            for sheet_name in EXCEL_CONFIG["required_sheets"]:
+                start = time.perf_counter()
                 try:
-                    df_diaria = pd.read_excel(
-                        file, 
-                        sheet_name="pulso_consulta_diaria",
+                    df = excel_file.parse(
+                        sheet_name=sheet_name,
                         header=1,  # Skip description row
-                        engine='openpyxl'
+                        usecols=self._usecols(sheet_name)
                     )
-                    data["pulso_consulta_diaria"] = df_diaria
-                    logger.info(f"Carregada aba pulso_consulta_diaria: {df_diaria.shape}")
-                    
                 except Exception as e:
-                    st.error(f"❌ Erro ao carregar aba 'pulso_consulta_diaria': {str(e)}")
-                    return {}
+                    raise ValueError(f"Erro ao carregar aba '{sheet_name}': {str(e)}") from e
                 
-                # Aba com cálculos de lacunas
+                timings[f"leitura_{sheet_name}"] = time.perf_counter() - start
+                data[sheet_name] = df
+                logger.info(f"Carregada aba {sheet_name}: {df.shape}")
+        
+        return data, timings
+    
+    def _read_workbook_streaming(self, file) -> Tuple[Dict[str, pd.DataFrame], Dict[str, float]]:
+        """
+        Lê as abas obrigatórias linha a linha (openpyxl read_only)
+        
+        Apenas as colunas projetadas são convertidas, em buffers NumPy tipados
+        pelo SHEET_SCHEMAS, sem materializar a aba inteira como no pd.read_excel.
+        
+        Args:
+            file: Arquivo enviado via streamlit file_uploader ou Path object
+            
+        Returns:
+            Tuple[Dict[str, pd.DataFrame], Dict[str, float]]: (dados brutos, tempos por fase em segundos)
+        """
+        timings = {}
+        data = {}
+        
+        if hasattr(file, "seek"):
+            file.seek(0)
+        
+        start = time.perf_counter()
+        try:
+            workbook = open_workbook(file)
+        except Exception as e:
+            raise ValueError(f"Arquivo Excel corrompido: {str(e)}") from e
+        timings["abertura"] = time.perf_counter() - start
+        
+        try:
+            is_valid, message = self._check_sheets(workbook.sheetnames)
+            if not is_valid:
+                raise ValueError(message)
+            
+            for sheet_name in EXCEL_CONFIG["required_sheets"]:
+                start = time.perf_counter()
                 try:
-                    df_cluster = pd.read_excel(
-                        file,
-                        sheet_name="pulso_consulta_diaria_cluster_a", 
-                        header=1,  # Skip description row
-                        engine='openpyxl'
-                    )
-                    data["pulso_consulta_diaria_cluster_a"] = df_cluster
-                    logger.info(f"Carregada aba cluster: {df_cluster.shape}")
-                    
+                    df = _read_sheet_streaming(workbook, sheet_name, self._projected_columns(sheet_name))
+                except Exception as e:
+                    raise ValueError(f"Erro ao carregar aba '{sheet_name}': {str(e)}") from e
+                
+                timings[f"leitura_{sheet_name}"] = time.perf_counter() - start
+                data[sheet_name] = df
+                logger.info(f"Carregada aba {sheet_name}: {df.shape}")
+        finally:
+            workbook.close()
+        
+        return data, timings
+    
+    def _read_workbooks_parallel(self, files: List) -> List[Tuple[Dict[str, pd.DataFrame], Dict[str, float]]]:
+        """
+        Lê as abas obrigatórias de um ou mais workbooks em um ProcessPoolExecutor
+        
+        Cada par (arquivo, aba) é lido em um processo próprio, que abre o
+        workbook por conta própria; os DataFrames voltam em Arrow IPC em vez
+        de arrays de objetos serializados com pickle.
+        
+        Args:
+            files: Arquivos enviados via streamlit file_uploader ou Path objects
+            
+        Returns:
+            List[Tuple[Dict[str, pd.DataFrame], Dict[str, float]]]: (dados brutos, tempos) por arquivo
+        """
+        sources = []
+        for file in files:
+            if isinstance(file, Path):
+                sources.append(str(file))
+            elif hasattr(file, "getbuffer"):
+                sources.append(bytes(file.getbuffer()))
+            else:
+                file.seek(0)
+                sources.append(file.read())
+        
+        tasks = [(i, sheet_name) for i in range(len(files)) for sheet_name in EXCEL_CONFIG["required_sheets"]]
+        max_workers = min(len(tasks), LOADER_CONFIG["max_workers"] or os.cpu_count() or 1)
+        parsed: Dict[Tuple[int, str], pd.DataFrame] = {}
+        
+        start = time.perf_counter()
+        # spawn evita o fork de um processo com threads (servidor Streamlit)
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = {
+                executor.submit(
+                    _parse_sheet_to_arrow, sources[i], sheet_name, self._projected_columns(sheet_name), self.reader
+                ): (i, sheet_name)
+                for i, sheet_name in tasks
+            }
+            
+            for future in as_completed(futures):
+                i, sheet_name = futures[future]
+                try:
+                    payload, elapsed = future.result()
                 except Exception as e:
-                    st.error(f"❌ Erro ao carregar aba 'pulso_consulta_diaria_cluster_a': {str(e)}")
+                    raise ValueError(f"Erro ao carregar aba '{sheet_name}': {str(e)}") from e
+                
+                parsed[(i, sheet_name)] = _frame_from_arrow(payload)
+                logger.info(f"Carregada aba {sheet_name} (arquivo {i + 1}/{len(files)}, processo paralelo): "
+                            f"{parsed[(i, sheet_name)].shape} em {elapsed:.3f}s")
+        
+        wall_time = time.perf_counter() - start
+        
+        return [
+            (
+                {sheet_name: parsed[(i, sheet_name)] for sheet_name in EXCEL_CONFIG["required_sheets"]},
+                {"leitura_paralela": wall_time}
+            )
+            for i in range(len(files))
+        ]
+    
+    def _log_timings(self, timings: Dict[str, float]) -> None:
+        """Registra no log o tempo de cada fase do carregamento"""
+        phases = ", ".join(f"{phase}={seconds:.3f}s" for phase, seconds in timings.items())
+        logger.info(f"Tempos de carregamento: {phases} (total={sum(timings.values()):.3f}s)")
+    
+    def load_excel_data(self, file, file_hash: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Carrega dados das abas principais do Excel
+        
+        Args:
+            file: Arquivo Excel enviado
+            file_hash: Hash do conteúdo já calculado (opcional)
+            
+        Returns:
+            Dict[str, pd.DataFrame]: Dicionário com DataFrames das abas
+        """
+        return self.load_excel_files([file], file_hashes=[file_hash] if file_hash else None)
+    
+    def load_excel_files(self, files: List, file_hashes: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Carrega um ou mais workbooks (p.ex. um por mês) e concatena suas abas
+        
+        Args:
+            files: Arquivos Excel enviados ou Path objects
+            file_hashes: Hashes do conteúdo já calculados, na ordem dos arquivos (opcional)
+            
+        Returns:
+            Dict[str, pd.DataFrame]: Dicionário com DataFrames das abas
+        """
+        try:
+            # Conteúdo já processado anteriormente é servido do cache
+            self.file_hashes = file_hashes or [compute_content_hash(file) for file in files]
+            content_hash = self._combined_hash(self.file_hashes)
+            data = self._load_from_cache(content_hash)
+            if data is not None:
+                self._set_upload_metadata(files, data, content_hash, cache_hit=True)
+                self.data = data
+                st.success(MESSAGES["upload_success"])
+                return data
+            
+            # Validar arquivos
+            for file in files:
+                is_valid, message = self._check_file_properties(file)
+                if not is_valid:
+                    st.error(f"❌ {message}")
                     return {}
             
+            # Carregar abas principais
+            with st.spinner("🔄 Carregando dados..."):
+                try:
+                    if self.parallel:
+                        results = self._read_workbooks_parallel(files)
+                    else:
+                        results = [self._read_workbook(file) for file in files]
+                except ValueError as e:
+                    st.error(f"❌ {str(e)}")
+                    return {}
+            
+            data, timings = results[0]
+            if len(results) > 1:
+                data = {
+                    sheet_name: pd.concat([file_data[sheet_name] for file_data, _ in results], ignore_index=True)
+                    for sheet_name in data
+                }
+                timings = {}
+                for _, file_timings in results:
+                    for phase, seconds in file_timings.items():
+                        timings[phase] = seconds if phase == "leitura_paralela" else timings.get(phase, 0) + seconds
+            
             # Validar colunas obrigatórias
             validation_success = True
             for sheet_name, df in data.items():
@@ -181,17 +594,24 @@ class DataLoader:
             if not validation_success:
                 st.warning("⚠️ Algumas colunas obrigatórias não foram encontradas. A aplicação pode não funcionar corretamente.")
             
+            # Impressões digitais por dia, usadas em atualizações incrementais
+            self.day_fingerprints = self._day_fingerprints(data)
+            
             # Processar dados básicos
+            start = time.perf_counter()
             data = self._preprocess_data(data)
+            timings["pre_processamento"] = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            self._compute_weekly_medians(data)
+            timings["medianas"] = time.perf_counter() - start
+            self._log_timings(timings)
+            
+            self._save_to_cache(content_hash, data)
             
             # Salvar metadados
-            self.metadata = {
-                "file_name": file.name,
-                "file_size": file.size,
-                "upload_time": pd.Timestamp.now(),
-                "total_records": sum(len(df) for df in data.values()),
-                "sheets_loaded": list(data.keys())
-            }
+            self._set_upload_metadata(files, data, content_hash, cache_hit=False)
+            self.metadata["timings"] = timings
             
             self.data = data
             st.success(MESSAGES["upload_success"])
@@ -203,6 +623,350 @@ class DataLoader:
             st.error(f"❌ Erro no carregamento: {str(e)}")
             return {}
     
+    def _combined_hash(self, hashes: List[str]) -> str:
+        """Hash do conteúdo de um ou mais workbooks (na ordem recebida)"""
+        if len(hashes) == 1:
+            return hashes[0]
+        return hashlib.blake2b("".join(hashes).encode("utf-8"), digest_size=20).hexdigest()
+    
+    def _set_upload_metadata(self, files: List, data: Dict[str, pd.DataFrame], content_hash: str, cache_hit: bool) -> None:
+        """
+        Registra os metadados de arquivos carregados via upload
+        
+        Args:
+            files: Arquivos enviados ou Paths
+            data: Dados carregados
+            content_hash: Hash do conteúdo dos arquivos
+            cache_hit: Se os dados vieram do cache colunar
+        """
+        file_size = 0
+        for file in files:
+            if isinstance(file, Path):
+                file_size += file.stat().st_size
+            else:
+                file_size += getattr(file, "size", 0) or 0
+        
+        self.metadata = {
+            "file_name": ", ".join(file.name for file in files),
+            "file_size": file_size,
+            "upload_time": pd.Timestamp.now(),
+            "total_records": sum(len(df) for df in data.values()),
+            "sheets_loaded": list(data.keys()),
+            "content_hash": content_hash,
+            "dataset_key": self._cache_key(content_hash),
+            "file_hashes": self.file_hashes,
+            "load_mode": self.load_mode,
+            "memory_usage": self.memory_usage,
+            "day_fingerprints": self.day_fingerprints,
+            "weekly_medians": self.weekly_medians,
+            "cache_hit": cache_hit
+        }
+    
+    def load_excel_incremental(self, file, base_data: Dict[str, pd.DataFrame], base_metadata: Dict,
+                               file_hash: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Atualiza um dataset já carregado com um novo workbook, dia a dia
+        
+        Os dias (datavenda) do novo arquivo são comparados por impressão
+        digital com os do dataset atual: apenas dias novos ou alterados são
+        pré-processados e substituídos; os demais dias e o histórico ausente
+        do novo arquivo são mantidos. Os dias alterados ficam em
+        metadata["changed_days"] e dirigem a atualização por células das
+        medianas semanais; as estruturas derivadas (cubo, índice de lojas,
+        features, KPIs) são recalculadas sob a nova chave do dataset.
+        
+        Args:
+            file: Arquivo Excel enviado
+            base_data: Dados atualmente carregados
+            base_metadata: Metadados dos dados atuais
+            file_hash: Hash do conteúdo do arquivo já calculado (opcional)
+            
+        Returns:
+            Dict[str, pd.DataFrame]: Dicionário com DataFrames atualizados
+        """
+        base_fingerprints = base_metadata.get("day_fingerprints")
+        if not base_data or not base_fingerprints or base_metadata.get("load_mode") != self.load_mode:
+            logger.info("Dataset atual sem impressões digitais compatíveis; carregamento completo")
+            return self.load_excel_data(file, file_hash)
+        
+        try:
+            # A mesma combinação (dataset atual + arquivo) já pode estar no cache
+            file_hash = file_hash or compute_content_hash(file)
+            self.file_hashes = [file_hash]
+            content_hash = hashlib.blake2b(
+                f"{base_metadata['dataset_key']}+{file_hash}".encode("utf-8"), digest_size=20
+            ).hexdigest()
+            data = self._load_from_cache(content_hash)
+            if data is not None:
+                self._set_upload_metadata([file], data, content_hash, cache_hit=True)
+                self.metadata["changed_days"] = self._all_days(self._changed_days(base_fingerprints, self.day_fingerprints))
+                self.data = data
+                st.success(MESSAGES["upload_success"])
+                return data
+            
+            is_valid, message = self._check_file_properties(file)
+            if not is_valid:
+                st.error(f"❌ {message}")
+                return {}
+            
+            with st.spinner("🔄 Carregando dados..."):
+                try:
+                    raw_data, timings = self._read_workbook(file)
+                except ValueError as e:
+                    st.error(f"❌ {str(e)}")
+                    return {}
+            
+            fingerprints = self._day_fingerprints(raw_data)
+            changed_days = self._changed_days(base_fingerprints, fingerprints)
+            
+            # Pré-processar apenas as partições (dias) novas ou alteradas
+            start = time.perf_counter()
+            partitions = {
+                sheet_name: df[self._day_keys(df).isin(changed_days[sheet_name])].reset_index(drop=True)
+                for sheet_name, df in raw_data.items()
+            }
+            processed = self._preprocess_data(partitions)
+            timings["pre_processamento"] = time.perf_counter() - start
+            
+            for sheet_name, df in processed.items():
+                if sheet_name not in base_data or set(df.columns) != set(base_data[sheet_name].columns):
+                    logger.info(f"Colunas de '{sheet_name}' diferem do dataset atual; carregamento completo")
+                    return self.load_excel_data(file, file_hash)
+            
+            start = time.perf_counter()
+            data = self._merge_partitions(base_data, processed, changed_days)
+            timings["mesclagem"] = time.perf_counter() - start
+            
+            # Medianas: apenas as células (grupo, semana) tocadas pelos dias alterados
+            start = time.perf_counter()
+            self._update_weekly_medians(base_data, base_metadata, data, changed_days)
+            timings["medianas"] = time.perf_counter() - start
+            self._log_timings(timings)
+            
+            self.memory_usage = self._merge_memory_usage(base_data, base_metadata, data, changed_days)
+            self.day_fingerprints = {
+                sheet_name: {**base_fingerprints.get(sheet_name, {}), **fingerprints.get(sheet_name, {})}
+                for sheet_name in data
+            }
+            
+            self._save_to_cache(content_hash, data)
+            
+            self._set_upload_metadata([file], data, content_hash, cache_hit=False)
+            self.metadata["changed_days"] = self._all_days(changed_days)
+            self.metadata["timings"] = timings
+            
+            logger.info(f"Atualização incremental: {len(self.metadata['changed_days'])} dia(s) substituído(s) ou adicionado(s)")
+            
+            self.data = data
+            st.success(MESSAGES["upload_success"])
+            
+            return data
+            
+        except Exception as e:
+            logger.error(f"Erro na atualização incremental: {str(e)}")
+            st.error(f"❌ Erro no carregamento: {str(e)}")
+            return {}
+    
+    def _merge_memory_usage(self, base_data: Dict[str, pd.DataFrame], base_metadata: Dict,
+                            data: Dict[str, pd.DataFrame], changed_days: Dict[str, List[str]]) -> Dict[str, Dict[str, int]]:
+        """
+        Uso de memória do dataset mesclado, no mesmo formato de uma carga completa
+        
+        "before" (antes da tipagem) soma a parcela mantida do dataset atual,
+        proporcional às linhas preservadas, e as partições pré-processadas
+        agora (self.memory_usage de _preprocess_data); "after" é medido.
+        
+        Args:
+            base_data: Dados atualmente carregados
+            base_metadata: Metadados dos dados atuais
+            data: Dados mesclados
+            changed_days: Dias substituídos, por aba
+            
+        Returns:
+            Dict[str, Dict[str, int]]: {"before", "after"} em bytes por aba
+        """
+        base_usage = base_metadata.get("memory_usage", {})
+        memory_usage = {}
+        
+        for sheet_name, df in data.items():
+            base = base_data.get(sheet_name, pd.DataFrame())
+            base_before = base_usage.get(sheet_name, {}).get("before")
+            partition_before = self.memory_usage.get(sheet_name, {}).get("before", 0)
+            
+            if base_before is None or base.empty:
+                before = partition_before
+            else:
+                kept = int((~self._day_keys(base).isin(changed_days.get(sheet_name, []))).sum())
+                before = int(base_before * kept / len(base)) + partition_before
+            
+            memory_usage[sheet_name] = {
+                "before": before,
+                "after": int(df.memory_usage(deep=True).sum())
+            }
+        
+        return memory_usage
+    
+    def _compute_weekly_medians(self, data: Dict[str, pd.DataFrame]) -> None:
+        """
+        Pós-processamento: medianas semanais por (grupo_comparavel, semana) da aba diária
+        
+        Args:
+            data: Dados pré-processados
+        """
+        df_diaria = data.get("pulso_consulta_diaria", pd.DataFrame())
+        missing = self.median_engine.missing_columns(df_diaria)
+        if missing:
+            logger.info(f"Medianas semanais não calculadas; colunas ausentes: {', '.join(missing)}")
+            self.weekly_medians = pd.DataFrame()
+            return
+        
+        try:
+            self.weekly_medians = self.median_engine.compute(df_diaria)
+        except Exception as e:
+            logger.warning(f"Erro no cálculo das medianas semanais: {str(e)}")
+            self.weekly_medians = pd.DataFrame()
+    
+    def _update_weekly_medians(self, base_data: Dict[str, pd.DataFrame], base_metadata: Dict,
+                               data: Dict[str, pd.DataFrame], changed_days: Dict[str, List[str]]) -> None:
+        """
+        Atualiza as medianas semanais do dataset anterior após uma carga incremental
+        
+        Args:
+            base_data: Dados antes da atualização
+            base_metadata: Metadados antes da atualização (com "weekly_medians")
+            data: Dados mesclados
+            changed_days: Dias alterados por aba
+        """
+        base_table = base_metadata.get("weekly_medians")
+        df_diaria = data.get("pulso_consulta_diaria", pd.DataFrame())
+        if base_table is None or base_table.empty or self.median_engine.missing_columns(df_diaria):
+            self._compute_weekly_medians(data)
+            return
+        
+        try:
+            self.weekly_medians = self.median_engine.update(
+                base_table,
+                base_data.get("pulso_consulta_diaria", pd.DataFrame()),
+                df_diaria,
+                changed_days.get("pulso_consulta_diaria", [])
+            )
+        except Exception as e:
+            logger.warning(f"Erro na atualização das medianas semanais: {str(e)}")
+            self._compute_weekly_medians(data)
+    
+    def _day_keys(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Partição (dia de datavenda, AAAA-MM-DD) de cada linha de um DataFrame
+        
+        Args:
+            df: DataFrame bruto ou pré-processado
+            
+        Returns:
+            pd.Series: Dia de cada linha ("NaT" para datas ausentes)
+        """
+        date_cols = [col for col in df.columns if str(col).strip() == 'datavenda']
+        if not date_cols:
+            return pd.Series("NaT", index=df.index)
+        
+        dates = pd.to_datetime(df[date_cols[0]], errors='coerce')
+        return dates.dt.strftime('%Y-%m-%d').fillna("NaT")
+    
+    def _day_fingerprints(self, data: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, str]]:
+        """
+        Calcula uma impressão digital por dia de cada aba
+        
+        O hash de cada linha (pd.util.hash_pandas_object) é ordenado dentro do
+        dia, então a impressão não depende da ordem das linhas no arquivo.
+        
+        Args:
+            data: Dicionário com DataFrames brutos
+            
+        Returns:
+            Dict[str, Dict[str, str]]: {aba: {dia: hash}}
+        """
+        fingerprints = {}
+        
+        for sheet_name, df in data.items():
+            if df.empty:
+                fingerprints[sheet_name] = {}
+                continue
+            
+            row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+            day_codes, days = pd.factorize(self._day_keys(df))
+            
+            order = np.lexsort((row_hashes, day_codes))
+            sorted_codes = day_codes[order]
+            sorted_hashes = row_hashes[order]
+            
+            bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+            starts = np.concatenate(([0], bounds))
+            ends = np.concatenate((bounds, [len(sorted_codes)]))
+            
+            fingerprints[sheet_name] = {
+                days[sorted_codes[begin]]: hashlib.blake2b(sorted_hashes[begin:end].tobytes(), digest_size=12).hexdigest()
+                for begin, end in zip(starts, ends)
+            }
+        
+        return fingerprints
+    
+    def _changed_days(self, base_fingerprints: Dict[str, Dict[str, str]],
+                      fingerprints: Dict[str, Dict[str, str]]) -> Dict[str, List[str]]:
+        """Dias novos ou com conteúdo diferente, por aba"""
+        return {
+            sheet_name: sorted(
+                day for day, digest in sheet_fingerprints.items()
+                if base_fingerprints.get(sheet_name, {}).get(day) != digest
+            )
+            for sheet_name, sheet_fingerprints in fingerprints.items()
+        }
+    
+    def _all_days(self, changed_days: Dict[str, List[str]]) -> List[str]:
+        """Dias alterados em qualquer aba"""
+        return sorted({day for days in changed_days.values() for day in days})
+    
+    def _merge_partitions(self, base_data: Dict[str, pd.DataFrame], partitions: Dict[str, pd.DataFrame],
+                          changed_days: Dict[str, List[str]]) -> Dict[str, pd.DataFrame]:
+        """
+        Substitui no dataset atual as linhas dos dias alterados
+        
+        As categorias das colunas category são unificadas entre as partes (e
+        entre as abas) para que a concatenação preserve o tipo compacto.
+        
+        Args:
+            base_data: Dados atuais
+            partitions: Dias novos ou alterados, já pré-processados
+            changed_days: Dias substituídos, por aba
+            
+        Returns:
+            Dict[str, pd.DataFrame]: Dados atualizados
+        """
+        pieces = {
+            sheet_name: [
+                base_data[sheet_name][~self._day_keys(base_data[sheet_name]).isin(changed_days[sheet_name])],
+                partitions[sheet_name]
+            ]
+            for sheet_name in partitions
+        }
+        
+        # Dicionário de categorias compartilhado, a partir dos valores presentes
+        categories: Dict[str, set] = {}
+        for frames in pieces.values():
+            for df in frames:
+                for col in df.select_dtypes(include=['category']).columns:
+                    categories.setdefault(col, set()).update(df[col].dropna().unique())
+        
+        merged = {}
+        for sheet_name, frames in pieces.items():
+            aligned = []
+            for df in frames:
+                df = df.copy()
+                for col in df.select_dtypes(include=['category']).columns:
+                    df[col] = df[col].cat.set_categories(sorted(categories[col]))
+                aligned.append(df)
+            merged[sheet_name] = pd.concat(aligned, ignore_index=True)
+        
+        return merged
+    
     def _validate_columns(self, df: pd.DataFrame, sheet_name: str) -> List[str]:
         """
         Valida se as colunas obrigatórias existem no DataFrame
@@ -245,20 +1009,141 @@ class DataLoader:
             # Limpar nomes de colunas
             df_processed.columns = df_processed.columns.str.strip()
             
+            processed_data[sheet_name] = df_processed
+        
+        self.memory_usage = {
+            sheet_name: {"before": int(df.memory_usage(deep=True).sum())}
+            for sheet_name, df in processed_data.items()
+        }
+        
+        # Colunas declaradas no SHEET_SCHEMAS recebem o tipo compacto
+        processed_data = self._apply_schema_dtypes(processed_data)
+        
+        for sheet_name, df_processed in processed_data.items():
+            declared = SHEET_SCHEMAS.get(sheet_name, {}).get("dtypes", {})
+            
             # Substituir valores nulos em colunas numéricas por 0
-            numeric_cols = df_processed.select_dtypes(include=['number']).columns
+            numeric_cols = [col for col in df_processed.select_dtypes(include=['number']).columns if col not in declared]
             df_processed[numeric_cols] = df_processed[numeric_cols].fillna(0)
             
             # Substituir valores nulos em colunas de texto por string vazia
-            text_cols = df_processed.select_dtypes(include=['object']).columns
+            text_cols = [col for col in df_processed.select_dtypes(include=['object']).columns if col not in declared]
             df_processed[text_cols] = df_processed[text_cols].fillna('')
             
-            processed_data[sheet_name] = df_processed
+            self.memory_usage[sheet_name]["after"] = int(df_processed.memory_usage(deep=True).sum())
             
-            logger.info(f"Pré-processamento de '{sheet_name}' concluído: {df_processed.shape}")
+            logger.info(
+                f"Pré-processamento de '{sheet_name}' concluído: {df_processed.shape}, "
+                f"memória {self.memory_usage[sheet_name]['before']:,} -> {self.memory_usage[sheet_name]['after']:,} bytes"
+            )
         
         return processed_data
     
+    def _apply_schema_dtypes(self, data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """
+        Ingestão tipada: converte as colunas declaradas no SHEET_SCHEMAS
+        
+        Texto de baixa cardinalidade vira category (com um único dicionário de
+        categorias compartilhado entre as abas, p.ex. NomeLoja), contagens
+        viram int32 e valores monetários/lacunas viram float32 quando o erro
+        de conversão fica dentro de DTYPE_CONFIG["float32_max_abs_error"].
+        
+        Args:
+            data: Dicionário com DataFrames
+            
+        Returns:
+            Dict[str, pd.DataFrame]: Dados com tipos compactos
+        """
+        shared_categories = self._shared_categories(data)
+        
+        for sheet_name, df in data.items():
+            dtypes = SHEET_SCHEMAS.get(sheet_name, {}).get("dtypes", {})
+            
+            for col, dtype in dtypes.items():
+                if col not in df.columns:
+                    continue
+                
+                if dtype == "category":
+                    df[col] = pd.Categorical(self._normalize_text(df[col]), categories=shared_categories[col])
+                elif dtype == "string":
+                    df[col] = self._normalize_text(df[col])
+                elif dtype == "datetime":
+                    df[col] = pd.to_datetime(df[col], errors='coerce')
+                elif dtype == "int32":
+                    df[col] = self._downcast_int(df[col], sheet_name)
+                elif dtype in ("float32", "float64"):
+                    df[col] = self._downcast_float(df[col], sheet_name, dtype)
+        
+        return data
+    
+    def _normalize_text(self, series: pd.Series) -> pd.Series:
+        """Converte uma coluna de texto para str, com nulos como string vazia"""
+        return series.astype(object).where(series.notna(), '').astype(str)
+    
+    def _shared_categories(self, data: Dict[str, pd.DataFrame]) -> Dict[str, List[str]]:
+        """
+        Monta um dicionário de categorias por coluna, compartilhado entre as abas
+        
+        Args:
+            data: Dicionário com DataFrames
+            
+        Returns:
+            Dict[str, List[str]]: Categorias ordenadas por coluna
+        """
+        values: Dict[str, set] = {}
+        
+        for sheet_name, df in data.items():
+            dtypes = SHEET_SCHEMAS.get(sheet_name, {}).get("dtypes", {})
+            for col, dtype in dtypes.items():
+                if dtype == "category" and col in df.columns:
+                    values.setdefault(col, set()).update(self._normalize_text(df[col]).unique())
+        
+        return {col: sorted(col_values) for col, col_values in values.items()}
+    
+    def _downcast_int(self, series: pd.Series, sheet_name: str) -> pd.Series:
+        """
+        Converte contagens para int32 (nulos viram 0)
+        
+        Colunas com valores fracionários ou fora do intervalo do int32 seguem
+        para a conversão de ponto flutuante.
+        """
+        values = pd.to_numeric(series, errors='coerce').fillna(0)
+        array = values.to_numpy(dtype=np.float64)
+        
+        info = np.iinfo(np.int32)
+        if np.all(np.mod(array, 1) == 0) and (len(array) == 0 or (array.min() >= info.min and array.max() <= info.max)):
+            return values.astype(np.int32)
+        
+        logger.info(f"Coluna '{series.name}' de '{sheet_name}' não cabe em int32; mantida como ponto flutuante")
+        return self._downcast_float(values, sheet_name, "float32")
+    
+    def _downcast_float(self, series: pd.Series, sheet_name: str, dtype: str) -> pd.Series:
+        """
+        Converte valores para float32 quando a precisão permite (nulos viram 0)
+        
+        Args:
+            series: Coluna numérica
+            sheet_name: Nome da aba/sheet (para log)
+            dtype: Tipo declarado ("float32" ou "float64")
+            
+        Returns:
+            pd.Series: Coluna convertida
+        """
+        values = pd.to_numeric(series, errors='coerce').fillna(0).astype(np.float64)
+        if dtype == "float64":
+            return values
+        
+        compact = values.astype(np.float32)
+        if len(values) == 0:
+            return compact
+        
+        max_error = np.abs(compact.to_numpy(dtype=np.float64) - values.to_numpy()).max()
+        if max_error <= DTYPE_CONFIG["float32_max_abs_error"]:
+            return compact
+        
+        logger.info(f"Coluna '{series.name}' de '{sheet_name}' mantida em float64 (erro float32: {max_error:.4f})")
+        return values
+    
     def get_data_summary(self) -> Dict:
         """
         Retorna resumo dos dados carregados
@@ -274,12 +1159,17 @@ class DataLoader:
             "sheets": {}
         }
         
+        memory_before = self.metadata.get("memory_usage", {})
+        
         for sheet_name, df in self.data.items():
             summary["sheets"][sheet_name] = {
                 "rows": len(df),
                 "columns": len(df.columns),
                 "columns_list": df.columns.tolist(),
-                "memory_usage": df.memory_usage(deep=True).sum()
+                "memory_usage": {
+                    "before": memory_before.get(sheet_name, {}).get("before"),
+                    "after": int(df.memory_usage(deep=True).sum())
+                }
             }
         
         return summary
@@ -298,39 +1188,22 @@ class DataLoader:
             
             logger.info(f"Carregando base padrão: {BASE_EXCEL_PATH}")
             
-            # Carregar abas principais
-            data = {}
+            # Conteúdo já processado anteriormente é servido do cache
+            content_hash = compute_content_hash(BASE_EXCEL_PATH)
+            self.file_hashes = [content_hash]
+            data = self._load_from_cache(content_hash)
+            if data is not None:
+                self._set_default_base_metadata(data, content_hash, cache_hit=True)
+                self.data = data
+                return data
             
-            # Aba principal - dados diários
+            # Carregar abas principais
             try:
-                df_diaria = pd.read_excel(
-                    BASE_EXCEL_PATH, 
-                    sheet_name="pulso_consulta_diaria",
-                    header=1,  # Skip description row
-                    engine='openpyxl'
-                )
-                data["pulso_consulta_diaria"] = df_diaria
-                logger.info(f"Carregada aba pulso_consulta_diaria da base padrão: {df_diaria.shape}")
-                
-            except Exception as e:
-                logger.error(f"Erro ao carregar aba 'pulso_consulta_diaria' da base padrão: {str(e)}")
+                data, timings = self._read_workbook(BASE_EXCEL_PATH)
+            except ValueError as e:
+                logger.error(f"Erro ao carregar base padrão: {str(e)}")
                 return {}
             
-            # Aba com cálculos de lacunas
-            try:
-                df_cluster = pd.read_excel(
-                    BASE_EXCEL_PATH,
-                    sheet_name="pulso_consulta_diaria_cluster_a", 
-                    header=1,  # Skip description row
-                    engine='openpyxl'
-                )
-                data["pulso_consulta_diaria_cluster_a"] = df_cluster
-                logger.info(f"Carregada aba cluster da base padrão: {df_cluster.shape}")
-                
-            except Exception as e:
-                logger.error(f"Erro ao carregar aba 'pulso_consulta_diaria_cluster_a' da base padrão: {str(e)}")
-                return {}
-        
             # Validar colunas obrigatórias
             validation_success = True
             for sheet_name, df in data.items():
@@ -342,19 +1215,24 @@ class DataLoader:
             if not validation_success:
                 logger.warning("Algumas colunas obrigatórias não foram encontradas na base padrão.")
             
+            # Impressões digitais por dia, usadas em atualizações incrementais
+            self.day_fingerprints = self._day_fingerprints(data)
+            
             # Processar dados básicos
+            start = time.perf_counter()
             data = self._preprocess_data(data)
+            timings["pre_processamento"] = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            self._compute_weekly_medians(data)
+            timings["medianas"] = time.perf_counter() - start
+            self._log_timings(timings)
+            
+            self._save_to_cache(content_hash, data)
             
             # Salvar metadados
-            file_stat = BASE_EXCEL_PATH.stat()
-            self.metadata = {
-                "file_name": BASE_EXCEL_PATH.name,
-                "file_size": file_stat.st_size,
-                "upload_time": pd.Timestamp.now(),
-                "total_records": sum(len(df) for df in data.values()),
-                "sheets_loaded": list(data.keys()),
-                "source": "base_padrao"
-            }
+            self._set_default_base_metadata(data, content_hash, cache_hit=False)
+            self.metadata["timings"] = timings
             
             self.data = data
             logger.info("Base padrão carregada com sucesso!")
@@ -364,6 +1242,33 @@ class DataLoader:
         except Exception as e:
             logger.error(f"Erro ao carregar base padrão: {str(e)}")
             return {}
+    
+    def _set_default_base_metadata(self, data: Dict[str, pd.DataFrame], content_hash: str, cache_hit: bool) -> None:
+        """
+        Registra os metadados da base padrão
+        
+        Args:
+            data: Dados carregados
+            content_hash: Hash do conteúdo do arquivo base
+            cache_hit: Se os dados vieram do cache colunar
+        """
+        file_stat = BASE_EXCEL_PATH.stat()
+        self.metadata = {
+            "file_name": BASE_EXCEL_PATH.name,
+            "file_size": file_stat.st_size,
+            "upload_time": pd.Timestamp.now(),
+            "total_records": sum(len(df) for df in data.values()),
+            "sheets_loaded": list(data.keys()),
+            "source": "base_padrao",
+            "content_hash": content_hash,
+            "dataset_key": self._cache_key(content_hash),
+            "file_hashes": self.file_hashes,
+            "load_mode": self.load_mode,
+            "memory_usage": self.memory_usage,
+            "day_fingerprints": self.day_fingerprints,
+            "weekly_medians": self.weekly_medians,
+            "cache_hit": cache_hit
+        }
 
 
 def check_default_base_exists() -> bool:
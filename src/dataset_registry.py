@@ -0,0 +1,229 @@
+"""
+Registro de datasets compartilhado entre as sessões do processo Streamlit
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+import logging
+
+import pandas as pd
+import streamlit as st
+
+from config import CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def freeze_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cria uma versão somente leitura de um DataFrame
+
+    Cada coluna é copiada uma única vez para um array NumPy marcado como não
+    gravável; qualquer atribuição in-place no DataFrame compartilhado gera
+    ValueError, enquanto cópias derivadas (filtros, .copy()) seguem graváveis.
+
+    Args:
+        df: DataFrame a congelar
+
+    Returns:
+        pd.DataFrame: DataFrame somente leitura
+    """
+    columns = {}
+
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy().copy()
+            codes.flags.writeable = False
+            columns[col] = pd.Categorical.from_codes(codes, dtype=series.dtype)
+        else:
+            values = series.to_numpy().copy()
+            values.flags.writeable = False
+            columns[col] = values
+
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def is_frozen_frame(df: pd.DataFrame) -> bool:
+    """
+    Indica se um DataFrame é somente leitura (criado por freeze_frame)
+
+    Colunas categóricas são ignoradas (seus códigos são sempre expostos como
+    somente leitura); as demais precisam ser arrays não graváveis.
+
+    Args:
+        df: DataFrame a verificar
+
+    Returns:
+        bool: True se nenhuma coluna pode ser alterada in-place
+    """
+    checked = False
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            continue
+        if series.to_numpy().flags.writeable:
+            return False
+        checked = True
+    return checked
+
+
+class DatasetRegistry:
+    """Datasets imutáveis compartilhados pelo processo, com contagem de referências por sessão"""
+
+    def __init__(self, ttl: int = CACHE_CONFIG["ttl"]):
+        # Sessões que não renovam a referência por mais de ttl segundos são descartadas
+        # (holders -> último acesso, None para referências fixas)
+        self.ttl = ttl
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _session_view(data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """
+        Cópias rasas dos DataFrames do registro para uma sessão
+
+        Os arrays continuam compartilhados e somente leitura; atribuir ou
+        remover colunas afeta apenas a cópia da sessão.
+        """
+        return {sheet_name: df.copy(deep=False) for sheet_name, df in data.items()}
+
+    def register(self, key: str, data: Dict[str, pd.DataFrame], metadata: Dict,
+                 holder: Optional[str] = None, pinned: bool = False) -> Dict[str, pd.DataFrame]:
+        """
+        Publica um dataset no registro (ou reaproveita o já publicado)
+
+        Args:
+            key: Chave do dataset (hash do conteúdo + modo de leitura)
+            data: Dicionário com DataFrames
+            metadata: Metadados do carregamento
+            holder: Sessão que passa a referenciar o dataset (opcional)
+            pinned: Referência do holder não expira pelo ttl (só sai com release)
+
+        Returns:
+            Dict[str, pd.DataFrame]: Cópias rasas dos dados compartilhados (somente leitura)
+        """
+        with self._lock:
+            self.evict()
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {
+                    "data": {sheet_name: freeze_frame(df) for sheet_name, df in data.items()},
+                    "metadata": dict(metadata),
+                    "holders": {},
+                    "created": time.time()
+                }
+                self._entries[key] = entry
+                logger.info(f"Dataset publicado no registro: {key}")
+            if holder is not None:
+                self._touch(entry, holder, pinned)
+            return self._session_view(entry["data"])
+
+    @staticmethod
+    def _touch(entry: Dict, holder: str, pinned: bool = False) -> None:
+        """Renova a referência de um holder (None marca referências fixas, sem ttl)"""
+        if pinned or entry["holders"].get(holder, 0) is None:
+            entry["holders"][holder] = None
+        else:
+            entry["holders"][holder] = time.time()
+
+    def acquire(self, key: str, holder: str, pinned: bool = False) -> bool:
+        """
+        Registra uma sessão como usuária de um dataset
+
+        Args:
+            key: Chave do dataset
+            holder: Identificador da sessão
+            pinned: Referência não expira pelo ttl (só sai com release)
+
+        Returns:
+            bool: True se o dataset existe no registro
+        """
+        with self._lock:
+            self.evict()
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            self._touch(entry, holder, pinned)
+            return True
+
+    def release(self, key: str, holder: str) -> None:
+        """
+        Remove a referência de uma sessão; datasets sem referências são descartados
+
+        Args:
+            key: Chave do dataset
+            holder: Identificador da sessão
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["holders"].pop(holder, None)
+            self.evict()
+
+    def get(self, key: str, holder: Optional[str] = None) -> Optional[Tuple[Dict[str, pd.DataFrame], Dict]]:
+        """
+        Recupera um dataset e renova a referência da sessão
+
+        Args:
+            key: Chave do dataset
+            holder: Identificador da sessão (opcional)
+
+        Returns:
+            Optional[Tuple[Dict[str, pd.DataFrame], Dict]]: (cópias rasas dos dados, metadados) ou None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if holder is not None:
+                self._touch(entry, holder)
+            return self._session_view(entry["data"]), dict(entry["metadata"])
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def evict(self) -> int:
+        """
+        Descarta referências de sessões inativas e datasets sem referências
+
+        Executado a cada register, acquire e release: abas fechadas nunca
+        chamam release, e suas referências expiram pelo ttl.
+
+        Returns:
+            int: Quantidade de datasets descartados
+        """
+        now = time.time()
+        removed = 0
+
+        with self._lock:
+            for key in list(self._entries):
+                holders = self._entries[key]["holders"]
+                for holder, last_seen in list(holders.items()):
+                    if last_seen is not None and now - last_seen > self.ttl:
+                        del holders[holder]
+
+                if not holders:
+                    del self._entries[key]
+                    removed += 1
+                    logger.info(f"Dataset removido do registro: {key}")
+
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retorna a quantidade de referências por dataset
+
+        Returns:
+            Dict[str, int]: {chave: sessões usando o dataset}
+        """
+        with self._lock:
+            return {key: len(entry["holders"]) for key, entry in self._entries.items()}
+
+
+@st.cache_resource
+def get_dataset_registry() -> DatasetRegistry:
+    """Registro único do processo, compartilhado por todas as sessões"""
+    return DatasetRegistry()
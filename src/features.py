@@ -0,0 +1,187 @@
+"""
+Matriz de features por loja para o clustering do Projeto Pulso
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+import logging
+
+from .dataset_registry import freeze_frame
+from .indexes import get_index_cache
+from .medians import NATIVE_VOLUMES, metric_ratio
+
+logger = logging.getLogger(__name__)
+
+# Features por loja (todas somadas sobre a janela de datas):
+# RL = receita líquida total, RL_Medio = receita média por dia,
+# BM = RL / cupom, PM = RL / itens, Cupom = cupons totais, Prod = itens / cupom,
+# *_YoY = variação contra o ano anterior, RL_Volatilidade = desvio / média da RL diária
+STORE_FEATURES = [
+    "RL", "RL_Medio", "BM", "PM", "Cupom", "Prod",
+    "RL_YoY", "Cupom_YoY", "BM_YoY", "PM_YoY", "Prod_YoY", "RL_Volatilidade"
+]
+
+# Features selecionadas por padrão na página de clusters
+DEFAULT_CLUSTER_FEATURES = ["RL", "BM", "PM", "Cupom", "Prod"]
+
+# Unidades de análise: {nível: colunas-chave da aba diária}
+FEATURE_LEVELS = {
+    "loja": ["NomeLoja"],
+    "loja_semana": ["NomeLoja", "semana"]
+}
+
+# Razões sobre os volumes somados (formato de NATIVE_LACUNAS para metric_ratio)
+FEATURE_RATIOS = {
+    "BM": {"numerator": "rl", "denominator": "cupom"},
+    "PM": {"numerator": "rl", "denominator": "item"},
+    "Prod": {"numerator": "item", "denominator": "cupom"}
+}
+
+
+def feature_matrix(df: pd.DataFrame, features: Sequence[str]) -> np.ndarray:
+    """
+    Features de um DataFrame como array float32 contíguo (linhas = lojas)
+
+    Args:
+        df: Uma linha por loja
+        features: Colunas na ordem desejada
+
+    Returns:
+        np.ndarray: Matriz (lojas x features) em float32, C-contígua
+    """
+    return np.ascontiguousarray(df[list(features)].to_numpy(dtype=np.float32, na_value=np.nan))
+
+
+class StoreFeatureBuilder:
+    """Constrói as features por loja (ou loja-semana) direto da aba diária, em uma passagem agrupada"""
+
+    def __init__(self, df_diaria: pd.DataFrame, level: str = "loja"):
+        """
+        Args:
+            df_diaria: Aba diária
+            level: Unidade de análise (chave de FEATURE_LEVELS)
+        """
+        if level not in FEATURE_LEVELS:
+            raise ValueError(f"Nível de features inválido: {level}. Use: {', '.join(FEATURE_LEVELS)}")
+        self.df_diaria = df_diaria
+        self.level = level
+
+    def missing_columns(self) -> List[str]:
+        """Colunas da aba diária necessárias às features que não estão nos dados"""
+        required = FEATURE_LEVELS[self.level] + ["datavenda"]
+        required += [col for pair in NATIVE_VOLUMES.values() for col in pair]
+        return [col for col in required if col not in self.df_diaria.columns]
+
+    def build(self, start=None, end=None) -> pd.DataFrame:
+        """
+        Calcula as features de todas as lojas (ou lojas-semana) em uma janela de datas
+
+        Cada volume (atual e do ano anterior) é somado por unidade com um
+        único np.bincount sobre os códigos da unidade; razões, variações e
+        volatilidade saem dessas somas, sem agrupar o DataFrame.
+
+        Args:
+            start: Primeiro dia da janela (None = início dos dados)
+            end: Último dia da janela (None = fim dos dados)
+
+        Returns:
+            pd.DataFrame: Coluna Loja (e semana), mais STORE_FEATURES em float32, uma linha por unidade
+        """
+        missing = self.missing_columns()
+        if missing:
+            raise ValueError(f"Colunas ausentes na aba diária: {', '.join(missing)}")
+
+        df = self.df_diaria
+        dates = df["datavenda"]
+        mask = dates.notna().to_numpy()
+        if start is not None:
+            mask &= (dates >= pd.Timestamp(start).normalize()).to_numpy()
+        if end is not None:
+            mask &= (dates < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_numpy()
+        positions = np.flatnonzero(mask)
+
+        store_codes, stores = pd.factorize(df["NomeLoja"].iloc[positions], sort=True)
+        valid = store_codes >= 0
+        keys = {"Loja": stores.astype(str)}
+
+        if self.level == "loja_semana":
+            # Par (loja, semana) codificado em um único inteiro
+            week_codes, weeks = pd.factorize(df["semana"].iloc[positions], sort=True)
+            valid &= week_codes >= 0
+            pair_codes, pairs = pd.factorize(store_codes[valid] * max(len(weeks), 1) + week_codes[valid], sort=True)
+            keys = {
+                "Loja": stores.astype(str)[pairs // max(len(weeks), 1)],
+                "semana": weeks.astype(str)[pairs % max(len(weeks), 1)]
+            }
+            positions, store_codes = positions[valid], pair_codes
+        else:
+            positions, store_codes = positions[valid], store_codes[valid]
+        n_stores = len(keys["Loja"])
+
+        def store_sum(values: np.ndarray) -> np.ndarray:
+            return np.bincount(store_codes, weights=values, minlength=n_stores)
+
+        def column(name: str) -> np.ndarray:
+            return np.nan_to_num(df[name].to_numpy(dtype=np.float64, na_value=np.nan)[positions])
+
+        current = {name: store_sum(column(atual)) for name, (atual, _) in NATIVE_VOLUMES.items()}
+        previous = {name: store_sum(column(anterior)) for name, (_, anterior) in NATIVE_VOLUMES.items()}
+
+        daily_rl = column(NATIVE_VOLUMES["rl"][0])
+        days = np.bincount(store_codes, minlength=n_stores)
+        squares = store_sum(daily_rl * daily_rl)
+
+        def growth(actual: np.ndarray, baseline: np.ndarray) -> np.ndarray:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return np.where(baseline != 0, actual / baseline - 1, np.nan)
+
+        features: Dict[str, np.ndarray] = {"RL": current["rl"], "Cupom": current["cupom"]}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            features["RL_Medio"] = current["rl"] / days
+            variances = np.maximum(squares - current["rl"] * features["RL_Medio"], 0.0) / (days - 1)
+            stds = np.where(days > 1, np.sqrt(variances), np.nan)
+            features["RL_Volatilidade"] = np.where(features["RL_Medio"] != 0, stds / features["RL_Medio"], np.nan)
+
+        for name, spec in FEATURE_RATIOS.items():
+            features[name] = metric_ratio(current, spec)
+            features[f"{name}_YoY"] = growth(features[name], metric_ratio(previous, spec))
+        features["RL_YoY"] = growth(current["rl"], previous["rl"])
+        features["Cupom_YoY"] = growth(current["cupom"], previous["cupom"])
+
+        result = pd.DataFrame(keys)
+        for name in STORE_FEATURES:
+            result[name] = features[name].astype(np.float32)
+
+        logger.info(f"Features por {self.level} calculadas: {n_stores} unidades, {len(positions)} linhas")
+        return result
+
+
+def get_store_features(data: Dict[str, pd.DataFrame], dataset_key: Optional[str] = None,
+                       start=None, end=None, level: str = "loja") -> pd.DataFrame:
+    """
+    Retorna as features de um dataset, janela e nível, calculando-as uma única vez
+
+    Args:
+        data: Dicionário com DataFrames
+        dataset_key: Chave do dataset (None calcula sem compartilhar)
+        start: Primeiro dia da janela (None = início dos dados)
+        end: Último dia da janela (None = fim dos dados)
+        level: Unidade de análise (chave de FEATURE_LEVELS)
+
+    Returns:
+        pd.DataFrame: Chaves da unidade e STORE_FEATURES (somente leitura quando compartilhado)
+    """
+    builder = StoreFeatureBuilder(data.get("pulso_consulta_diaria", pd.DataFrame()), level)
+
+    if dataset_key is None:
+        return builder.build(start, end)
+
+    window = tuple(None if day is None else pd.Timestamp(day).strftime("%Y-%m-%d") for day in (start, end))
+    cache = get_index_cache()
+    key = ("store_features", dataset_key, level) + window
+    found, features = cache.get(key)
+    if not found:
+        features = freeze_frame(builder.build(start, end))
+        cache.put(key, features)
+    return features
@@ -0,0 +1,380 @@
+"""
+Índices pré-construídos por dataset para consultas do Projeto Pulso
+"""
+
+import hashlib
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+import streamlit as st
+from typing import Any, Dict, List, Optional, Tuple, Union
+import logging
+
+from config import CACHE_CONFIG
+from .aggregation import top_k_positions
+from .cache import MemoCache
+from .dataset_registry import is_frozen_frame
+
+logger = logging.getLogger(__name__)
+
+# Colunas com um bitmap por valor no índice de filtros
+FILTER_DIMENSIONS = ["grupo_comparavel", "NumeroGR", "divisao", "ds_hub", "semana", "mes"]
+
+# Lacunas com bitmaps de sinal (negativa, positiva, zero)
+FILTER_SIGN_COLUMNS = ["LacunaRL", "LacunaCupom", "LacunaBM", "LacunaPM", "LacunaProd"]
+
+
+def _group_positions(values: pd.Series) -> Dict[str, np.ndarray]:
+    """Posições das linhas de cada valor distinto, em ordem original"""
+    codes, uniques = pd.factorize(values)
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    bounds = np.searchsorted(sorted_codes, np.arange(len(uniques) + 1))
+    return {
+        str(value): order[bounds[code]:bounds[code + 1]]
+        for code, value in enumerate(uniques)
+    }
+
+
+class StoreIndex:
+    """Índice de lojas: linha na aba cluster, faixa na aba diária e membros do grupo comparável"""
+
+    def __init__(self, df_cluster: pd.DataFrame, df_diaria: pd.DataFrame):
+        # Cópias rasas próprias: os arrays são os do dataset, sem duplicar dados
+        self.df_cluster = df_cluster.copy(deep=False)
+        self.df_diaria = df_diaria.copy(deep=False)
+
+        # Aba cluster: posições por loja (a primeira é a linha de referência)
+        self._cluster_rows: Dict[str, np.ndarray] = {}
+        if "NomeLoja" in df_cluster.columns:
+            self._cluster_rows = _group_positions(df_cluster["NomeLoja"])
+
+        self._names_by_code: Dict[int, str] = {}
+        if "codigo_franquia" in df_cluster.columns and self._cluster_rows:
+            codes = df_cluster["codigo_franquia"].to_numpy()
+            for name, rows in self._cluster_rows.items():
+                code = codes[rows[0]]
+                if pd.notna(code):
+                    self._names_by_code.setdefault(int(code), name)
+
+        # Membros de cada grupo comparável
+        self._peer_rows: Dict[str, np.ndarray] = {}
+        if "grupo_comparavel" in df_cluster.columns:
+            self._peer_rows = _group_positions(df_cluster["grupo_comparavel"])
+
+        # Permutação que ordena a aba diária por loja (ordem estável): cada loja é
+        # uma faixa contígua da permutação, aplicada à aba sob demanda
+        self._daily_ranges: Dict[str, Tuple[int, int]] = {}
+        self._daily_order = np.array([], dtype=np.intp)
+        if "NomeLoja" in df_diaria.columns:
+            daily_rows = _group_positions(df_diaria["NomeLoja"])
+            if daily_rows:
+                self._daily_order = np.concatenate(list(daily_rows.values()))
+
+            start = 0
+            for name, rows in daily_rows.items():
+                self._daily_ranges[name] = (start, start + len(rows))
+                start += len(rows)
+        self._daily_order.flags.writeable = False
+
+        logger.info(f"Índice de lojas construído: {len(self._cluster_rows)} lojas, {len(self._peer_rows)} grupos")
+
+    def resolve(self, store: Union[str, int]) -> Optional[str]:
+        """
+        Converte NomeLoja ou codigo_franquia no nome da loja
+
+        Args:
+            store: Nome da loja ou código da franquia
+
+        Returns:
+            Optional[str]: Nome da loja ou None se não encontrada
+        """
+        if isinstance(store, str):
+            return store if store in self._cluster_rows or store in self._daily_ranges else None
+        try:
+            return self._names_by_code.get(int(store))
+        except (TypeError, ValueError):
+            return None
+
+    def store_names(self) -> List[str]:
+        """Lojas presentes na aba cluster, em ordem alfabética"""
+        return sorted(self._cluster_rows)
+
+    def cluster_position(self, store: Union[str, int]) -> Optional[int]:
+        """Posição da linha de referência (primeira) da loja na aba cluster"""
+        rows = self.cluster_rows(store)
+        return int(rows[0]) if len(rows) else None
+
+    def cluster_rows(self, store: Union[str, int]) -> np.ndarray:
+        """Posições de todas as linhas da loja na aba cluster"""
+        name = self.resolve(store)
+        return self._cluster_rows.get(name, np.array([], dtype=np.intp))
+
+    def daily_rows(self, store: Union[str, int]) -> pd.DataFrame:
+        """Linhas da loja na aba diária (faixa contígua da permutação por loja)"""
+        name = self.resolve(store)
+        start, end = self._daily_ranges.get(name, (0, 0))
+        return self.df_diaria.iloc[self._daily_order[start:end]].reset_index(drop=True)
+
+    def peer_positions(self, grupo: str) -> np.ndarray:
+        """Posições das linhas do grupo comparável na aba cluster"""
+        return self._peer_rows.get(str(grupo), np.array([], dtype=np.intp))
+
+
+class FilterIndex:
+    """
+    Índice de filtros em bitmaps: um bitmap por valor de dimensão e por sinal de Lacuna
+
+    Cada bitmap guarda uma linha por bit em palavras uint64; combinações de
+    filtros são AND/OR bit a bit e o resultado vira posições para iloc, sem
+    copiar o DataFrame.
+    """
+
+    SIGNS = ("negative", "positive", "zero")
+
+    def __init__(self, df: pd.DataFrame, dimensions: List[str] = FILTER_DIMENSIONS,
+                 sign_columns: List[str] = FILTER_SIGN_COLUMNS):
+        self.n_rows = len(df)
+        self._bitmaps: Dict[str, Dict[Any, np.ndarray]] = {}
+        self._signs: Dict[Tuple[str, str], np.ndarray] = {}
+
+        for dim in dimensions:
+            if dim in df.columns:
+                self._bitmaps[dim] = {
+                    value: self._from_positions(rows)
+                    for value, rows in self._value_positions(df[dim]).items()
+                }
+
+        for column in sign_columns:
+            if column in df.columns and pd.api.types.is_numeric_dtype(df[column].dtype):
+                values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+                self._signs[(column, "negative")] = self._pack(values < 0)
+                self._signs[(column, "positive")] = self._pack(values > 0)
+                self._signs[(column, "zero")] = self._pack(values == 0)
+
+        logger.info(
+            f"Índice de filtros construído: {self.n_rows} linhas, "
+            f"{sum(len(values) for values in self._bitmaps.values())} bitmaps de valor, {len(self._signs)} de sinal"
+        )
+
+    @staticmethod
+    def _value_positions(series: pd.Series) -> Dict[Any, np.ndarray]:
+        """Posições das linhas de cada valor distinto (chaves com o tipo original)"""
+        codes, uniques = pd.factorize(series)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        return {
+            value: order[bounds[code]:bounds[code + 1]]
+            for code, value in enumerate(uniques)
+        }
+
+    def _pack(self, mask: np.ndarray) -> np.ndarray:
+        """Máscara booleana -> bitmap em palavras uint64"""
+        n_words = (self.n_rows + 63) // 64
+        packed = np.zeros(n_words * 8, dtype=np.uint8)
+        bits = np.packbits(mask, bitorder="little")
+        packed[:len(bits)] = bits
+        return packed.view(np.uint64)
+
+    def _from_positions(self, positions: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[positions] = True
+        return self._pack(mask)
+
+    def all(self) -> np.ndarray:
+        """Bitmap com todas as linhas"""
+        return self._pack(np.ones(self.n_rows, dtype=bool))
+
+    def none(self) -> np.ndarray:
+        """Bitmap vazio"""
+        return np.zeros((self.n_rows + 63) // 64, dtype=np.uint64)
+
+    def has(self, column: str) -> bool:
+        """Indica se a coluna tem bitmaps por valor"""
+        return column in self._bitmaps
+
+    def equals(self, column: str, value: Any) -> np.ndarray:
+        """Bitmap das linhas com column == value (vazio para valores ausentes)"""
+        bitmap = self._bitmaps[column].get(value)
+        return bitmap if bitmap is not None else self.none()
+
+    def isin(self, column: str, values) -> np.ndarray:
+        """Bitmap das linhas com column em values (OR dos bitmaps de cada valor)"""
+        bitmap = self.none()
+        for value in values:
+            bitmap = bitmap | self.equals(column, value)
+        return bitmap
+
+    def sign(self, column: str, sign: str) -> np.ndarray:
+        """Bitmap das linhas com Lacuna negativa, positiva ou zero (NaN fica fora)"""
+        if sign not in self.SIGNS:
+            raise ValueError(f"Sinal inválido: {sign}. Use: {', '.join(self.SIGNS)}")
+        return self._signs[(column, sign)]
+
+    def mask(self, bitmap: np.ndarray) -> np.ndarray:
+        """Bitmap -> máscara booleana por linha"""
+        return np.unpackbits(bitmap.view(np.uint8), count=self.n_rows, bitorder="little").astype(bool)
+
+    def positions(self, bitmap: np.ndarray) -> np.ndarray:
+        """Bitmap -> posições das linhas selecionadas (para iloc)"""
+        return np.flatnonzero(self.mask(bitmap))
+
+    def count(self, bitmap: np.ndarray) -> int:
+        """Quantidade de linhas selecionadas (bits ligados; os bits além de n_rows são sempre zero)"""
+        return int(np.unpackbits(bitmap.view(np.uint8)).sum())
+
+
+@st.cache_resource
+def get_index_cache() -> MemoCache:
+    """Índices por dataset, compartilhados por todas as sessões do processo"""
+    return MemoCache(max_entries=CACHE_CONFIG["max_entries"])
+
+
+@st.cache_resource
+def get_top_k_cache() -> MemoCache:
+    """Rankings top-k por dataset e máscara, separados dos índices estruturais"""
+    return MemoCache(max_entries=CACHE_CONFIG["top_k_max_entries"])
+
+
+def get_store_index(data: Dict[str, pd.DataFrame], dataset_key: Optional[str] = None) -> StoreIndex:
+    """
+    Retorna o índice de lojas de um dataset, construindo-o uma única vez
+
+    Args:
+        data: Dicionário com DataFrames
+        dataset_key: Chave do dataset (None constrói um índice sem compartilhar)
+
+    Returns:
+        StoreIndex: Índice de lojas
+    """
+    df_cluster = data.get("pulso_consulta_diaria_cluster_a", pd.DataFrame())
+    df_diaria = data.get("pulso_consulta_diaria", pd.DataFrame())
+
+    if dataset_key is None:
+        return StoreIndex(df_cluster, df_diaria)
+
+    cache = get_index_cache()
+    key = ("store_index", dataset_key)
+    found, index = cache.get(key)
+    if not found:
+        index = StoreIndex(df_cluster, df_diaria)
+        cache.put(key, index)
+    return index
+
+
+def mask_digest(mask: Optional[np.ndarray]) -> str:
+    """Resumo de uma máscara booleana, usado como parte de chaves de cache"""
+    if mask is None:
+        return "all"
+    packed = np.packbits(np.asarray(mask, dtype=bool))
+    return f"{len(mask)}:{hashlib.blake2b(packed.tobytes(), digest_size=12).hexdigest()}"
+
+
+def get_top_k(data: Dict[str, pd.DataFrame], sheet: str, column: str, k: int,
+              mask: Optional[np.ndarray] = None, largest: bool = False,
+              dataset_key: Optional[str] = None) -> np.ndarray:
+    """
+    Ranking top-k de uma coluna sob uma máscara de filtro, sem copiar o DataFrame
+    
+    O resultado (posições das linhas) fica em cache por dataset, aba, coluna
+    e máscara, em um LRU próprio (get_top_k_cache) para que novas combinações
+    de filtros não despejem os índices do dataset; o chamador seleciona só as
+    k linhas com iloc.
+    
+    Args:
+        data: Dicionário com DataFrames
+        sheet: Aba a ranquear
+        column: Coluna a ranquear (p.ex. LacunaRL)
+        k: Quantidade de linhas
+        mask: Máscara booleana das linhas elegíveis (None considera todas)
+        largest: Maiores valores primeiro (False: menores primeiro)
+        dataset_key: Chave do dataset (None calcula sem cache)
+        
+    Returns:
+        np.ndarray: Posições das linhas em ordem de ranking
+    """
+    df = data.get(sheet, pd.DataFrame())
+    if column not in df.columns:
+        logger.warning(f"Coluna {column} não encontrada nos dados")
+        return np.array([], dtype=np.intp)
+
+    if mask is not None and len(mask) != len(df):
+        raise ValueError(f"Máscara com {len(mask)} linhas para um DataFrame de {len(df)} linhas")
+
+    def compute() -> np.ndarray:
+        values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        return top_k_positions(values, k, mask=mask, largest=largest)
+
+    if dataset_key is None:
+        return compute()
+
+    cache = get_top_k_cache()
+    key = ("top_k", dataset_key, sheet, column, mask_digest(mask), k, largest)
+    found, positions = cache.get(key)
+    if not found:
+        positions = compute()
+        positions.setflags(write=False)
+        cache.put(key, positions)
+    return positions
+
+
+# Índices de filtro por DataFrame somente leitura, identificados pelos arrays
+# compartilhados (iguais nas cópias rasas entregues a cada sessão); a entrada
+# sai junto com os arrays
+_filter_indexes: Dict[Tuple, Tuple[weakref.ref, FilterIndex]] = {}
+_filter_indexes_lock = threading.Lock()
+
+
+def _frame_arrays(df: pd.DataFrame) -> List[np.ndarray]:
+    """Arrays de origem (sem views) de cada coluna; códigos para categóricas"""
+    arrays = []
+    for col in df.columns:
+        series = df[col]
+        values = series.cat.codes.to_numpy() if isinstance(series.dtype, pd.CategoricalDtype) else series.to_numpy()
+        while isinstance(values.base, np.ndarray):
+            values = values.base
+        arrays.append(values)
+    return arrays
+
+
+def get_filter_index(df: pd.DataFrame) -> FilterIndex:
+    """
+    Retorna o índice de filtros de um DataFrame
+
+    DataFrames somente leitura (os do registro de datasets e suas cópias
+    rasas) têm o índice construído uma única vez e compartilhado enquanto os
+    arrays existirem; os demais recebem um índice novo a cada chamada.
+
+    Args:
+        df: DataFrame a indexar
+
+    Returns:
+        FilterIndex: Índice de filtros
+    """
+    if not is_frozen_frame(df):
+        return FilterIndex(df)
+
+    arrays = _frame_arrays(df)
+    key = (len(df), tuple(map(str, df.columns)), tuple(values.__array_interface__["data"][0] for values in arrays))
+    with _filter_indexes_lock:
+        entry = _filter_indexes.get(key)
+        if entry is not None and entry[0]() is arrays[0]:
+            return entry[1]
+
+    index = FilterIndex(df)
+
+    def discard(_ref, key=key):
+        with _filter_indexes_lock:
+            current = _filter_indexes.get(key)
+            if current is not None and current[0] is _ref:
+                del _filter_indexes[key]
+
+    with _filter_indexes_lock:
+        _filter_indexes[key] = (weakref.ref(arrays[0], discard), index)
+    return index
+
+
+def find_filter_index(df: pd.DataFrame) -> Optional[FilterIndex]:
+    """Índice de filtros compartilhado de um DataFrame somente leitura (None para os demais)"""
+    return get_filter_index(df) if is_frozen_frame(df) else None
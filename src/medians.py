@@ -0,0 +1,242 @@
+"""
+Medianas semanais por grupo comparável do Projeto Pulso
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Mapping, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Volumes da aba diária: {volume: (coluna atual, coluna do ano anterior)}
+NATIVE_VOLUMES = {
+    "rl": ("receita_liquida", "receita_liquida_um_aa_com"),
+    "cupom": ("qtd_cupom", "qtd_cupom_um_aa_com"),
+    "item": ("qtd_item", "Qtd_item_um_aa_com")
+}
+
+# Fórmulas da documentação: LacunaX = X_atual - (1 + Mediana_Semana_X) x X_ano_anterior,
+# com X = numerador / denominador (None para volumes aditivos)
+NATIVE_LACUNAS = {
+    "LacunaRL": {"numerator": "rl", "denominator": None, "median": "Mediana_Semana_RL"},
+    "LacunaCupom": {"numerator": "cupom", "denominator": None, "median": "Mediana_Semana_cupom"},
+    "LacunaBM": {"numerator": "rl", "denominator": "cupom", "median": "Mediana_semana_bm"},
+    "LacunaPM": {"numerator": "rl", "denominator": "item", "median": "Mediana_semana_pm"},
+    "LacunaProd": {"numerator": "item", "denominator": "cupom", "median": "Mediana_semana_prod"}
+}
+
+# Chave de cada célula da tabela de medianas
+MEDIAN_KEYS = ["grupo_comparavel", "semana"]
+
+
+def metric_ratio(volumes: Mapping[str, np.ndarray], spec: Dict) -> np.ndarray:
+    """
+    Valor da métrica de uma Lacuna a partir de volumes somados
+
+    Args:
+        volumes: Arrays de volume por nome (rl, cupom, item)
+        spec: Entrada de NATIVE_LACUNAS
+
+    Returns:
+        np.ndarray: Volume (métricas aditivas) ou razão numerador/denominador (NaN se denominador zero)
+    """
+    numerator = volumes[spec["numerator"]]
+    if spec["denominator"] is None:
+        return numerator
+    denominator = volumes[spec["denominator"]]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
+
+
+class WeeklyMedianEngine:
+    """
+    Medianas Mediana_Semana_* por (grupo_comparavel, semana), com atualização por células
+
+    As medianas saem das linhas carregadas: só reproduzem as colunas da
+    planilha quando a aba diária traz a semana completa de todas as lojas do
+    grupo (a base padrão é uma amostra de 2 dos 7 dias da semana 25-23).
+    """
+
+    def __init__(self, groups: Optional[Mapping[str, str]] = None):
+        """
+        Args:
+            groups: Grupo comparável por NomeLoja, substituindo o da aba (p.ex. após reagrupar lojas)
+        """
+        self.groups = dict(groups) if groups else None
+
+    def missing_columns(self, df_diaria: pd.DataFrame) -> List[str]:
+        """Colunas da aba diária necessárias às medianas que não estão nos dados"""
+        required = ["NomeLoja", "semana"] + [col for pair in NATIVE_VOLUMES.values() for col in pair]
+        if self.groups is None:
+            required.append("grupo_comparavel")
+        return [col for col in required if col not in df_diaria.columns]
+
+    def _store_groups(self, df: pd.DataFrame) -> pd.Series:
+        """Grupo comparável de cada linha (reagrupamento, se houver, tem precedência)"""
+        if self.groups is None:
+            return df["grupo_comparavel"].astype(str)
+        mapped = df["NomeLoja"].astype(str).map(self.groups)
+        if "grupo_comparavel" in df.columns:
+            mapped = mapped.fillna(df["grupo_comparavel"].astype(str))
+        return mapped
+
+    def compute(self, df_diaria: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+        """
+        Calcula as medianas de todas as células em uma única passagem agrupada
+
+        Os volumes são somados por (loja, semana); o crescimento ano contra ano
+        de cada métrica vira uma coluna e as cinco medianas saem do mesmo
+        groupby por (grupo_comparavel, semana).
+
+        Args:
+            df_diaria: Aba diária
+            start: Primeiro dia considerado (None = início dos dados)
+            end: Último dia considerado (None = fim dos dados)
+
+        Returns:
+            pd.DataFrame: Uma linha por célula com as colunas Mediana_Semana_* e a quantidade de lojas
+        """
+        missing = self.missing_columns(df_diaria)
+        if missing:
+            raise ValueError(f"Colunas ausentes na aba diária: {', '.join(missing)}")
+
+        df = df_diaria
+        if (start is not None or end is not None) and "datavenda" in df.columns:
+            dates = df["datavenda"]
+            mask = dates.notna()
+            if start is not None:
+                mask &= dates >= pd.Timestamp(start).normalize()
+            if end is not None:
+                mask &= dates < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+            df = df[mask]
+
+        columns = [col for pair in NATIVE_VOLUMES.values() for col in pair]
+        rows = pd.DataFrame({
+            "NomeLoja": df["NomeLoja"].astype(str).to_numpy(),
+            "semana": df["semana"].astype(str).to_numpy(),
+            "grupo_comparavel": self._store_groups(df).to_numpy(),
+            **{col: df[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in columns}
+        })
+        rows = rows[df["NomeLoja"].notna().to_numpy() & df["semana"].notna().to_numpy()]
+
+        # Volumes por (loja, semana); o grupo é o da primeira linha da loja na semana
+        store_weeks = rows.groupby(["NomeLoja", "semana"], sort=False).agg(
+            grupo_comparavel=("grupo_comparavel", "first"),
+            **{col: (col, "sum") for col in columns}
+        )
+
+        current = {name: store_weeks[atual].to_numpy() for name, (atual, _) in NATIVE_VOLUMES.items()}
+        previous = {name: store_weeks[anterior].to_numpy() for name, (_, anterior) in NATIVE_VOLUMES.items()}
+
+        growth = {"grupo_comparavel": store_weeks["grupo_comparavel"].to_numpy(),
+                  "semana": store_weeks.index.get_level_values("semana")}
+        for spec in NATIVE_LACUNAS.values():
+            actual = metric_ratio(current, spec)
+            baseline = metric_ratio(previous, spec)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                growth[spec["median"]] = np.where(baseline != 0, actual / baseline - 1, np.nan)
+
+        median_columns = [spec["median"] for spec in NATIVE_LACUNAS.values()]
+        grouped = pd.DataFrame(growth).groupby(MEDIAN_KEYS, dropna=False)
+        table = grouped[median_columns].median()
+        table["lojas"] = grouped.size()
+
+        table = table.reset_index().sort_values(MEDIAN_KEYS, ignore_index=True)
+        logger.info(f"Medianas semanais calculadas: {len(table)} células, {len(store_weeks)} lojas-semana")
+        return table
+
+    def affected_cells(self, df_diaria: pd.DataFrame, days: List[str]) -> pd.DataFrame:
+        """
+        Células (grupo_comparavel, semana) com linhas nos dias informados
+
+        Args:
+            df_diaria: Aba diária
+            days: Dias no formato AAAA-MM-DD
+
+        Returns:
+            pd.DataFrame: Células distintas
+        """
+        if df_diaria.empty or not days or "datavenda" not in df_diaria.columns:
+            return pd.DataFrame(columns=MEDIAN_KEYS)
+
+        in_days = df_diaria["datavenda"].dt.strftime("%Y-%m-%d").isin(days)
+        rows = df_diaria[in_days]
+        return pd.DataFrame({
+            "grupo_comparavel": self._store_groups(rows).to_numpy(),
+            "semana": rows["semana"].astype(str).to_numpy()
+        }).drop_duplicates(ignore_index=True)
+
+    def update(self, table: Optional[pd.DataFrame], base_daily: pd.DataFrame,
+               df_diaria: pd.DataFrame, changed_days: List[str]) -> pd.DataFrame:
+        """
+        Atualiza a tabela recalculando apenas as células tocadas pelos dias alterados
+
+        Células afetadas são as que tinham linhas nos dias alterados antes da
+        atualização ou que têm linhas nesses dias depois dela. Cada célula
+        afetada é recalculada com todas as suas linhas (a semana inteira).
+
+        Args:
+            table: Tabela de medianas do dataset anterior (None recalcula tudo)
+            base_daily: Aba diária antes da atualização
+            df_diaria: Aba diária depois da atualização
+            changed_days: Dias (AAAA-MM-DD) novos, alterados ou removidos
+
+        Returns:
+            pd.DataFrame: Tabela de medianas atualizada
+        """
+        if table is None or table.empty:
+            return self.compute(df_diaria)
+
+        cells = pd.concat(
+            [self.affected_cells(base_daily, changed_days), self.affected_cells(df_diaria, changed_days)],
+            ignore_index=True
+        ).drop_duplicates(ignore_index=True)
+        if cells.empty:
+            return table
+
+        cell_index = pd.MultiIndex.from_frame(cells)
+        row_cells = pd.MultiIndex.from_arrays([
+            self._store_groups(df_diaria).to_numpy(), df_diaria["semana"].astype(str).to_numpy()
+        ])
+        recomputed = self.compute(df_diaria[row_cells.isin(cell_index)])
+
+        kept = table[~pd.MultiIndex.from_frame(table[MEDIAN_KEYS]).isin(cell_index)]
+        updated = pd.concat([kept, recomputed], ignore_index=True).sort_values(MEDIAN_KEYS, ignore_index=True)
+
+        logger.info(f"Medianas semanais atualizadas: {len(cells)} de {len(updated)} células recalculadas")
+        return updated
+
+    @staticmethod
+    def lookup(table: pd.DataFrame, grupos, semanas, column: str) -> np.ndarray:
+        """
+        Mediana de cada par (grupo, semana) informado
+
+        Args:
+            table: Tabela de medianas
+            grupos: Grupo comparável de cada par
+            semanas: Semana de cada par
+            column: Coluna Mediana_Semana_* desejada
+
+        Returns:
+            np.ndarray: Medianas (NaN para células sem dados)
+        """
+        if table is None or table.empty or column not in table.columns:
+            return np.full(len(grupos), np.nan)
+
+        index = pd.MultiIndex.from_frame(table[MEDIAN_KEYS].astype(str))
+        keys = pd.MultiIndex.from_arrays([np.asarray(grupos, dtype=str), np.asarray(semanas, dtype=str)])
+        positions = index.get_indexer(keys)
+        values = table[column].to_numpy(dtype=np.float64)
+        return np.where(positions >= 0, values[positions], np.nan)
+
+    @staticmethod
+    def to_records(table: pd.DataFrame) -> List[Dict]:
+        """Tabela em registros serializáveis em JSON (informações do cache colunar)"""
+        return table.astype({"grupo_comparavel": str, "semana": str}).to_dict("records")
+
+    @staticmethod
+    def from_records(records: List[Dict]) -> pd.DataFrame:
+        """Reconstrói a tabela gravada com to_records"""
+        return pd.DataFrame.from_records(records) if records else pd.DataFrame()
@@ -8,6 +8,13 @@ from typing import Dict, List, Any, Optional
 import logging
 from pathlib import Path
 import os
+import uuid
+
+from config import BASE_EXCEL_PATH, LOADER_CONFIG
+from .background_loader import get_background_loader
+from .cache import compute_content_hash
+from .dataset_registry import get_dataset_registry
+from .indexes import find_filter_index
 
 logger = logging.getLogger(__name__)
 
@@ -109,10 +116,7 @@ def save_uploaded_file(uploaded_file, upload_dir: Path) -> Optional[Path]:
 def clear_cache():
     """Limpa todos os caches do Streamlit"""
     st.cache_data.clear()
-    if 'data' in st.session_state:
-        del st.session_state['data']
-    if 'metadata' in st.session_state:
-        del st.session_state['metadata']
+    SessionManager.clear_session()
     logger.info("Cache limpo")
 
 
@@ -247,6 +251,11 @@ def filter_dataframe(df: pd.DataFrame, filters: Dict[str, Any]) -> pd.DataFrame:
     """
     Aplica filtros a um DataFrame
     
+    Filtros de igualdade e de lista sobre DataFrames do registro de datasets
+    usam o índice de filtros em bitmaps (construído uma vez por DataFrame);
+    os demais viram uma única máscara booleana. Apenas as linhas
+    selecionadas são copiadas.
+    
     Args:
         df: DataFrame a ser filtrado
         filters: Dicionário com filtros {coluna: valor}
@@ -254,25 +263,37 @@ def filter_dataframe(df: pd.DataFrame, filters: Dict[str, Any]) -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame filtrado
     """
-    filtered_df = df.copy()
+    index = find_filter_index(df)
+    bitmap = index.all() if index is not None else None
+    mask = None
     
     for column, value in filters.items():
-        if column in filtered_df.columns and value is not None:
-            if isinstance(value, list):
-                # Filtro múltiplo
-                filtered_df = filtered_df[filtered_df[column].isin(value)]
-            elif isinstance(value, tuple) and len(value) == 2:
+        if column in df.columns and value is not None:
+            if isinstance(value, tuple) and len(value) == 2:
                 # Filtro de range
                 min_val, max_val = value
-                filtered_df = filtered_df[
-                    (filtered_df[column] >= min_val) & 
-                    (filtered_df[column] <= max_val)
-                ]
+                condition = ((df[column] >= min_val) & (df[column] <= max_val)).to_numpy()
+            elif index is not None and index.has(column):
+                # Filtro múltiplo ou simples pelo índice de bitmaps
+                bitmap &= index.isin(column, value) if isinstance(value, list) else index.equals(column, value)
+                continue
+            elif isinstance(value, list):
+                # Filtro múltiplo
+                condition = df[column].isin(value).to_numpy()
             else:
                 # Filtro simples
-                filtered_df = filtered_df[filtered_df[column] == value]
+                condition = (df[column] == value).to_numpy()
+            
+            mask = condition if mask is None else mask & condition
+    
+    if index is not None:
+        if mask is None:
+            return df.iloc[index.positions(bitmap)]
+        mask &= index.mask(bitmap)
     
-    return filtered_df
+    if mask is None:
+        return df.copy()
+    return df[mask]
 
 
 def create_download_link(file_path: Path, link_text: str = "Download") -> str:
@@ -392,20 +413,143 @@ def initialize_session_state():
 
 
 class SessionManager:
-    """Gerenciador de sessão para persistir dados"""
+    """Gerenciador de sessão para persistir dados
+    
+    Datasets com chave (metadata["dataset_key"]) ficam no registro compartilhado
+    do processo; a sessão guarda apenas a chave, os metadados e seus filtros.
+    """
+    
+    @staticmethod
+    def _session_token() -> str:
+        """Identificador da sessão usado na contagem de referências do registro"""
+        if 'session_token' not in st.session_state:
+            st.session_state['session_token'] = uuid.uuid4().hex
+        return st.session_state['session_token']
+    
+    @staticmethod
+    def _release_dataset():
+        """Libera a referência da sessão ao dataset compartilhado atual"""
+        key = st.session_state.pop('dataset_key', None)
+        if key is not None:
+            get_dataset_registry().release(key, SessionManager._session_token())
     
     @staticmethod
     def save_data(data: Dict[str, pd.DataFrame], metadata: Dict):
         """Salva dados na sessão"""
-        st.session_state['data'] = data
+        key = metadata.get("dataset_key")
+        
+        if key is not None:
+            token = SessionManager._session_token()
+            get_dataset_registry().register(key, data, metadata, holder=token)
+            if st.session_state.get('dataset_key') != key:
+                SessionManager._release_dataset()
+            st.session_state['dataset_key'] = key
+            st.session_state.pop('data', None)
+        else:
+            # Dados sem chave (p.ex. exemplo) ficam apenas nesta sessão
+            SessionManager._release_dataset()
+            st.session_state['data'] = data
+        
         st.session_state['metadata'] = metadata
         st.session_state['data_loaded'] = True
         st.session_state['last_update'] = pd.Timestamp.now()
     
+    @staticmethod
+    def attach_dataset(key: str) -> bool:
+        """
+        Associa a sessão a um dataset já publicado no registro, sem recarregá-lo
+        
+        Args:
+            key: Chave do dataset
+            
+        Returns:
+            bool: True se o dataset estava disponível
+        """
+        registry = get_dataset_registry()
+        token = SessionManager._session_token()
+        
+        if not registry.acquire(key, token):
+            return False
+        
+        if st.session_state.get('dataset_key') != key:
+            SessionManager._release_dataset()
+        
+        _, metadata = registry.get(key, token)
+        st.session_state['dataset_key'] = key
+        st.session_state.pop('data', None)
+        st.session_state['metadata'] = metadata
+        st.session_state['data_loaded'] = True
+        st.session_state['last_update'] = pd.Timestamp.now()
+        return True
+    
+    @staticmethod
+    def attach_default_base() -> bool:
+        """
+        Associa a sessão à base padrão carregada em segundo plano
+        
+        A carga começa na inicialização do processo (get_background_loader);
+        as sessões reaproveitam a carga em andamento ou já concluída, sem bloquear.
+        
+        Returns:
+            bool: True se a base padrão já estava pronta e foi associada
+        """
+        if not BASE_EXCEL_PATH.exists():
+            return False
+        
+        background_loader = get_background_loader()
+        background_loader.start()
+        
+        key = background_loader.dataset_key()
+        if key is None:
+            return False
+        
+        if SessionManager.attach_dataset(key):
+            return True
+        
+        # Dataset descartado do registro por inatividade: carregar novamente
+        background_loader.start(force=True)
+        return False
+    
+    @staticmethod
+    def upload_content_hash(uploaded_file) -> str:
+        """
+        Hash BLAKE2 do conteúdo de um arquivo enviado
+        
+        O hash é calculado uma vez por upload (file_id do Streamlit) e
+        reaproveitado nos reruns seguintes da página.
+        
+        Args:
+            uploaded_file: Arquivo enviado via streamlit file_uploader
+            
+        Returns:
+            str: Hash hexadecimal do conteúdo
+        """
+        file_id = getattr(uploaded_file, "file_id", None)
+        cached = st.session_state.get('upload_hash')
+        if file_id is not None and cached is not None and cached[0] == file_id:
+            return cached[1]
+        
+        content_hash = compute_content_hash(uploaded_file)
+        if file_id is not None:
+            st.session_state['upload_hash'] = (file_id, content_hash)
+        return content_hash
+    
+    @staticmethod
+    def get_dataset_key() -> Optional[str]:
+        """Recupera a chave do dataset compartilhado da sessão (None se local)"""
+        return st.session_state.get('dataset_key')
+    
     @staticmethod
     def get_data() -> Dict[str, pd.DataFrame]:
         """Recupera dados da sessão"""
-        return st.session_state.get('data', {})
+        key = st.session_state.get('dataset_key')
+        if key is None:
+            return st.session_state.get('data', {})
+        
+        entry = get_dataset_registry().get(key, SessionManager._session_token())
+        if entry is None:
+            return {}
+        return entry[0]
     
     @staticmethod
     def get_metadata() -> Dict:
@@ -415,12 +559,63 @@ class SessionManager:
     @staticmethod
     def is_data_loaded() -> bool:
         """Verifica se há dados carregados"""
-        return st.session_state.get('data_loaded', False)
+        if not st.session_state.get('data_loaded', False):
+            return False
+        
+        key = st.session_state.get('dataset_key')
+        if key is not None and key not in get_dataset_registry():
+            # Dataset descartado do registro (sessão inativa além do ttl)
+            SessionManager.clear_session()
+            return False
+        return True
     
     @staticmethod
     def clear_session():
         """Limpa dados da sessão"""
+        SessionManager._release_dataset()
         keys_to_clear = ['data', 'metadata', 'data_loaded', 'current_file', 'last_update']
         for key in keys_to_clear:
             if key in st.session_state:
                 del st.session_state[key]
+
+
+@st.fragment(run_every=LOADER_CONFIG["background_poll_interval"])
+def _poll_default_base():
+    """Atualiza a página assim que a base padrão em segundo plano estiver pronta"""
+    if SessionManager.attach_default_base():
+        st.rerun()
+
+
+def show_default_base_loading() -> bool:
+    """
+    Exibe o aviso de carga da base padrão em segundo plano
+    
+    Enquanto a carga estiver em andamento (ou houver uma nova tentativa
+    agendada após falha), um fragmento verifica periodicamente o resultado e
+    atualiza a página quando os dados ficam prontos.
+    
+    Returns:
+        bool: True se a base padrão ainda está em carregamento
+    """
+    if not BASE_EXCEL_PATH.exists():
+        return False
+    
+    background_loader = get_background_loader()
+    if not background_loader.is_loading():
+        if background_loader.dataset_key() is not None:
+            # Carga concluída entre a verificação e a renderização
+            st.rerun()
+        
+        error = background_loader.error()
+        retry_in = background_loader.retry_in()
+        if error and retry_in is not None:
+            st.warning(f"⚠️ Erro ao carregar base padrão: {error}. Nova tentativa em {retry_in:.0f}s.")
+            _poll_default_base()
+            return True
+        if error:
+            st.error(f"❌ Erro ao carregar base padrão: {error}")
+        return False
+    
+    st.info("🔄 Carregando base padrão em segundo plano... os indicadores aparecem assim que os dados estiverem prontos.")
+    _poll_default_base()
+    return True
@@ -420,6 +420,6 @@ def create_summary_table(df: pd.DataFrame, group_by: str, metrics: List[str]) ->
     if not available_metrics:
         return pd.DataFrame()
     
-    summary = df.groupby(group_by)[available_metrics].agg(['sum', 'mean', 'count']).round(2)
+    summary = df.groupby(group_by, observed=True)[available_metrics].agg(['sum', 'mean', 'count']).round(2)
     
     return summary
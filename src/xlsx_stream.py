@@ -0,0 +1,191 @@
+"""
+Leitor XLSX em streaming para exportações grandes do Projeto Pulso
+"""
+
+from datetime import date, datetime
+from numbers import Number
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Linhas do primeiro bloco de cada buffer de coluna; os blocos seguintes dobram
+# de tamanho até DEFAULT_CHUNK_SIZE
+INITIAL_CHUNK_SIZE = 1_024
+DEFAULT_CHUNK_SIZE = 65_536
+
+# Tipo do buffer usado para cada dtype declarado no SHEET_SCHEMAS
+_BUFFER_KINDS = {
+    "category": "text",
+    "string": "text",
+    "int32": "number",
+    "float32": "number",
+    "float64": "number",
+    "datetime": "datetime"
+}
+
+
+class _ColumnBuffer:
+    """Buffer NumPy de uma coluna, alocado em blocos pré-dimensionados"""
+
+    def __init__(self, kind: str, chunk_size: int):
+        self.kind = kind
+        self.max_chunk_size = chunk_size
+        self.chunks: List[np.ndarray] = []
+        self._allocate(min(INITIAL_CHUNK_SIZE, chunk_size))
+
+    def _allocate(self, size: int) -> None:
+        if self.kind == "number":
+            self.current = np.full(size, np.nan, dtype=np.float64)
+        elif self.kind == "datetime":
+            self.current = np.full(size, np.datetime64("NaT"), dtype="datetime64[ns]")
+        else:
+            self.current = np.empty(size, dtype=object)
+        self.position = 0
+
+    def append(self, value) -> None:
+        if self.position == len(self.current):
+            self.chunks.append(self.current)
+            self._allocate(min(2 * len(self.current), self.max_chunk_size))
+
+        if value is not None:
+            self.current[self.position] = self._convert(value)
+        self.position += 1
+
+    def _convert(self, value):
+        if self.kind == "number":
+            if isinstance(value, Number):
+                return float(value)
+            if isinstance(value, str):
+                try:
+                    return float(value.strip().replace(",", "."))
+                except ValueError:
+                    return np.nan
+            return np.nan
+
+        if self.kind == "datetime":
+            if isinstance(value, (datetime, date)):
+                return np.datetime64(value, "ns")
+            if isinstance(value, str):
+                try:
+                    return np.datetime64(pd.Timestamp(value), "ns")
+                except (ValueError, TypeError):
+                    return np.datetime64("NaT")
+            return np.datetime64("NaT")
+
+        # Sem tipo declarado: floats inteiros viram int, como no pd.read_excel
+        if self.kind == "auto" and isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
+    def to_array(self) -> np.ndarray:
+        return np.concatenate(self.chunks + [self.current[:self.position]])
+
+
+def _header_names(header_row) -> List[str]:
+    """Nomes das colunas no mesmo formato do pd.read_excel (vazias e duplicadas)"""
+    names = []
+    seen: Dict[str, int] = {}
+
+    for i, value in enumerate(header_row):
+        name = f"Unnamed: {i}" if value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+
+    return names
+
+
+def _infer_column(values: np.ndarray) -> pd.Series:
+    """Inferência de tipo para colunas sem tipo declarado, como no pd.read_excel"""
+    series = pd.Series(values, dtype=object)
+    if series.isna().all():
+        # Coluna vazia vira float com NaN
+        return series.astype(np.float64)
+    return series.infer_objects()
+
+
+def read_worksheet(worksheet, columns: Optional[List[str]] = None,
+                   dtypes: Optional[Dict[str, str]] = None, header: int = 1,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Lê uma aba linha a linha preenchendo buffers NumPy por coluna
+
+    Apenas as colunas projetadas são convertidas e armazenadas, então o pico
+    de memória cresce com as colunas lidas, não com o total de células da aba.
+
+    Args:
+        worksheet: Aba aberta com openpyxl em modo read_only
+        columns: Colunas a ler (None lê todas)
+        dtypes: Tipos declarados por coluna (mesmos nomes do SHEET_SCHEMAS)
+        header: Índice da linha de cabeçalho (linhas anteriores são descritivas)
+        chunk_size: Tamanho máximo (linhas) de cada bloco de buffer
+
+    Returns:
+        pd.DataFrame: Dados da aba
+    """
+    dtypes = dtypes or {}
+    rows = worksheet.iter_rows(values_only=True)
+
+    # Pular linhas de descrição antes do cabeçalho
+    for _ in range(header):
+        if next(rows, None) is None:
+            return pd.DataFrame()
+
+    header_row = next(rows, None)
+    if header_row is None:
+        return pd.DataFrame()
+
+    names = _header_names(header_row)
+    wanted = set(columns) if columns is not None else None
+    selected = [
+        (position, name) for position, name in enumerate(names)
+        if wanted is None or name.strip() in wanted
+    ]
+
+    buffers = [
+        _ColumnBuffer(_BUFFER_KINDS.get(dtypes.get(name.strip()), "auto"), chunk_size)
+        for _, name in selected
+    ]
+
+    row_count = 0
+    for row in rows:
+        # Linhas totalmente vazias são ignoradas, como no pd.read_excel
+        if all(value is None for value in row):
+            continue
+
+        row_length = len(row)
+        for (position, _), buffer in zip(selected, buffers):
+            buffer.append(row[position] if position < row_length else None)
+        row_count += 1
+
+    frame_columns = {}
+    for (_, name), buffer in zip(selected, buffers):
+        values = buffer.to_array()
+        if buffer.kind == "auto":
+            frame_columns[name] = _infer_column(values)
+        else:
+            frame_columns[name] = values
+
+    logger.info(f"Leitura em streaming de '{worksheet.title}': {row_count} linhas, {len(selected)} colunas")
+    return pd.DataFrame(frame_columns, copy=False)
+
+
+def open_workbook(source):
+    """
+    Abre um workbook em modo read_only para leitura em streaming
+
+    Args:
+        source: Path, caminho ou arquivo binário
+
+    Returns:
+        openpyxl.Workbook: Workbook aberto (fechar com .close())
+    """
+    return openpyxl.load_workbook(source, read_only=True, data_only=True)
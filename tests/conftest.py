@@ -0,0 +1,100 @@
+"""
+Fixtures dos testes: workbooks e abas sintéticos no formato da planilha Pulso
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import SHEET_SCHEMAS
+
+DAILY_SHEET = "pulso_consulta_diaria"
+CLUSTER_SHEET = "pulso_consulta_diaria_cluster_a"
+
+STORES = [f"Loja {i:02d}" for i in range(12)]
+GROUPS = ["1-1", "1-2", "2-1"]
+GRS = ["GR1", "GR2"]
+
+
+def _text(column: str, positions: np.ndarray) -> list:
+    """Valores de texto de uma coluna por posição da loja"""
+    if column == "NomeLoja":
+        return [STORES[i] for i in positions]
+    if column == "grupo_comparavel":
+        return [GROUPS[i % len(GROUPS)] for i in positions]
+    if column == "NumeroGR":
+        return [GRS[i % len(GRS)] for i in positions]
+    if column == "ds_hub":
+        return [f"HUB {i % 4}" for i in positions]
+    return [f"DIV{i % 2}" for i in positions]
+
+
+def make_sheet(sheet_name: str, days, seed: int = 0) -> pd.DataFrame:
+    """
+    Aba sintética com uma linha por (loja, dia) e as colunas do SHEET_SCHEMAS
+
+    Args:
+        sheet_name: Nome da aba
+        days: Dias (AAAA-MM-DD) da aba
+        seed: Semente dos valores numéricos
+
+    Returns:
+        pd.DataFrame: Aba no formato da planilha
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.to_datetime(list(days))
+    positions = np.tile(np.arange(len(STORES)), len(dates))
+    rows = len(positions)
+    day_values = np.repeat(dates, len(STORES))
+
+    frame = {}
+    for column, dtype in SHEET_SCHEMAS[sheet_name]["dtypes"].items():
+        if column == "datavenda":
+            frame[column] = day_values
+        elif column == "semana":
+            frame[column] = [f"{d.year % 100}-{d.isocalendar().week:02d}" for d in day_values]
+        elif column == "mes":
+            frame[column] = [d.month for d in day_values]
+        elif column == "codigo_franquia":
+            frame[column] = 1000 + positions
+        elif dtype == "category":
+            frame[column] = _text(column, positions)
+        elif dtype == "int32":
+            frame[column] = rng.integers(50, 500, rows)
+        elif column.startswith("Mediana"):
+            frame[column] = np.round(rng.normal(0.05, 0.1, rows), 4)
+        else:
+            frame[column] = np.round(rng.normal(0, 1000, rows), 2)
+
+    return pd.DataFrame(frame)
+
+
+def write_workbook(path: Path, sheets) -> Path:
+    """
+    Grava as abas com a linha descritiva acima do cabeçalho, como na planilha
+
+    Args:
+        path: Arquivo .xlsx de destino
+        sheets: {aba: DataFrame}
+
+    Returns:
+        Path: O próprio arquivo
+    """
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for sheet_name, df in sheets.items():
+            pd.DataFrame([["Pulso - consulta"]]).to_excel(writer, sheet_name=sheet_name, header=False, index=False)
+            df.to_excel(writer, sheet_name=sheet_name, startrow=1, index=False)
+    return path
+
+
+@pytest.fixture
+def workbook_factory(tmp_path):
+    """Cria workbooks sintéticos em tmp_path: factory(nome, {aba: DataFrame})"""
+    def factory(name: str, sheets) -> Path:
+        return write_workbook(tmp_path / name, sheets)
+    return factory
@@ -0,0 +1,114 @@
+"""
+Testes do cubo de Lacunas, do ranking top-k e do índice de filtros contra o pandas
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregation import METRICS_SPEC, top_k_positions
+from src.cube import LacunaCube
+from src.indexes import FilterIndex
+
+from conftest import CLUSTER_SHEET, make_sheet
+
+DAYS = ["2025-06-02", "2025-06-03", "2025-06-10"]
+
+
+@pytest.fixture
+def df_cluster():
+    df = make_sheet(CLUSTER_SHEET, DAYS, seed=7)
+    # Nulos e empates: o pandas e o cubo/ranking devem tratá-los igual
+    df.loc[[3, 17], "LacunaRL"] = np.nan
+    df.loc[[5, 6, 20], "LacunaRL"] = -1500.0
+    df.loc[[8, 30], "LacunaRL"] = 0.0
+    for column in ["NumeroGR", "divisao", "grupo_comparavel", "semana"]:
+        df[column] = df[column].astype("category")
+    return df
+
+
+@pytest.mark.parametrize("by", [
+    ["grupo_comparavel"],
+    ["NumeroGR", "divisao"],
+    ["grupo_comparavel", "semana"],
+    ["divisao", "semana"],  # não materializado: derivado do cuboide mais fino
+    ["mes"]
+])
+def test_cube_rollup_equals_groupby(df_cluster, by):
+    cube = LacunaCube(df_cluster)
+    result = cube.aggregate(by, measures=["LacunaRL", "LacunaCupom"])
+
+    expected = df_cluster.groupby(by, observed=True, sort=True).agg(
+        sum_LacunaRL=("LacunaRL", "sum"), count_LacunaRL=("LacunaRL", "count"),
+        mean_LacunaRL=("LacunaRL", "mean"), std_LacunaRL=("LacunaRL", "std"),
+        sum_LacunaCupom=("LacunaCupom", "sum"), mean_LacunaCupom=("LacunaCupom", "mean")
+    ).reset_index()
+
+    actual = result.sort_values(by).reset_index(drop=True)
+    for column in expected.columns:
+        if column in by:
+            assert actual[column].astype(str).tolist() == expected[column].astype(str).tolist()
+        else:
+            np.testing.assert_allclose(actual[column], expected[column], rtol=1e-9, atol=1e-6)
+
+
+def test_cube_total_and_filters_equal_pandas(df_cluster):
+    cube = LacunaCube(df_cluster)
+
+    total = cube.aggregate(measures=["LacunaRL"])
+    assert total["sum_LacunaRL"].iloc[0] == pytest.approx(df_cluster["LacunaRL"].sum())
+
+    filtered = cube.aggregate(["grupo_comparavel"], filters={"NumeroGR": "GR1"}, measures=["LacunaRL"])
+    expected = df_cluster[df_cluster["NumeroGR"] == "GR1"].groupby("grupo_comparavel", observed=True)["LacunaRL"].sum()
+    np.testing.assert_allclose(filtered.set_index("grupo_comparavel")["sum_LacunaRL"], expected)
+
+
+def test_cube_group_frame_matches_spec_aggregations(df_cluster):
+    spec = METRICS_SPEC["groups"]["analise_gr"]
+    frame = LacunaCube(df_cluster).group_frame(spec).set_index("NumeroGR")
+
+    grouped = df_cluster.groupby("NumeroGR", observed=True)
+    np.testing.assert_allclose(frame["LacunaRL_Total"], grouped["LacunaRL"].sum().round(2))
+    np.testing.assert_allclose(frame["LacunaRL_Media"], grouped["LacunaRL"].mean().round(2))
+    assert frame["Qtd_Lojas"].tolist() == grouped["NomeLoja"].count().tolist()
+
+
+@pytest.mark.parametrize("k", [0, 1, 5, 10, 100])
+@pytest.mark.parametrize("largest", [False, True])
+def test_top_k_equals_nlargest(df_cluster, k, largest):
+    values = df_cluster["LacunaRL"].to_numpy(dtype=np.float64, na_value=np.nan)
+    positions = top_k_positions(values, k, largest=largest)
+
+    # Nulos nunca entram no ranking; com k >= linhas o pandas troca o nlargest por
+    # uma ordenação não estável, então a referência passa a ser a ordenação estável
+    series = pd.Series(values).dropna()
+    if k < len(series):
+        expected = series.nlargest(k) if largest else series.nsmallest(k)
+    else:
+        expected = series.sort_values(ascending=not largest, kind="stable")
+    assert positions.tolist() == expected.index.tolist()
+
+
+def test_top_k_with_mask_equals_filtered_nsmallest(df_cluster):
+    values = df_cluster["LacunaRL"].to_numpy(dtype=np.float64, na_value=np.nan)
+    mask = (values < 0) & (df_cluster["NumeroGR"] == "GR2").to_numpy()
+    positions = top_k_positions(values, 7, mask=mask)
+
+    expected = pd.Series(values)[mask].nsmallest(7)
+    assert positions.tolist() == expected.index.tolist()
+
+
+def test_filter_index_masks_equal_pandas_filters(df_cluster):
+    index = FilterIndex(df_cluster)
+
+    bitmap = index.isin("grupo_comparavel", ["1-1", "2-1"]) & index.equals("NumeroGR", "GR1") \
+        & index.sign("LacunaRL", "negative")
+    expected = (
+        df_cluster["grupo_comparavel"].isin(["1-1", "2-1"]) & (df_cluster["NumeroGR"] == "GR1")
+        & (df_cluster["LacunaRL"] < 0)
+    ).to_numpy()
+
+    assert index.mask(bitmap).tolist() == expected.tolist()
+    assert index.count(bitmap) == int(expected.sum())
+    assert index.count(index.sign("LacunaRL", "zero")) == int((df_cluster["LacunaRL"] == 0).sum())
+    assert index.count(index.equals("NumeroGR", "GR9")) == 0
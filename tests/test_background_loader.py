@@ -0,0 +1,66 @@
+"""
+Testes da nova tentativa com espera exponencial do carregamento em segundo plano
+"""
+
+import time
+
+import pytest
+
+from config import LOADER_CONFIG
+from src.background_loader import BackgroundBaseLoader
+from src.dataset_registry import DatasetRegistry
+
+
+@pytest.fixture
+def loader(monkeypatch, tmp_path):
+    monkeypatch.setitem(LOADER_CONFIG, "background_retry_backoff", 0.05)
+    monkeypatch.setitem(LOADER_CONFIG, "background_retry_max_backoff", 0.2)
+    base = tmp_path / "base.xlsx"
+    base.write_bytes(b"base")
+    monkeypatch.setattr("src.background_loader.BASE_EXCEL_PATH", base)
+    return BackgroundBaseLoader(DatasetRegistry())
+
+
+def _wait(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_failed_load_is_retried_with_backoff(loader, monkeypatch):
+    attempts = []
+
+    def flaky_load():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise ValueError("base indisponível")
+        return "chave"
+
+    monkeypatch.setattr(loader, "_load", flaky_load)
+    loader.start()
+
+    assert _wait(lambda: loader.dataset_key() == "chave")
+    assert len(attempts) == 3
+    # Espera dobrada entre a segunda e a terceira tentativa
+    assert attempts[2] - attempts[1] >= 2 * LOADER_CONFIG["background_retry_backoff"] * 0.9
+    assert loader.retry_in() is None and loader.error() is None
+
+
+def test_failure_is_reported_until_the_retry(loader, monkeypatch):
+    monkeypatch.setitem(LOADER_CONFIG, "background_retry_backoff", 60.0)
+    monkeypatch.setitem(LOADER_CONFIG, "background_retry_max_backoff", 60.0)
+
+    def failing_load():
+        raise ValueError("base indisponível")
+
+    monkeypatch.setattr(loader, "_load", failing_load)
+    future = loader.start()
+
+    assert _wait(lambda: loader.retry_in() is not None)
+    assert loader.error() == "base indisponível"
+    assert 0 < loader.retry_in() <= 60.0
+    # Antes do fim da espera, start() reaproveita a carga que falhou
+    assert loader.start() is future
@@ -0,0 +1,77 @@
+"""
+Testes do cache colunar de workbooks e do cache LRU em memória
+"""
+
+import time
+
+import pandas as pd
+
+from src.cache import MemoCache, WorkbookCache
+
+
+def _data(value: float = 1.0):
+    return {
+        "aba": pd.DataFrame({"NomeLoja": ["A", "B"], "LacunaRL": [value, -value]}),
+        "outra": pd.DataFrame({"x": [1, 2, 3]})
+    }
+
+
+def test_workbook_cache_miss_then_hit(tmp_path):
+    cache = WorkbookCache(tmp_path, ttl=3600, max_entries=5)
+    assert cache.get("k1") is None
+
+    assert cache.put("k1", _data(), info={"versao": 1})
+    cached = cache.get("k1")
+
+    assert set(cached) == {"aba", "outra"}
+    pd.testing.assert_frame_equal(cached["aba"], _data()["aba"])
+    assert cache.get_info("k1") == {"versao": 1}
+
+
+def test_workbook_cache_expired_entry_is_a_miss(tmp_path):
+    cache = WorkbookCache(tmp_path, ttl=0, max_entries=5)
+    cache.put("k1", _data())
+    time.sleep(0.01)
+
+    assert cache.get("k1") is None
+    assert not (tmp_path / "k1").exists()
+
+
+def test_workbook_cache_evicts_least_recently_accessed(tmp_path):
+    cache = WorkbookCache(tmp_path, ttl=3600, max_entries=2)
+    cache.put("k1", _data(1.0))
+    time.sleep(0.01)
+    cache.put("k2", _data(2.0))
+    time.sleep(0.01)
+    assert cache.get("k1") is not None  # k1 passa a ser o mais recente
+    time.sleep(0.01)
+
+    cache.put("k3", _data(3.0))
+
+    assert cache.get("k2") is None
+    assert cache.get("k1") is not None
+    assert cache.get("k3") is not None
+
+
+def test_memo_cache_counts_hits_misses_and_evicts_lru():
+    cache = MemoCache(ttl=3600, max_entries=2)
+    assert cache.get("a") == (False, None)
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == (True, 1)
+    cache.put("c", 3)  # "b" é o menos usado
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("c") == (True, 3)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 2, 2)
+
+
+def test_memo_cache_expired_entry_is_a_miss():
+    cache = MemoCache(ttl=0, max_entries=2)
+    cache.put("a", 1)
+    time.sleep(0.01)
+
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,59 @@
+"""
+Testes da estabilidade dos rótulos de cluster entre ajustes (ClusterModel)
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.clustering import ClusteringResult, ClusterModel
+
+FEATURES = ["RL_Media", "Cupom_Media", "BM"]
+
+
+def _stores(seed: int, shift: float = 0.0) -> pd.DataFrame:
+    """Três grupos de lojas bem separados nas features"""
+    rng = np.random.default_rng(seed)
+    centers = np.array([[1000.0, 100.0, 10.0], [5000.0, 300.0, 16.0], [9000.0, 500.0, 18.0]])
+    points = np.vstack([center + shift + rng.normal(0, [150, 15, 0.5], (20, 3)) for center in centers])
+    df = pd.DataFrame(points, columns=FEATURES)
+    df.insert(0, "Loja", [f"Loja {i:02d}" for i in range(len(df))])
+    return df
+
+
+def _model(centers, label_ids) -> ClusterModel:
+    n_features = len(centers[0])
+    return ClusterModel(
+        features=FEATURES, level="loja", algorithm="kmeans",
+        fill_values=np.zeros(n_features), mean=np.zeros(n_features), scale=np.ones(n_features),
+        centers=np.asarray(centers, dtype=np.float64), label_ids=np.asarray(label_ids),
+        pca_mean=np.zeros(n_features), pca_components=np.eye(2, n_features),
+        explained_variance=np.array([0.6, 0.3]), reference_distance=1.0
+    )
+
+
+def test_match_labels_follows_permuted_centroids():
+    previous = _model([[0, 0, 0], [10, 0, 0], [0, 10, 0]], [4, 7, 9])
+    refit = _model([[0.2, 9.8, 0], [0.1, -0.1, 0], [9.9, 0.3, 0]], [0, 1, 2])
+
+    assert refit._match_labels(previous).tolist() == [9, 4, 7]
+
+
+def test_match_labels_gives_new_ids_to_unmatched_centroids():
+    previous = _model([[0, 0, 0], [10, 0, 0]], [0, 1])
+    refit = _model([[10.1, 0, 0], [0, 20, 0], [0.1, 0, 0]], [0, 1, 2])
+
+    assert refit._match_labels(previous).tolist() == [1, 2, 0]
+
+
+def test_refit_keeps_store_labels_stable():
+    base = _stores(seed=1)
+    first = ClusterModel.from_result(ClusteringResult(base, FEATURES, n_clusters=3))
+
+    # Nova carga: lojas em outra ordem e valores levemente deslocados
+    shuffled = _stores(seed=2, shift=40.0).sample(frac=1.0, random_state=3).reset_index(drop=True)
+    result = ClusteringResult(shuffled, FEATURES, n_clusters=3)
+    second = ClusterModel.from_result(result, previous=first)
+
+    first_ids = dict(zip(base["Loja"], first.assign(base).labels))
+    second_ids = dict(zip(shuffled["Loja"], second.label_ids[result.labels]))
+    assert second_ids == first_ids
@@ -0,0 +1,75 @@
+"""
+Testes da carga incremental por datavenda do DataLoader
+"""
+
+import pandas as pd
+
+from src.data_loader import DataLoader
+
+from conftest import CLUSTER_SHEET, DAILY_SHEET, make_sheet
+
+BASE_DAYS = ["2025-06-02", "2025-06-03"]
+NEW_DAYS = ["2025-06-09"]
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(["datavenda", "NomeLoja"]).reset_index(drop=True)
+
+
+def _sheets(days, seed: int):
+    return {
+        DAILY_SHEET: make_sheet(DAILY_SHEET, days, seed),
+        CLUSTER_SHEET: make_sheet(CLUSTER_SHEET, days, seed + 100)
+    }
+
+
+def _update_workbooks(workbook_factory):
+    """Base (2 dias), atualização (1 dia alterado e 1 novo) e o workbook completo equivalente"""
+    base = _sheets(BASE_DAYS, seed=1)
+    update = _sheets(BASE_DAYS[1:] + NEW_DAYS, seed=2)
+    full = {
+        sheet_name: pd.concat([
+            base[sheet_name][base[sheet_name]["datavenda"] == BASE_DAYS[0]], update[sheet_name]
+        ], ignore_index=True)
+        for sheet_name in base
+    }
+    return (
+        workbook_factory("base.xlsx", base),
+        workbook_factory("update.xlsx", update),
+        workbook_factory("full.xlsx", full)
+    )
+
+
+def test_incremental_merge_equals_full_reload(workbook_factory):
+    base_file, update_file, full_file = _update_workbooks(workbook_factory)
+
+    base_loader = DataLoader(use_cache=False)
+    base_data = base_loader.load_excel_data(base_file)
+    incremental = DataLoader(use_cache=False)
+    merged = incremental.load_excel_incremental(update_file, base_data, base_loader.metadata)
+    full = DataLoader(use_cache=False).load_excel_data(full_file)
+
+    assert incremental.metadata["changed_days"] == BASE_DAYS[1:] + NEW_DAYS
+    for sheet_name in full:
+        pd.testing.assert_frame_equal(
+            _sorted(merged[sheet_name]), _sorted(full[sheet_name])[merged[sheet_name].columns],
+            check_categorical=False
+        )
+
+
+def test_incremental_updates_weekly_medians_and_keeps_metadata_shape(workbook_factory):
+    base_file, update_file, full_file = _update_workbooks(workbook_factory)
+
+    base_loader = DataLoader(use_cache=False)
+    base_data = base_loader.load_excel_data(base_file)
+    incremental = DataLoader(use_cache=False)
+    incremental.load_excel_incremental(update_file, base_data, base_loader.metadata)
+    full = DataLoader(use_cache=False)
+    full.load_excel_data(full_file)
+
+    pd.testing.assert_frame_equal(
+        incremental.weekly_medians.reset_index(drop=True), full.weekly_medians.reset_index(drop=True),
+        check_dtype=False, check_categorical=False
+    )
+    for sheet_name, usage in incremental.metadata["memory_usage"].items():
+        assert set(usage) == set(full.metadata["memory_usage"][sheet_name]) == {"before", "after"}